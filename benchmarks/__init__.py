@@ -0,0 +1,10 @@
+"""
+Benchmarks for the prop analysis and visualization paths.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 1.25
+
+generate.py builds deterministic synthetic stats logs and prop slates,
+run.py times the DataProcessor, DataVisualizer and Flask routes over a
+range of sizes and compares the results with a baseline.
+"""
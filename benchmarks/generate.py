@@ -0,0 +1,120 @@
+"""
+Deterministic synthetic NBA stats logs and prop slates.
+
+The files have the headers listed in the README, so they can be passed
+to the app as they are:
+
+    python -m benchmarks.generate --players 450 --games 82 --props 3000 --output-dir /tmp/slate
+"""
+import os
+import argparse
+from typing import Tuple
+import pandas as pd
+import numpy as np
+
+TEAMS = [
+    'ATL', 'BOS', 'BKN', 'CHA', 'CHI', 'CLE', 'DAL', 'DEN', 'DET', 'GSW',
+    'HOU', 'IND', 'LAC', 'LAL', 'MEM', 'MIA', 'MIL', 'MIN', 'NOP', 'NYK',
+    'OKC', 'ORL', 'PHI', 'PHX', 'POR', 'SAC', 'SAS', 'TOR', 'UTA', 'WAS'
+]
+
+STAT_NAMES = [
+    'Points', '3-PT Made', 'Pts+Rebs+Asts', 'Rebounds',
+    'Assists', 'Pts+Rebs', 'Pts+Asts', 'Rebs+Asts'
+]
+
+ODDS_TYPES = ['standard', 'demon', 'goblin']
+
+SEASON_START = '2024-10-22'
+
+def player_name(player: int) -> str:
+    return f"Player {player}"
+
+def player_team(player: int) -> str:
+    return TEAMS[player % len(TEAMS)]
+
+def generate_stats(n_players: int, n_games: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Game logs for n_players players with n_games games each
+
+    Every player has a scoring profile of their own, opponents rotate
+    through the league and games are two days apart. Rows are shuffled
+    like a real export, so nothing can rely on the file being sorted.
+    """
+    rng = np.random.default_rng(seed)
+    players = np.repeat(np.arange(n_players), n_games)
+    games = np.tile(np.arange(n_games), n_players)
+
+    # Per-player averages, so hit rates spread out like a real slate
+    averages = {
+        'pts': rng.uniform(4, 30, n_players),
+        'reb': rng.uniform(1, 12, n_players),
+        'ast': rng.uniform(0.5, 9, n_players),
+        'fg3m': rng.uniform(0, 4, n_players)
+    }
+
+    team_index = players % len(TEAMS)
+    opponent_index = (team_index + 1 + (games * 7 + players) % (len(TEAMS) - 1)) % len(TEAMS)
+    dates = pd.Timestamp(SEASON_START) + pd.to_timedelta(games * 2, unit='D')
+
+    df = pd.DataFrame({
+        'player_name': np.array([player_name(p) for p in range(n_players)], dtype=object)[players],
+        'team_abbreviation': np.array(TEAMS, dtype=object)[team_index],
+        'opponent_team': np.array(TEAMS, dtype=object)[opponent_index],
+        **{col: rng.poisson(mean[players]) for col, mean in averages.items()},
+        'date': dates.strftime('%Y-%m-%d')
+    })
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def generate_props(n_props: int, n_players: int, seed: int = 0) -> pd.DataFrame:
+    """
+    A slate of n_props props on the generated players
+
+    A few props name players that are not in the stats, like real slates
+    that include rookies and call-ups.
+    """
+    rng = np.random.default_rng(seed + 1)
+    players = rng.integers(0, n_players + max(1, n_players // 50), n_props)
+    stat_names = np.array(STAT_NAMES, dtype=object)[np.arange(n_props) % len(STAT_NAMES)]
+    odds_types = np.array(ODDS_TYPES, dtype=object)[np.arange(n_props) % len(ODDS_TYPES)]
+
+    # Lines around what each stat usually totals
+    typical = {
+        'Points': 16, '3-PT Made': 2, 'Pts+Rebs+Asts': 26, 'Rebounds': 6,
+        'Assists': 4, 'Pts+Rebs': 22, 'Pts+Asts': 20, 'Rebs+Asts': 10
+    }
+    lines = np.floor(np.array([typical[s] for s in stat_names]) * rng.uniform(0.5, 1.5, n_props)) + 0.5
+
+    teams = players % len(TEAMS)
+    return pd.DataFrame({
+        'Player Name': [player_name(p) for p in players],
+        'Opponent Team': np.array(TEAMS, dtype=object)[(teams + 3) % len(TEAMS)],
+        'Stat Name': stat_names,
+        'Line Score': lines,
+        'Start Time': '2025-04-23T19:00:00-04:00',
+        'Status': 'pre_game',
+        'Odds Type': odds_types,
+        'Team Name': np.array(TEAMS, dtype=object)[teams]
+    })
+
+def generate_slate(n_players: int, n_games: int, n_props: int, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Stats and props generated together"""
+    return generate_stats(n_players, n_games, seed), generate_props(n_props, n_players, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=450)
+    parser.add_argument('--games', type=int, default=82)
+    parser.add_argument('--props', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output-dir', default='.')
+    args = parser.parse_args()
+
+    stats_df, props_df = generate_slate(args.players, args.games, args.props, args.seed)
+    os.makedirs(args.output_dir, exist_ok=True)
+    stats_df.to_csv(os.path.join(args.output_dir, 'nba_stats.csv'), index=False)
+    props_df.to_csv(os.path.join(args.output_dir, 'props.csv'), index=False)
+    print(f"Wrote {len(stats_df)} stats rows and {len(props_df)} props to {args.output_dir}")
+
+if __name__ == '__main__':
+    main()
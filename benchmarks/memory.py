@@ -0,0 +1,134 @@
+"""
+Memory footprint of a league-wide, multi-season game log before and after upload.
+
+    python -m benchmarks.memory --players 540 --games 410 --output memory.json
+
+The defaults are 30 rosters of 18 players over five 82-game seasons.
+'before' is the stats and props as pd.read_csv infers them from the
+uploaded files: every column, strings as Python objects and 64-bit
+numbers. 'after' is what a worker holds once the app has stored them:
+the memory-mapped frames (only the required columns, categorical codes
+for names and teams, float32 box scores and datetime64 dates), the
+memory-mapped game log index, and the heap DataProcessor.from_index
+allocates to attach to it. Mapped pages are shared by every worker on
+the machine, the heap is allocated once per worker.
+"""
+import io
+import os
+import sys
+import json
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from typing import Dict
+import pandas as pd
+
+from benchmarks.generate import generate_slate
+from benchmarks.run import APP_DIR
+
+MB = 1024 * 1024
+
+def frame_footprint(df: pd.DataFrame) -> Dict:
+    """Dtype and bytes of every column, counting the strings held by object columns"""
+    usage = df.memory_usage(deep=True, index=False)
+    return {
+        'rows': len(df),
+        'bytes': int(usage.sum()),
+        'columns': {col: {'dtype': str(df[col].dtype), 'bytes': int(usage[col])} for col in df.columns}
+    }
+
+def measure(n_players: int, n_games: int, n_props: int, seed: int) -> Dict:
+    """Upload a generated slate and measure it as read_csv sees it and as the app holds it"""
+    stats_df, props_df = generate_slate(n_players, n_games, n_props, seed)
+    stats_csv = stats_df.to_csv(index=False).encode()
+    props_csv = props_df.to_csv(index=False).encode()
+    del stats_df, props_df
+
+    before = {
+        'nba_stats': frame_footprint(pd.read_csv(io.BytesIO(stats_csv))),
+        'props': frame_footprint(pd.read_csv(io.BytesIO(props_csv)))
+    }
+
+    # The app reads UPLOAD_FOLDER when it is imported
+    os.environ['UPLOAD_FOLDER'] = tempfile.mkdtemp(prefix='prop-memory-')
+    os.environ['JOB_WORKERS'] = '0'
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import app as app_module
+    logging.disable(logging.WARNING)
+    response = app_module.app.test_client().post('/upload', data={
+        'nbaStatsFile': (io.BytesIO(stats_csv), 'nba_stats.csv'),
+        'propsFile': (io.BytesIO(props_csv), 'props.csv')
+    })
+    if response.status_code != 200:
+        raise RuntimeError(f"Upload failed: {response.get_json()}")
+
+    version = app_module.dataset_store.current_version()
+    manifest = app_module.dataset_store.read_manifest(version)
+    tracemalloc.start()
+    dataset = app_module.load_dataset(version)
+    attach_heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    after = {
+        'nba_stats': frame_footprint(dataset.nba_stats_df),
+        'props': frame_footprint(dataset.props_df),
+        'index': {
+            name: frame_footprint(app_module.dataset_store.read_part(manifest, name))
+            for name in app_module.INDEX_PARTS if name in manifest['parts']
+        },
+        'attach_heap_bytes': attach_heap
+    }
+    after['shared_bytes'] = (after['nba_stats']['bytes'] + after['props']['bytes']
+                             + sum(part['bytes'] for part in after['index'].values()))
+    return {
+        'players': n_players,
+        'games': n_games,
+        'rows': n_players * n_games,
+        'props': n_props,
+        'before': before,
+        'after': after
+    }
+
+def print_report(report: Dict, out=sys.stderr):
+    """Per-column dtypes and sizes, before and after"""
+    before, after = report['before'], report['after']
+    print(f"{report['rows']} games ({report['players']} players x {report['games']}), {report['props']} props", file=out)
+    for name in ('nba_stats', 'props'):
+        print(f"\n{name:22s} {'before':>26s} {'after':>26s}", file=out)
+        for col, column in before[name]['columns'].items():
+            stored = after[name]['columns'].get(col)
+            stored_text = f"{stored['dtype']:>16s} {stored['bytes'] / MB:7.1f} MB" if stored else f"{'dropped':>26s}"
+            print(f"  {col:20s} {column['dtype']:>16s} {column['bytes'] / MB:7.1f} MB {stored_text}", file=out)
+        print(f"  {'total':20s} {before[name]['bytes'] / MB:24.1f} MB {after[name]['bytes'] / MB:24.1f} MB", file=out)
+
+    print("\ngame log index (memory-mapped)", file=out)
+    for name, part in after['index'].items():
+        print(f"  {name:20s} {part['rows']:10d} rows {part['bytes'] / MB:9.1f} MB", file=out)
+        if name == 'log':
+            for col, column in part['columns'].items():
+                print(f"    {col:22s} {column['dtype']:>14s} {column['bytes'] / MB:7.1f} MB", file=out)
+
+    before_total = before['nba_stats']['bytes'] + before['props']['bytes']
+    print(f"\nbefore: {before_total / MB:.1f} MB of frames per process", file=out)
+    print(f"after:  {after['shared_bytes'] / MB:.1f} MB memory-mapped and shared, "
+          f"{after['attach_heap_bytes'] / MB:.1f} MB heap per worker", file=out)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--players', type=int, default=540)
+    parser.add_argument('--games', type=int, default=410)
+    parser.add_argument('--props', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Also write the report as JSON here')
+    args = parser.parse_args()
+
+    report = measure(args.players, args.games, args.props, args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(report, indent=2) + '\n')
+
+if __name__ == '__main__':
+    main()
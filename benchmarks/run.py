@@ -0,0 +1,322 @@
+"""
+Time the prop analysis, chart rendering and routes over a range of sizes.
+
+    python -m benchmarks.run --sizes 150x41,450x82,900x164 --output results.json
+    python -m benchmarks.run --baseline results.json --threshold 1.25 --threshold route.upload=1.5
+
+Every benchmark runs once per size (players x games) on a generated slate.
+Results are written as JSON: each benchmark has a scaling curve of
+seconds per call for every size. With --baseline, any benchmark whose
+median grew by more than its threshold is listed under 'regressions'
+and the exit status is 1.
+"""
+import os
+import io
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+
+from benchmarks.generate import generate_slate
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'app')
+
+DEFAULT_SIZES = '150x41,450x82,900x164'
+DEFAULT_THRESHOLD = 1.25
+
+# Single-prop benchmarks are timed over this many props and reported per call
+SAMPLE_PROPS = 100
+SAMPLE_CHARTS = 5
+
+class Benchmark:
+    """
+    A timed operation
+
+    setup(context) returns the function to time, so per-run preparation
+    (copies, cache clears) is not counted. calls is how many operations one
+    run performs, and timings are reported per call.
+    """
+
+    def __init__(self, name: str, setup: Callable[[Dict], Callable[[], None]], calls: int = 1):
+        self.name = name
+        self.setup = setup
+        self.calls = calls
+
+def sample_props(context: Dict, count: int) -> List[Dict]:
+    """Props on players that have games, spread over every stat"""
+    props_df = context['props_df']
+    known = props_df['Player Name'].isin(context['stats_df']['player_name'].unique())
+    rows = props_df[known].head(count)
+    return [
+        {
+            'player_name': row['Player Name'],
+            'team_name': row['Team Name'],
+            'stat_name': row['Stat Name'],
+            'line_score': float(row['Line Score']),
+            'opponent_team': row['Opponent Team']
+        }
+        for _, row in rows.iterrows()
+    ]
+
+def bench_processor_init(context):
+    from data_processor import DataProcessor
+    stats_df, props_df = context['stats_df'].copy(), context['props_df'].copy()
+    return lambda: DataProcessor(stats_df, props_df)
+
+def bench_analyze_prop(context):
+    processor = context['processor']
+    props = sample_props(context, SAMPLE_PROPS)
+    def run():
+        for prop in props:
+            processor.analyze_prop(prop['player_name'], prop['team_name'], prop['stat_name'],
+                                   prop['line_score'], 'last_10')
+    return run
+
+def bench_analyze_h2h(context):
+    processor = context['processor']
+    props = sample_props(context, SAMPLE_PROPS)
+    def run():
+        for prop in props:
+            processor.analyze_h2h(prop['player_name'], prop['team_name'], prop['opponent_team'],
+                                  prop['stat_name'], prop['line_score'])
+    return run
+
+def bench_get_all_props_analysis(context):
+    processor = context['processor']
+    return lambda: processor.get_all_props_analysis('season')
+
+def bench_visualization(output, view_mode='last_10'):
+    def setup(context):
+        from visualizer import DataVisualizer
+        processor = context['processor']
+        visualizer = DataVisualizer(processor.nba_stats_df, processor.props_df, processor=processor)
+        props = sample_props(context, SAMPLE_CHARTS)
+        def run():
+            for prop in props:
+                visualizer.create_prop_visualization(
+                    prop['player_name'], prop['team_name'], prop['stat_name'], prop['line_score'],
+                    view_mode=view_mode, output=output, dpi=100
+                )
+        return run
+    return setup
+
+def bench_route_upload(context):
+    client = context['client']
+    stats_csv, props_csv = context['stats_csv'], context['props_csv']
+    def run():
+        response = client.post('/upload', data={
+            'nbaStatsFile': (io.BytesIO(stats_csv), 'nba_stats.csv'),
+            'propsFile': (io.BytesIO(props_csv), 'props.csv')
+        })
+        assert response.status_code == 200, response.data
+    return run
+
+def bench_route_get(url):
+    def setup(context):
+        client = context['client']
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, response.data
+        return run
+    return setup
+
+def bench_route_visualize(context):
+    import app as app_module
+    client = context['client']
+    props = sample_props(context, SAMPLE_CHARTS)
+    # Time rendering, not the render cache
+    app_module.render_cache.clear()
+    def run():
+        for prop in props:
+            response = client.post('/visualize', json=dict(prop, timeframe='last_10'))
+            assert response.status_code == 200, response.data
+    return run
+
+BENCHMARKS = [
+    Benchmark('processor.init', bench_processor_init),
+    Benchmark('processor.analyze_prop', bench_analyze_prop, calls=SAMPLE_PROPS),
+    Benchmark('processor.analyze_h2h', bench_analyze_h2h, calls=SAMPLE_PROPS),
+    Benchmark('processor.get_all_props_analysis', bench_get_all_props_analysis),
+    Benchmark('visualizer.create_prop_visualization', bench_visualization('image'), calls=SAMPLE_CHARTS),
+    Benchmark('visualizer.create_prop_visualization[data]', bench_visualization('data'), calls=SAMPLE_CHARTS),
+    Benchmark('visualizer.create_prop_visualization[h2h]', bench_visualization('data', 'h2h'), calls=SAMPLE_CHARTS),
+    Benchmark('route.upload', bench_route_upload),
+    Benchmark('route.get_props', bench_route_get('/get_props')),
+    Benchmark('route.get_props[page]', bench_route_get('/get_props?odds_type=standard&sort=season_rate&limit=50')),
+    Benchmark('route.visualize', bench_route_visualize, calls=SAMPLE_CHARTS)
+]
+
+def parse_sizes(text: str) -> List[Tuple[int, int]]:
+    sizes = []
+    for size in text.split(','):
+        players, games = size.lower().split('x')
+        sizes.append((int(players), int(games)))
+    return sizes
+
+def parse_thresholds(values: List[str]) -> Tuple[float, Dict[str, float]]:
+    """'1.3' sets the default threshold, 'name=1.5' the threshold of one benchmark"""
+    default = DEFAULT_THRESHOLD
+    per_benchmark = {}
+    for value in values or []:
+        if '=' in value:
+            name, ratio = value.rsplit('=', 1)
+            per_benchmark[name] = float(ratio)
+        else:
+            default = float(value)
+    return default, per_benchmark
+
+def time_benchmark(benchmark: Benchmark, context: Dict, repeats: int, warmup: int) -> Dict:
+    """Seconds per call over repeats runs, after warmup untimed runs"""
+    timings = []
+    for run_index in range(warmup + repeats):
+        run = benchmark.setup(context)
+        start = time.perf_counter()
+        run()
+        elapsed = (time.perf_counter() - start) / benchmark.calls
+        if run_index >= warmup:
+            timings.append(elapsed)
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'repeats': repeats,
+        'calls': benchmark.calls
+    }
+
+def build_context(n_players: int, n_games: int, n_props: int, seed: int, client) -> Dict:
+    """Generate a slate and load it into a DataProcessor and the app"""
+    from data_processor import DataProcessor
+    stats_df, props_df = generate_slate(n_players, n_games, n_props, seed)
+    context = {
+        'stats_df': stats_df,
+        'props_df': props_df,
+        'stats_csv': stats_df.to_csv(index=False).encode(),
+        'props_csv': props_df.to_csv(index=False).encode(),
+        'client': client
+    }
+    context['processor'] = DataProcessor(stats_df.copy(), props_df.copy())
+    bench_route_upload(context)()
+    return context
+
+def find_regressions(results: Dict, baseline: Dict, default_threshold: float,
+                     thresholds: Dict[str, float]) -> List[Dict]:
+    """Benchmarks whose median grew past their threshold at any size in both runs"""
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        previous = baseline.get('benchmarks', {}).get(name)
+        if not previous:
+            continue
+        previous_points = {(p['players'], p['games'], p['props']): p for p in previous['curve']}
+        threshold = thresholds.get(name, default_threshold)
+        for point in result['curve']:
+            old = previous_points.get((point['players'], point['games'], point['props']))
+            if not old or old['median'] <= 0:
+                continue
+            ratio = point['median'] / old['median']
+            if ratio > threshold:
+                regressions.append({
+                    'benchmark': name,
+                    'players': point['players'],
+                    'games': point['games'],
+                    'props': point['props'],
+                    'baseline_median': old['median'],
+                    'median': point['median'],
+                    'ratio': round(ratio, 3),
+                    'threshold': threshold
+                })
+    return regressions
+
+def run(sizes: List[Tuple[int, int]], n_props: int, repeats: int, warmup: int, seed: int,
+        only: Optional[List[str]] = None) -> Dict:
+    """Run every benchmark (or those named in only) for every size"""
+    # The app stores uploads under UPLOAD_FOLDER, read when it is imported.
+    # Upload jobs run inline, so route.upload times all of the work and later
+    # routes never race a background job
+    upload_folder = tempfile.mkdtemp(prefix='prop-bench-')
+    os.environ['UPLOAD_FOLDER'] = upload_folder
+    os.environ['JOB_WORKERS'] = '0'
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    import app as app_module
+    logging.disable(logging.WARNING)
+    client = app_module.app.test_client()
+
+    benchmarks = [b for b in BENCHMARKS if not only or b.name in only]
+    results = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'repeats': repeats,
+            'warmup': warmup,
+            'seed': seed
+        },
+        'benchmarks': {b.name: {'curve': []} for b in benchmarks}
+    }
+
+    for n_players, n_games in sizes:
+        print(f"Size {n_players} players x {n_games} games, {n_props} props", file=sys.stderr)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            context = build_context(n_players, n_games, n_props, seed, client)
+            for benchmark in benchmarks:
+                timing = time_benchmark(benchmark, context, repeats, warmup)
+                results['benchmarks'][benchmark.name]['curve'].append({
+                    'players': n_players,
+                    'games': n_games,
+                    'rows': n_players * n_games,
+                    'props': n_props,
+                    **timing
+                })
+                print(f"  {benchmark.name:45s} {timing['median'] * 1000:10.3f} ms/call", file=sys.stderr)
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='Comma-separated PLAYERSxGAMES sizes')
+    parser.add_argument('--props', type=int, default=3000, help='Props in each slate')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', action='append', help='Run only this benchmark (repeatable)')
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='Earlier results to check for regressions')
+    parser.add_argument('--threshold', action='append',
+                        help=f'Allowed median ratio over the baseline, default {DEFAULT_THRESHOLD}; '
+                             'NAME=RATIO sets it for one benchmark (repeatable)')
+    args = parser.parse_args()
+
+    results = run(parse_sizes(args.sizes), args.props, args.repeats, args.warmup, args.seed, args.only)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        default_threshold, thresholds = parse_thresholds(args.threshold)
+        results['regressions'] = find_regressions(results, baseline, default_threshold, thresholds)
+        for regression in results['regressions']:
+            print(f"REGRESSION {regression['benchmark']} at {regression['players']}x{regression['games']}: "
+                  f"{regression['ratio']}x baseline (threshold {regression['threshold']})", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if results.get('regressions'):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,71 +1,597 @@
-from flask import Flask, request, jsonify, render_template, redirect, url_for, send_from_directory
+import time
+# Taken before the imports below, so the startup log covers them
+STARTUP_BEGAN = time.perf_counter()
+from flask import Flask, request, jsonify, render_template, redirect, url_for, send_from_directory, send_file, g
 from werkzeug.utils import secure_filename
 import os
 import pandas as pd
+import numpy as np
 from dotenv import load_dotenv
-from data_processor import DataProcessor
-from visualizer import DataVisualizer
+from data_processor import DataProcessor, naive_dates
+from dataset_cache import Dataset, DatasetCache
+from dataset_store import DatasetStore
+from render_cache import RenderCache
+from props_index import PropsIndex
+from window_stats import parse_timeframe, EWMA_SPAN
+from profiler import RequestProfiler
+from jobs import JobQueue
+from file_formats import (NBA_STATS_REQUIRED_HEADERS, PROPS_REQUIRED_HEADERS, NBA_STATS_DTYPES, VALID_ODDS_TYPES,
+                          validate_nba_stats_file, validate_props_file, coerce_box_scores)
+import storage
+import metrics
+import io
 import json
+import hashlib
 import logging
-
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__name__)
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 # Load environment variables
 load_dotenv()
 
+# Set up logging; LOG_LEVEL=DEBUG adds per-request debug output
+logging.basicConfig(level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO').upper(), logging.INFO))
+logger = logging.getLogger(__name__)
+
 # Initialize Flask app with correct template and static folders
 template_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates'))
 static_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static'))
 app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
 
 # Configure upload folder
-UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads')
+UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER') or os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads')
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# Uploads are spooled to disk and stats are parsed in chunks, so the limit only
+# guards against runaway requests
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_MB', 1024)) * 1024 * 1024
+app.config['UPLOAD_CHUNK_ROWS'] = int(os.getenv('UPLOAD_CHUNK_ROWS', 100000))
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Required headers for each file type
-NBA_STATS_REQUIRED_HEADERS = ['player_name', 'team_abbreviation', 'opponent_team', 'pts', 'reb', 'ast', 'fg3m', 'date']
-PROPS_REQUIRED_HEADERS = ['Line Score', 'Player Name', 'Team Name', 'Stat Name', 'Start Time', 'Opponent Team', 'Odds Type']
-
-# Valid stat names as per context.md
-VALID_STAT_NAMES = [
-    'Points',
-    '3-PT Made',
-    'Pts+Rebs+Asts',
-    'Rebounds',
-    'Assists',
-    'Pts+Rebs',
-    'Pts+Asts',
-    'Rebs+Asts'
-]
-
-# Valid odds types
-VALID_ODDS_TYPES = ['standard', 'demon', 'goblin']
-
-def validate_nba_stats_file(df):
-    missing_headers = [header for header in NBA_STATS_REQUIRED_HEADERS if header not in df.columns]
-    if missing_headers:
-        return False, f"Missing required headers in NBA stats file: {', '.join(missing_headers)}"
-    return True, "Valid"
-
-def validate_props_file(df):
-    missing_headers = [header for header in PROPS_REQUIRED_HEADERS if header not in df.columns]
-    if missing_headers:
-        return False, f"Missing required headers in props file: {', '.join(missing_headers)}"
-    
-    # Instead of rejecting the file, filter out invalid stats and warn if any were found
-    invalid_stats = df[~df['Stat Name'].isin(VALID_STAT_NAMES)]['Stat Name'].unique()
-    if len(invalid_stats) > 0:
-        # Filter the dataframe to keep only valid stats
-        df_filtered = df[df['Stat Name'].isin(VALID_STAT_NAMES)].copy()
-        return True, f"Warning: The following stat types will be skipped: {', '.join(invalid_stats)}", df_filtered
-    
-    return True, "Valid", df
+# Uploaded datasets and their game log indexes are published as versions
+# of memory-mapped storage directories, shared by every worker process
+DATASETS_PATH = os.path.join(app.config['UPLOAD_FOLDER'], 'datasets')
+dataset_store = DatasetStore(DATASETS_PATH)
+
+# Parts of a version that hold the DataProcessor game log index
+INDEX_PARTS = ['log', 'slices', 'matchups', 'opponents', 'matchup_blocks']
+
+# Index parts of versions stored before opponents were interned, dropped when they are republished
+LEGACY_INDEX_PARTS = ['h2h_keys', 'h2h_positions']
+
+def attach_dataset(version, manifest):
+    """Memory-map the parts of a manifest and attach to its game log index"""
+    with metrics.span('dataset_attach'):
+        nba_stats_df = dataset_store.read_part(manifest, 'nba_stats')
+        props_df = dataset_store.read_part(manifest, 'props')
+        
+        # Versions published before matchups existed lack those parts
+        parts = manifest['parts']
+        index = {name: dataset_store.read_part(manifest, name) for name in INDEX_PARTS if name in parts}
+        processor = DataProcessor.from_index(
+            nba_stats_df, props_df, index, source=parts['log']['directory'],
+            matchups_source=parts['matchups']['directory'] if 'matchups' in parts else None
+        )
+    return Dataset(version, nba_stats_df, props_df, processor)
+
+def load_dataset(version):
+    """Memory-map a published version and attach to its game log index"""
+    logger.info(f"Attaching to dataset version {version}")
+    return attach_dataset(version, dataset_store.read_manifest(version))
+
+def publish_dataset(parts, processor, previous_parts=None):
+    """
+    Store the processor's game log index next to the data parts and publish the version
+    
+    While the processor still extends the index it was attached to, new
+    log and matchup rows are appended to the stored ones instead of
+    rewriting them. Must be called holding dataset_store.lock(). Returns
+    the new version.
+    """
+    parts = {name: part for name, part in parts.items() if name not in LEGACY_INDEX_PARTS}
+    starts = {}
+    for name, source in (('log', processor.index_source), ('matchups', processor.matchups_source)):
+        if previous_parts and name in previous_parts and source == previous_parts[name]['directory']:
+            starts[name] = previous_parts[name]['rows']
+    
+    for name, frame in processor.export_index(starts.get('log', 0), starts.get('matchups', 0)).items():
+        if starts.get(name):
+            directory = os.path.join(DATASETS_PATH, previous_parts[name]['directory'])
+            rows = storage.append_dataset(frame, directory, rows=starts[name])
+        else:
+            directory = dataset_store.new_directory(name)
+            rows = storage.write_dataset(frame, directory)
+        parts[name] = dataset_store.part(directory, rows)
+    
+    # Attach once before publishing, so a version that cannot be loaded never becomes current
+    attach_dataset(None, {'parts': parts})
+    return dataset_store.publish(parts)
+
+dataset_cache = DatasetCache(dataset_store.current_version, load_dataset)
+
+# Rendered /visualize responses, bounded by RENDER_CACHE_MAX_BYTES and
+# optionally spilled to uploads/render_cache when RENDER_CACHE_DISK is set
+app.config['RENDER_CACHE_MAX_BYTES'] = int(os.getenv('RENDER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+app.config['RENDER_CACHE_DISK'] = os.getenv('RENDER_CACHE_DISK', '').lower() in ('1', 'true', 'yes')
+render_cache = RenderCache(
+    app.config['RENDER_CACHE_MAX_BYTES'],
+    os.path.join(app.config['UPLOAD_FOLDER'], 'render_cache') if app.config['RENDER_CACHE_DISK'] else None
+)
+
+# Server-side chart image settings
+app.config['RENDER_DPI'] = int(os.getenv('RENDER_DPI', 300))
+app.config['RENDER_FORMAT'] = os.getenv('RENDER_FORMAT', 'png').lower()
+
+# Process pool for chart rendering; 0 renders on the request thread.
+# /visualize still waits for its chart, only /visualize_batch renders several at once
+app.config['RENDER_POOL_WORKERS'] = int(os.getenv('RENDER_POOL_WORKERS', 0))
+_render_pool = None
+
+def get_render_pool():
+    """Create the render process pool on first use, each process drawing a throwaway chart as it starts"""
+    global _render_pool
+    if _render_pool is None and app.config['RENDER_POOL_WORKERS'] > 0:
+        import visualizer
+        _render_pool = ProcessPoolExecutor(
+            max_workers=app.config['RENDER_POOL_WORKERS'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=visualizer.warm_up,
+            initargs=(app.config['RENDER_FORMAT'],)
+        )
+    return _render_pool
+
+# Background jobs, such as indexing and scoring an upload; 0 runs them inside the request.
+# Their status files are shared, so any worker can answer /jobs/<id>
+app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 1))
+job_queue = JobQueue(os.path.join(app.config['UPLOAD_FOLDER'], 'jobs'), workers=app.config['JOB_WORKERS'])
+
+# Props per odds type whose charts an upload job renders into the render cache,
+# for the timeframes results.js asks for when a card is opened
+app.config['WARM_CHART_PROPS'] = int(os.getenv('WARM_CHART_PROPS', 10))
+WARM_CHART_TIMEFRAMES = ['last_5', 'last_10', 'last_20', 'season', 'h2h']
+
+# Opt-in cProfile captures of single requests. A request is profiled when it
+# sends one of the PROFILE_TOKENS in an X-Profile header or a profile query
+# parameter; without tokens no profiling hooks are installed at all
+app.config['PROFILE_TOKENS'] = [token.strip() for token in os.getenv('PROFILE_TOKENS', '').split(',') if token.strip()]
+app.config['PROFILE_KEEP'] = int(os.getenv('PROFILE_KEEP', 50))
+request_profiler = None
+if app.config['PROFILE_TOKENS']:
+    request_profiler = RequestProfiler(
+        os.path.join(app.config['UPLOAD_FOLDER'], 'profiles'),
+        app.config['PROFILE_TOKENS'],
+        keep=app.config['PROFILE_KEEP']
+    )
+
+def read_props_csv(stream):
+    """Parse a props CSV, keeping only the required columns"""
+    with metrics.span('props_csv_read'):
+        return pd.read_csv(stream, usecols=lambda name: name in PROPS_REQUIRED_HEADERS)
+
+def validate_nba_stats_header(stream):
+    """Validate the headers of an NBA stats CSV without parsing any rows, then rewind it"""
+    result = validate_nba_stats_file(pd.read_csv(stream, nrows=0))
+    stream.seek(0)
+    return result
+
+def read_nba_stats_chunks(stream):
+    """
+    Parse an NBA stats CSV UPLOAD_CHUNK_ROWS rows at a time
+    
+    Only the required columns are read, with compact dtypes. Non-numeric
+    box score values are stored as missing and counted in a warning, and
+    unparseable dates as NaT.
+    Headers should be checked with validate_nba_stats_header first.
+    """
+    invalid_values = 0
+    chunks = pd.read_csv(stream, usecols=NBA_STATS_REQUIRED_HEADERS, dtype=NBA_STATS_DTYPES,
+                         chunksize=app.config['UPLOAD_CHUNK_ROWS'])
+    start = time.perf_counter()
+    for chunk in chunks:
+        chunk = chunk[NBA_STATS_REQUIRED_HEADERS]
+        invalid_values += coerce_box_scores(chunk)
+        # Dates with UTC offsets are stored naive in UTC, so every chunk and append has one type
+        chunk['date'] = naive_dates(storage.parse_dates(chunk['date']))
+        # Parse time only, not the time the consumer spends storing the chunk
+        metrics.record('nba_stats_csv_read', time.perf_counter() - start)
+        yield chunk
+        start = time.perf_counter()
+    
+    if invalid_values:
+        logger.warning(f"{invalid_values} non-numeric stat values were stored as missing")
+
+def ingest_nba_stats(stream, directory):
+    """
+    Stream an NBA stats CSV into storage one chunk at a time
+    
+    Each chunk is written straight to directory, which only appears once
+    the whole file has been read. Returns the number of rows stored.
+    """
+    writer = storage.DatasetWriter(directory, date_columns=['date'])
+    try:
+        for chunk in read_nba_stats_chunks(stream):
+            writer.append(chunk)
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+    
+    logger.info(f"Stored {writer.rows} NBA stats rows")
+    return writer.rows
+
+def new_games_only(dataset, new_stats_df):
+    """
+    Drop rows whose (player, date) is repeated in the file or already stored
+    
+    Returns:
+        tuple: (new rows, number of duplicates dropped)
+    """
+    new_stats_df = new_stats_df.assign(date=naive_dates(new_stats_df['date']).astype('datetime64[ns]'))
+    deduped = new_stats_df.drop_duplicates(['player_name', 'date'], keep='last')
+    
+    # Only the stored games of players in the file can collide
+    stored = dataset.nba_stats_df
+    stored = stored.loc[stored['player_name'].isin(deduped['player_name'].unique()), ['player_name', 'date']]
+    keys = deduped[['player_name', 'date']].astype({'player_name': object})
+    matches = keys.merge(
+        stored.astype({'player_name': object}).drop_duplicates(), how='left', indicator=True
+    )['_merge'].eq('both').to_numpy()
+    
+    deduped = deduped[~matches].reset_index(drop=True)
+    return deduped, len(new_stats_df) - len(deduped)
+
+def append_to_dataset(dataset, new_stats_df=None, new_props_df=None):
+    """
+    Store new games and/or a new props slate and publish them as a new version
+    
+    New games are appended to the stored stats in place and only the
+    players with new games are re-indexed, see
+    DataProcessor.with_appended_games. Returns the Dataset for the new version,
+    the given one when there is nothing to add, or None without writing
+    anything when another worker has published since it was loaded.
+    """
+    if (new_stats_df is None or len(new_stats_df) == 0) and new_props_df is None:
+        return dataset
+    
+    with dataset_store.lock():
+        # Appending in place past a newer version's rows would overwrite them
+        if dataset_store.current_version() != dataset.version:
+            logger.info(f"Dataset version {dataset.version} was replaced before the append")
+            return None
+        manifest = dataset_store.read_manifest(dataset.version)
+        parts = dict(manifest['parts'])
+        processor = dataset.processor
+        
+        if new_stats_df is not None and len(new_stats_df):
+            rows = storage.append_dataset(
+                new_stats_df, dataset_store.part_directory(manifest, 'nba_stats'),
+                date_columns=['date'], rows=parts['nba_stats']['rows']
+            )
+            parts['nba_stats'] = dict(parts['nba_stats'], rows=rows)
+            with metrics.span('processor_extend'):
+                processor = processor.with_appended_games(storage.read_dataset(
+                    dataset_store.part_directory(manifest, 'nba_stats'), rows=rows
+                ))
+        
+        if new_props_df is not None:
+            directory = dataset_store.new_directory('props')
+            rows = storage.write_dataset(new_props_df, directory, date_columns=['Start Time'])
+            parts['props'] = dataset_store.part(directory, rows)
+            processor = processor.with_props(storage.read_dataset(directory))
+        
+        version = publish_dataset(parts, processor, manifest['parts'])
+    
+    # Reattach so this worker shares the published arrays like the others
+    return load_dataset(version)
+
+def build_props_by_type(dataset, props_df=None):
+    """Score every prop in the dataset (or the given subset of it) and group them by odds type"""
+    if props_df is None:
+        props_df = dataset.props_df
+    processor = dataset.processor
+    
+    # Score every prop for every timeframe in one batch
+    timeframes = ['last_5', 'last_10', 'last_20', 'season']
+    props_by_type = {'standard': [], 'demon': [], 'goblin': []}
+    
+    logger.debug("Processing props")
+    with metrics.span('analyze_props'):
+        scores = processor.analyze_props_batch(props_df, timeframes=timeframes)
+    metrics.PROPS_ANALYZED.inc(len(props_df))
+    for prop, score in zip(props_df.to_dict('records'), scores.to_dict('records')):
+        prop_data = {
+            'player_name': prop['Player Name'],
+            'team_name': prop['Team Name'],
+            'stat_name': prop['Stat Name'],
+            'line_score': float(prop['Line Score']),
+            'odds_type': prop['Odds Type'].lower(),
+            'game_info': {
+                'start_time': prop['Start Time'],
+                'away_team': prop['Team Name'],
+                'home_team': prop['Opponent Team']
+            }
+        }
+        
+        # Add rates for timeframes with games
+        for timeframe in timeframes:
+            if score[f'{timeframe}_games'] > 0:
+                prop_data[f"{timeframe}_rate"] = float(score[f'{timeframe}_rate'])
+        
+        # Add H2H analysis
+        h2h_games = int(score['h2h_games'])
+        prop_data['h2h_rate'] = float(score['h2h_rate']) if h2h_games > 0 else 0
+        prop_data['h2h_games'] = h2h_games
+        
+        # Add prop to appropriate category
+        odds_type = prop_data['odds_type']
+        if odds_type in props_by_type:
+            props_by_type[odds_type].append(prop_data)
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Returning props grouped by type: {[f'{k}: {len(v)}' for k, v in props_by_type.items()]}")
+    return {'props_by_type': props_by_type}
+
+def get_props_data(dataset):
+    """Analyzed props grouped by odds type, computed once per dataset version"""
+    with dataset.props_lock:
+        if dataset.props_by_type is None:
+            dataset.props_by_type = build_props_by_type(dataset)
+    return dataset.props_by_type
+
+def get_props_body(dataset):
+    """Serialized /get_props response and its ETag, computed once per dataset version"""
+    with dataset.props_lock:
+        if dataset.props_body is None:
+            body = app.json.dumps(get_props_data(dataset), separators=(',', ':')).encode()
+            dataset.props_etag = hashlib.sha1(body).hexdigest()
+            dataset.props_body = body
+    return dataset.props_body, dataset.props_etag
+
+def get_props_index(dataset):
+    """PropsIndex over every analyzed prop, built once per dataset version"""
+    with dataset.props_lock:
+        if dataset.props_index is None:
+            props_by_type = get_props_data(dataset)['props_by_type']
+            dataset.props_index = PropsIndex([prop for props in props_by_type.values() for prop in props])
+    return dataset.props_index
+
+# Query parameters that switch /get_props to a filtered, paginated response
+PROPS_PAGE_PARAMS = ['odds_type', 'game', 'stat', 'q', 'min_rate', 'rate_key', 'sort', 'cursor', 'limit']
+PROPS_PAGE_MAX_LIMIT = 500
+
+# Most lines a single /line_ladder request may sweep
+MAX_LADDER_LINES = 500
+
+# Most charts (props times timeframes) a single /visualize_batch request may ask for
+MAX_BATCH_CHARTS = 200
+
+def query_props_page(dataset, args):
+    """
+    Filter, sort and paginate the analyzed props for /get_props
+    
+    odds_type, game and stat may be repeated to accept several values.
+    Raises ValueError for malformed parameters.
+    """
+    filters = {facet: args.getlist(facet) for facet in ['odds_type', 'game', 'stat'] if facet in args}
+    min_rate = args.get('min_rate')
+    cursor = args.get('cursor')
+    if cursor is not None and not cursor.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor}")
+    limit = int(args.get('limit', 50))
+    if limit < 1:
+        raise ValueError("limit must be positive")
+    
+    return get_props_index(dataset).query(
+        filters=filters,
+        search=args.get('q', '').strip() or None,
+        min_rate=float(min_rate) if min_rate else None,
+        rate_key=args.get('rate_key', 'season'),
+        sort=args.get('sort', 'default'),
+        cursor=cursor,
+        limit=min(limit, PROPS_PAGE_MAX_LIMIT)
+    )
+
+def iter_props_chunks(dataset, group_by='game'):
+    """
+    Score and yield the props one game (or one odds type) at a time
+    
+    Each chunk is {'group': ..., 'props_by_type': ...}, so the time to the
+    first chunk depends on the size of one group, not the whole slate.
+    Games are keyed like results.js does, as the two teams sorted and
+    joined with ' vs '.
+    """
+    props_df = dataset.props_df
+    if group_by == 'odds_type':
+        keys = props_df['Odds Type'].astype(str).str.lower()
+    else:
+        teams = props_df['Team Name'].astype(str)
+        opponents = props_df['Opponent Team'].astype(str)
+        keys = pd.Series(
+            np.where(teams <= opponents, teams + ' vs ' + opponents, opponents + ' vs ' + teams),
+            index=props_df.index
+        )
+    
+    for group, group_df in props_df.groupby(keys, sort=False):
+        yield {'group': group, **build_props_by_type(dataset, group_df)}
+
+def visualization_cache_key(dataset, prop, view_mode, output, image_format):
+    """Render cache key for one /visualize result"""
+    return (prop.get('player_name'), prop.get('team_name'), prop.get('stat_name'),
+            prop.get('line_score'), prop.get('opponent_team'), view_mode, dataset.version,
+            output, image_format, app.config['RENDER_DPI'])
+
+def render_visualizations(dataset, batch, output, image_format):
+    """
+    Render /visualize results for requests that each carry a view_mode, and cache them
+    
+    Yields (request, serialized result) as each one is ready, which with a
+    render pool is not in request order.
+    """
+    from visualizer import DataVisualizer
+    visualizer = DataVisualizer(dataset.nba_stats_df, dataset.props_df, render_pool=get_render_pool(),
+                                processor=dataset.processor)
+    for index, graph_data in visualizer.create_prop_visualizations(
+            batch, output=output, image_format=image_format, dpi=app.config['RENDER_DPI']):
+        req = batch[index]
+        body = app.json.dumps(graph_data, separators=(',', ':')).encode()
+        if 'error' not in graph_data:
+            render_cache.put(visualization_cache_key(dataset, req, req['view_mode'], output, image_format), body)
+        yield req, body
+
+def warm_chart_cache(dataset, job=None):
+    """
+    Render the charts the results page asks for first into the render cache
+    
+    These are the chart data of the first WARM_CHART_PROPS props of each
+    odds type's default listing, for every WARM_CHART_TIMEFRAMES timeframe,
+    keyed like the /visualize_batch requests results.js sends.
+    """
+    props_index = get_props_index(dataset)
+    props = [
+        prop
+        for odds_type in VALID_ODDS_TYPES
+        for prop in props_index.query(filters={'odds_type': [odds_type]}, limit=app.config['WARM_CHART_PROPS'])['props']
+    ]
+    batch = [
+        {
+            'player_name': prop['player_name'],
+            'team_name': prop['team_name'],
+            'stat_name': prop['stat_name'],
+            'line_score': prop['line_score'],
+            'opponent_team': prop['game_info']['home_team'],
+            'view_mode': timeframe
+        }
+        for prop in props
+        for timeframe in WARM_CHART_TIMEFRAMES
+    ]
+    if job is not None:
+        job.update(total=len(batch))
+    with metrics.span('chart_warm'):
+        for _ in render_visualizations(dataset, batch, 'data', app.config['RENDER_FORMAT']):
+            if job is not None:
+                job.advance()
+    return len(batch)
+
+UPLOAD_JOB_STAGES = ['index', 'props', 'charts']
+
+# Most unmatched players listed when props are uploaded
+UNMATCHED_PLAYERS_LISTED = 50
+
+def unmatched_props_report(dataset):
+    """Props whose player matches no games even by normalized name, logged and summarized"""
+    unmatched = dataset.processor.unmatched_props()
+    total = int(unmatched['Props'].sum())
+    if total:
+        logger.warning(f"{total} props for {len(unmatched)} players match no games")
+    return {
+        'unmatched_props': total,
+        'unmatched_players': [
+            {'player_name': None if pd.isna(player) else player, 'team_name': None if pd.isna(team) else team,
+             'props': int(props)}
+            for player, team, props in unmatched.head(UNMATCHED_PLAYERS_LISTED).itertuples(index=False)
+        ]
+    }
+
+def run_upload_job(job, parts, staged):
+    """
+    Publish uploaded files that are already stored: build the game log index,
+    score every prop for every timeframe and warm the chart cache
+    
+    The job is 'ready' once /get_props can serve the precomputed response.
+    """
+    job.stage('index')
+    try:
+        with dataset_store.lock():
+            with metrics.span('processor_build'):
+                processor = DataProcessor(
+                    storage.read_dataset(os.path.join(DATASETS_PATH, parts['nba_stats']['directory'])),
+                    storage.read_dataset(os.path.join(DATASETS_PATH, parts['props']['directory']))
+                )
+            version = publish_dataset(parts, processor)
+    finally:
+        dataset_store.unstage(staged)
+    dataset_cache.invalidate()
+    render_cache.clear()
+    
+    # Skip the rest when a newer upload or append has replaced this version
+    dataset = dataset_cache.get()
+    if dataset is None or dataset.version != version:
+        return {'version': version, 'superseded': True}
+    
+    job.stage('props', total=len(dataset.props_df))
+    unmatched = unmatched_props_report(dataset)
+    get_props_body(dataset)
+    get_props_index(dataset)
+    job.update(done=len(dataset.props_df), ready=True)
+    
+    job.stage('charts')
+    charts = warm_chart_cache(dataset, job)
+    return {'version': version, 'charts': charts, **unmatched}
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    """Observe the time to build the response; streamed bodies are sent afterwards"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - start, request.method, request.endpoint or 'unmatched', str(response.status_code)
+        )
+    return response
+
+def profile_token():
+    """Profiling token sent with the request, if any"""
+    return request.headers.get('X-Profile') or request.args.get('profile')
+
+if request_profiler is not None:
+    @app.before_request
+    def start_request_profile():
+        if request.endpoint in ('list_profiles', 'download_profile'):
+            return
+        if request_profiler.allowed(profile_token()):
+            g.profile = request_profiler.start()
+            if g.profile is None:
+                logger.warning("Another request is being profiled, serving this one without profiling")
+    
+    @app.after_request
+    def stop_request_profile(response):
+        """Save the capture, or for streamed bodies save it once the body has been sent"""
+        if 'profile' not in g:
+            return response
+        profile = g.pop('profile')
+        if profile is None:
+            response.headers['X-Profile-Status'] = 'busy'
+            return response
+
+        name = request_profiler.new_name(request.endpoint)
+        details = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'query': {k: v for k, v in request.args.lists() if k != 'profile'},
+            'status': response.status_code,
+            'streamed': response.is_streamed
+        }
+        if response.is_streamed:
+            response.call_on_close(lambda: request_profiler.stop(profile, name, details))
+        else:
+            request_profiler.stop(profile, name, details)
+        response.headers['X-Profile'] = name
+        return response
+    
+    @app.teardown_request
+    def release_request_profile(exc):
+        # Requests that failed before after_request still release the profiler
+        profile = g.pop('profile', None)
+        if profile is not None:
+            request_profiler.stop(profile, request_profiler.new_name(request.endpoint),
+                                  {'method': request.method, 'path': request.path,
+                                   'endpoint': request.endpoint, 'error': str(exc)})
 
 @app.route('/')
 def index():
@@ -91,110 +617,183 @@ def upload():
     try:
         logger.info(f"Processing files: {nba_stats_file.filename} and {props_file.filename}")
         
-        # Read and validate NBA stats file
-        nba_stats_df = pd.read_csv(nba_stats_file)
-        is_valid, message = validate_nba_stats_file(nba_stats_df)
+        # Validate NBA stats headers before parsing any rows
+        is_valid, message = validate_nba_stats_header(nba_stats_file.stream)
         if not is_valid:
             logger.error(f"NBA stats validation failed: {message}")
             return jsonify({'error': message}), 400
         
         # Read and validate props file
-        props_df = pd.read_csv(props_file)
-        is_valid, message, filtered_props_df = validate_props_file(props_df)
+        props_df = read_props_csv(props_file)
+        result = validate_props_file(props_df)
+        if not result[0]:
+            logger.error(f"Props validation failed: {result[1]}")
+            return jsonify({'error': result[1]}), 400
+        _, message, filtered_props_df = result
         
-        # Save files if they pass validation
-        nba_stats_path = os.path.join(app.config['UPLOAD_FOLDER'], 'nba_stats.csv')
-        props_path = os.path.join(app.config['UPLOAD_FOLDER'], 'props.csv')
+        # Save files if they pass validation, streaming the NBA stats in chunks
+        logger.info(f"Saving files to: {DATASETS_PATH}")
+        filtered_props_df['Line Score'] = pd.to_numeric(filtered_props_df['Line Score'], errors='coerce')
+        stats_directory = dataset_store.new_directory('nba_stats')
+        props_directory = dataset_store.new_directory('props')
+        parts = {
+            'nba_stats': dataset_store.part(stats_directory, ingest_nba_stats(nba_stats_file.stream, stats_directory)),
+            'props': dataset_store.part(props_directory, storage.write_dataset(
+                filtered_props_df, props_directory, date_columns=['Start Time']
+            ))
+        }
+        staged = dataset_store.stage(parts)
         
-        logger.info(f"Saving files to: {nba_stats_path} and {props_path}")
-        nba_stats_df.to_csv(nba_stats_path, index=False)
-        filtered_props_df.to_csv(props_path, index=False)
+        # Index, score and warm up in the background; the results page follows the job
+        job = job_queue.submit('upload', lambda job: run_upload_job(job, parts, staged), UPLOAD_JOB_STAGES)
+        if job['status'] == 'failed':
+            return jsonify({'error': job['error'], 'job': job['id']}), 500
         
         # Return success with warning message if any stats were skipped
-        response = {'message': 'Files uploaded successfully', 'redirect': url_for('results')}
+        response = {
+            'message': 'Files uploaded successfully',
+            'redirect': url_for('results'),
+            'job': job['id'],
+            'status_url': url_for('job_status', job_id=job['id'])
+        }
         if "Warning" in message:
             response['warning'] = message
             logger.info(f"Upload successful with warning: {message}")
         else:
             logger.info("Upload successful")
         
-        return jsonify(response), 200
+        return jsonify(response), 200 if job['status'] == 'done' else 202
         
     except Exception as e:
         logger.error(f"Error during upload: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+# Times /append is redone when another worker publishes a version first
+APPEND_ATTEMPTS = 3
+
+@app.route('/append', methods=['POST'])
+def append():
+    """
+    Add the latest games, and optionally a new props slate, to the uploaded data
+    
+    nbaStatsFile holds only the new games; rows for a (player, date) that
+    is already stored are skipped. propsFile replaces the current props.
+    Either file may be sent on its own.
+    """
+    nba_stats_file = request.files.get('nbaStatsFile')
+    props_file = request.files.get('propsFile')
+    if not (nba_stats_file and nba_stats_file.filename) and not (props_file and props_file.filename):
+        logger.error("No files in append request")
+        return jsonify({'error': 'An NBA stats or props file is required'}), 400
+    
+    try:
+        if dataset_cache.get() is None:
+            logger.error("Required files not found")
+            return jsonify({'error': 'No data available. Please upload files first.'}), 404
+        
+        new_stats_df = None
+        if nba_stats_file and nba_stats_file.filename:
+            is_valid, message = validate_nba_stats_header(nba_stats_file.stream)
+            if not is_valid:
+                logger.error(f"NBA stats validation failed: {message}")
+                return jsonify({'error': message}), 400
+            new_stats_df = pd.concat(list(read_nba_stats_chunks(nba_stats_file.stream)), ignore_index=True)
+        
+        new_props_df = None
+        warning = None
+        if props_file and props_file.filename:
+            props_df = read_props_csv(props_file)
+            result = validate_props_file(props_df)
+            if not result[0]:
+                logger.error(f"Props validation failed: {result[1]}")
+                return jsonify({'error': result[1]}), 400
+            _, message, new_props_df = result
+            new_props_df['Line Score'] = pd.to_numeric(new_props_df['Line Score'], errors='coerce')
+            if "Warning" in message:
+                warning = message
+        
+        summary = {}
+        
+        def apply(dataset):
+            stats_df = None
+            if new_stats_df is not None:
+                stats_df, summary['duplicate_rows'] = new_games_only(dataset, new_stats_df)
+                summary['appended_rows'] = len(stats_df)
+                summary['players_updated'] = int(
+                    stats_df[['player_name', 'team_abbreviation']].drop_duplicates().dropna().shape[0]
+                )
+            return append_to_dataset(dataset, stats_df, new_props_df)
+        
+        logger.info(f"Appending to dataset: {nba_stats_file and nba_stats_file.filename} {props_file and props_file.filename}")
+        # When another worker publishes first, the append is redone on top of its version
+        for _ in range(APPEND_ATTEMPTS):
+            dataset = dataset_cache.update(apply)
+            if dataset is not None:
+                break
+        else:
+            logger.error("Dataset kept changing during the append")
+            return jsonify({'error': 'The data was changed by another request, please retry'}), 409
+        
+        # Precompute the /get_props response and index for the new version
+        try:
+            get_props_body(dataset)
+            get_props_index(dataset)
+        except Exception as e:
+            logger.warning(f"Could not precompute props response: {str(e)}", exc_info=True)
+        
+        response = {'message': 'Data appended successfully', **summary}
+        if new_props_df is not None:
+            response.update(unmatched_props_report(dataset))
+        if warning:
+            response['warning'] = warning
+        logger.info(f"Append successful: {summary}")
+        return jsonify(response), 200
+        
+    except Exception as e:
+        logger.error(f"Error during append: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/get_props')
 def get_props():
     try:
-        props_path = os.path.join(app.config['UPLOAD_FOLDER'], 'props.csv')
-        nba_stats_path = os.path.join(app.config['UPLOAD_FOLDER'], 'nba_stats.csv')
-        
-        logger.info(f"Checking for files at: {props_path} and {nba_stats_path}")
-        if not (os.path.exists(props_path) and os.path.exists(nba_stats_path)):
+        dataset = dataset_cache.get()
+        if dataset is None:
             logger.error("Required files not found")
             return jsonify({'error': 'No data available. Please upload files first.'}), 404
         
-        # Read the CSV files
-        logger.info("Reading CSV files")
-        nba_stats_df = pd.read_csv(nba_stats_path)
-        props_df = pd.read_csv(props_path)
-        
-        # Initialize processor with DataFrames
-        logger.info("Initializing DataProcessor")
-        processor = DataProcessor(nba_stats_df, props_df)
-        
-        # Get analysis for different timeframes
-        timeframes = ['last_5', 'last_10', 'last_20', 'season']
-        props_by_type = {'standard': [], 'demon': [], 'goblin': []}
-        
-        logger.info("Processing props")
-        for prop in props_df.to_dict('records'):
-            prop_data = {
-                'player_name': prop['Player Name'],
-                'team_name': prop['Team Name'],
-                'stat_name': prop['Stat Name'],
-                'line_score': float(prop['Line Score']),
-                'odds_type': prop['Odds Type'].lower(),
-                'game_info': {
-                    'start_time': prop['Start Time'],
-                    'away_team': prop['Team Name'],
-                    'home_team': prop['Opponent Team']
-                }
-            }
-            
-            # Get analysis for each timeframe
-            for timeframe in timeframes:
-                analysis = processor.analyze_prop(
-                    prop_data['player_name'],
-                    prop_data['team_name'],
-                    prop_data['stat_name'],
-                    prop_data['line_score'],
-                    timeframe
+        if any(param in request.args for param in PROPS_PAGE_PARAMS):
+            # One page of props matching the filters, plus facet counts
+            try:
+                page = query_props_page(dataset, request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            query = '&'.join(sorted(f"{k}={v}" for k, vs in request.args.lists() for v in vs))
+            response = app.response_class(app.json.dumps(page, separators=(',', ':')), mimetype='application/json')
+            response.set_etag(hashlib.sha1(f"{dataset.version}?{query}".encode()).hexdigest())
+            response.headers['Cache-Control'] = 'no-cache'
+            return response.make_conditional(request)
+        
+        if request.args.get('stream'):
+            # NDJSON chunks as each group is scored, then a final {"done": true}
+            group_by = request.args.get('group_by', 'game')
+            etag = hashlib.sha1(f"{dataset.version}:{group_by}".encode()).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+            else:
+                chunks = itertools.chain(iter_props_chunks(dataset, group_by), [{'done': True}])
+                response = app.response_class(
+                    (app.json.dumps(chunk, separators=(',', ':')) + '\n' for chunk in chunks),
+                    mimetype='application/x-ndjson'
                 )
-                if 'error' not in analysis:
-                    prop_data[f"{timeframe}_rate"] = analysis['hit_rate']
-                    if timeframe == 'season':
-                        prop_data['season_rate'] = analysis['hit_rate']
-            
-            # Get H2H analysis
-            h2h_analysis = processor.analyze_h2h(
-                prop_data['player_name'],
-                prop_data['team_name'],
-                prop_data['game_info']['home_team'],  # Using opponent team
-                prop_data['stat_name'],
-                prop_data['line_score']
-            )
-            prop_data['h2h_rate'] = h2h_analysis.get('hit_rate', 0)
-            prop_data['h2h_games'] = h2h_analysis.get('total_games', 0)
-            
-            # Add prop to appropriate category
-            odds_type = prop_data['odds_type']
-            if odds_type in props_by_type:
-                props_by_type[odds_type].append(prop_data)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         
-        logger.info(f"Returning props grouped by type: {[f'{k}: {len(v)}' for k, v in props_by_type.items()]}")
-        return jsonify({'props_by_type': props_by_type})
+        body, etag = get_props_body(dataset)
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
         
     except Exception as e:
         logger.error(f"Error in get_props: {str(e)}", exc_info=True)
@@ -204,52 +803,225 @@ def get_props():
 def visualize():
     try:
         data = request.json
-        logger.info(f"Visualization request received for: {data}")
-        
-        nba_stats_path = os.path.join(app.config['UPLOAD_FOLDER'], 'nba_stats.csv')
-        props_path = os.path.join(app.config['UPLOAD_FOLDER'], 'props.csv')
+        logger.debug(f"Visualization request received for: {data}")
         
-        if not (os.path.exists(nba_stats_path) and os.path.exists(props_path)):
+        dataset = dataset_cache.get()
+        if dataset is None:
             logger.error("Required files not found")
             return jsonify({'error': 'No data available. Please upload files first.'}), 404
         
-        # Read both DataFrames
-        logger.info("Reading CSV files for visualization")
-        nba_stats_df = pd.read_csv(nba_stats_path)
-        props_df = pd.read_csv(props_path)
+        nba_stats_df = dataset.nba_stats_df
+        props_df = dataset.props_df
+        
+        # Debug details cost a player lookup, so only gather them when they are logged
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"NBA stats columns: {nba_stats_df.columns.tolist()}")
+            player_stats = dataset.processor.get_player_stats(
+                data['player_name'], data['team_name'], 'season'
+            )
+            logger.debug(f"Found {len(player_stats)} games for {data['player_name']}")
+            if data['stat_name'] == '3-PT Made' and 'fg3m' in player_stats.columns:
+                logger.debug(f"3PT stats for last 5 games: {player_stats['fg3m'].head().tolist()}")
+        
+        view_mode = data.get('timeframe', 'last_5')
+        if view_mode != 'h2h' and parse_timeframe(view_mode) is None:
+            return jsonify({'error': f"Unsupported timeframe: {view_mode}"}), 400
+        output = data.get('mode', 'image')
+        image_format = data.get('format', app.config['RENDER_FORMAT'])
+        cache_key = visualization_cache_key(dataset, data, view_mode, output, image_format)
+        body = render_cache.get(cache_key)
+        if body is None:
+            logger.debug("Creating visualization")
+            from visualizer import DataVisualizer
+            visualizer = DataVisualizer(nba_stats_df, props_df, render_pool=get_render_pool(),
+                                        processor=dataset.processor)
+            graph_data = visualizer.create_prop_visualization(
+                player_name=data['player_name'],
+                team_name=data['team_name'],
+                stat_name=data['stat_name'],
+                line_score=data['line_score'],
+                view_mode=view_mode,
+                output=output,
+                image_format=image_format,
+                dpi=app.config['RENDER_DPI']
+            )
+            
+            logger.debug(f"Visualization result: {graph_data.keys() if isinstance(graph_data, dict) else 'Not a dict'}")
+            body = app.json.dumps(graph_data, separators=(',', ':')).encode()
+            if 'error' not in graph_data:
+                render_cache.put(cache_key, body)
+        else:
+            logger.debug("Visualization served from render cache")
         
-        # Log available columns
-        logger.info(f"NBA stats columns: {nba_stats_df.columns.tolist()}")
+        return app.response_class(body, mimetype='application/json')
         
-        # Get player stats for debugging
-        player_stats = nba_stats_df[
-            (nba_stats_df['player_name'] == data['player_name']) &
-            (nba_stats_df['team_abbreviation'] == data['team_name'])
+    except Exception as e:
+        logger.error(f"Error in visualize: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/visualize_batch', methods=['POST'])
+def visualize_batch():
+    """
+    Visualize many props for several timeframes in one request
+    
+    Expects {'props': [{player_name, team_name, stat_name, line_score,
+    opponent_team?}], 'timeframes': [...], 'mode', 'format', 'stream'}.
+    Each result is {player_name, team_name, stat_name, line_score, timeframe,
+    result}, where result is what /visualize returns. With stream set they are
+    sent as NDJSON lines as soon as each one is ready. At most MAX_BATCH_CHARTS
+    props times timeframes are rendered per request.
+    """
+    try:
+        data = request.json
+        logger.debug(f"Batch visualization request received for {len(data.get('props', []))} props")
+        
+        dataset = dataset_cache.get()
+        if dataset is None:
+            logger.error("Required files not found")
+            return jsonify({'error': 'No data available. Please upload files first.'}), 404
+        
+        timeframes = data.get('timeframes', ['last_5'])
+        invalid = [timeframe for timeframe in timeframes if timeframe != 'h2h' and parse_timeframe(timeframe) is None]
+        if invalid:
+            return jsonify({'error': f"Unsupported timeframes: {', '.join(map(str, invalid))}"}), 400
+        output = data.get('mode', 'image')
+        image_format = data.get('format', app.config['RENDER_FORMAT'])
+        if len(data.get('props', [])) * len(timeframes) > MAX_BATCH_CHARTS:
+            return jsonify({'error': f'At most {MAX_BATCH_CHARTS} charts can be requested at once'}), 400
+        batch = [
+            dict(prop, view_mode=timeframe)
+            for prop in data.get('props', [])
+            for timeframe in timeframes
         ]
-        logger.info(f"Found {len(player_stats)} games for {data['player_name']}")
         
-        if not player_stats.empty:
-            if data['stat_name'] == '3-PT Made':
-                if 'fg3m' in player_stats.columns:
-                    logger.info(f"3PT stats for last 5 games: {player_stats['fg3m'].head().tolist()}")
+        def result_line(req, body):
+            header = app.json.dumps({
+                'player_name': req.get('player_name'),
+                'team_name': req.get('team_name'),
+                'stat_name': req.get('stat_name'),
+                'line_score': req.get('line_score'),
+                'timeframe': req['view_mode']
+            }, separators=(',', ':')).encode()
+            return header[:-1] + b',"result":' + body + b'}'
+        
+        def generate():
+            # Serve cached charts first, then render the rest in one batch
+            misses = []
+            for req in batch:
+                body = render_cache.get(visualization_cache_key(dataset, req, req['view_mode'], output, image_format))
+                if body is None:
+                    misses.append(req)
                 else:
-                    logger.error("fg3m column not found in player stats")
-        
-        logger.info("Creating visualization")
-        visualizer = DataVisualizer(nba_stats_df, props_df)
-        graph_data = visualizer.create_prop_visualization(
-            player_name=data['player_name'],
-            team_name=data['team_name'],
-            stat_name=data['stat_name'],
-            line_score=data['line_score'],
-            view_mode=data.get('timeframe', 'last_5')
+                    yield result_line(req, body)
+            
+            if misses:
+                for req, body in render_visualizations(dataset, misses, output, image_format):
+                    yield result_line(req, body)
+        
+        if data.get('stream'):
+            return app.response_class((line + b'\n' for line in generate()), mimetype='application/x-ndjson')
+        return app.response_class(b'{"results":[' + b','.join(generate()) + b']}', mimetype='application/json')
+        
+    except Exception as e:
+        logger.error(f"Error in visualize_batch: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/prop_stats')
+def prop_stats():
+    """
+    Aggregates of one prop's stat over any windows of the player's recent games
+    
+    Query parameters: player_name, team_name, stat_name, line_score (optional,
+    adds hit/push/under counts), timeframes (comma-separated 'season',
+    'last_<n>' or 'last_<n>_days'; defaults to the standard timeframes),
+    ewma_span, as_of (the last day of day windows, defaulting to the
+    latest game) and opponent_team (optional, adds the 'matchup' context).
+    """
+    try:
+        dataset = dataset_cache.get()
+        if dataset is None:
+            logger.error("Required files not found")
+            return jsonify({'error': 'No data available. Please upload files first.'}), 404
+        
+        args = request.args
+        missing = [name for name in ('player_name', 'team_name', 'stat_name') if not args.get(name)]
+        if missing:
+            return jsonify({'error': f"Missing required parameters: {', '.join(missing)}"}), 400
+        
+        timeframes = [timeframe.strip() for timeframe in args.get('timeframes', '').split(',') if timeframe.strip()]
+        invalid = [timeframe for timeframe in timeframes if parse_timeframe(timeframe) is None]
+        if invalid:
+            return jsonify({'error': f"Unsupported timeframes: {', '.join(invalid)}"}), 400
+        try:
+            line_score = float(args['line_score']) if args.get('line_score') else None
+            ewma_span = float(args.get('ewma_span', EWMA_SPAN))
+            as_of = pd.Timestamp(args['as_of']) if args.get('as_of') else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if ewma_span < 1:
+            return jsonify({'error': 'ewma_span must be at least 1'}), 400
+        
+        result = dataset.processor.analyze_windows(
+            args['player_name'], args['team_name'], args['stat_name'], line_score,
+            timeframes=timeframes or None, ewma_span=ewma_span, as_of=as_of
         )
+        if 'error' in result:
+            return jsonify(result), 404 if result['error'] == 'No stats found for player' else 400
+        if args.get('opponent_team'):
+            result['matchup'] = dataset.processor.get_matchup(
+                args['player_name'], args['team_name'], args['opponent_team']
+            )
+        return jsonify(result), 200
+        
+    except Exception as e:
+        logger.error(f"Error in prop_stats: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/line_ladder')
+def line_ladder():
+    """
+    Hit rates of one player's stat across many lines, for the prop card's line ladder
+    
+    Query parameters: player_name, team_name, stat_name, lines (comma-separated;
+    defaults to every half-point line the player's games span plus the
+    slate's lines), timeframes (comma-separated 'season', 'last_<n>',
+    'last_<n>_days' or 'h2h'; defaults to the standard timeframes),
+    opponent_team (needed for 'h2h') and as_of.
+    """
+    try:
+        dataset = dataset_cache.get()
+        if dataset is None:
+            logger.error("Required files not found")
+            return jsonify({'error': 'No data available. Please upload files first.'}), 404
+        
+        args = request.args
+        missing = [name for name in ('player_name', 'team_name', 'stat_name') if not args.get(name)]
+        if missing:
+            return jsonify({'error': f"Missing required parameters: {', '.join(missing)}"}), 400
         
-        logger.info(f"Visualization result: {graph_data.keys() if isinstance(graph_data, dict) else 'Not a dict'}")
-        return jsonify(graph_data)
+        timeframes = [timeframe.strip() for timeframe in args.get('timeframes', '').split(',') if timeframe.strip()]
+        invalid = [timeframe for timeframe in timeframes if timeframe != 'h2h' and parse_timeframe(timeframe) is None]
+        if invalid:
+            return jsonify({'error': f"Unsupported timeframes: {', '.join(invalid)}"}), 400
+        try:
+            lines = [float(line) for line in args['lines'].split(',') if line.strip()] if args.get('lines') else None
+            as_of = pd.Timestamp(args['as_of']) if args.get('as_of') else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if lines is not None and len(lines) > MAX_LADDER_LINES:
+            return jsonify({'error': f'At most {MAX_LADDER_LINES} lines can be swept at once'}), 400
+        
+        with metrics.span('line_sweep'):
+            result = dataset.processor.sweep_lines(
+                args['player_name'], args['team_name'], args['stat_name'], lines=lines,
+                timeframes=timeframes or None, opponent_team=args.get('opponent_team') or None, as_of=as_of
+            )
+        if 'error' in result:
+            return jsonify(result), 404 if result['error'] == 'No stats found for player' else 400
+        return jsonify(result), 200
         
     except Exception as e:
-        logger.error(f"Error in visualize: {str(e)}", exc_info=True)
+        logger.error(f"Error in line_ladder: {str(e)}", exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/static/<path:filename>')
@@ -259,7 +1031,133 @@ def static_files(filename):
 @app.route('/health')
 def health_check():
     """Health check endpoint"""
-    return {'status': 'healthy'}, 200
+    return {
+        'status': 'healthy',
+        'dataset_cache': dataset_cache.stats(),
+        'render_cache': render_cache.stats(),
+        'jobs': job_queue.stats(),
+        'startup': startup_timings
+    }, 200
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """
+    Progress of a background job, such as the one /upload starts
+    
+    'status' is queued, running, done or failed; 'stage' is the current
+    one of 'stages', with 'done' of 'total' steps when they are counted;
+    'ready' turns true once the job's results can be served.
+    """
+    status = job_queue.get(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status), 200
+
+@app.route('/profiles')
+def list_profiles():
+    """Recent request profiles, newest first; needs a profiling token"""
+    if request_profiler is None:
+        return jsonify({'error': 'Request profiling is not enabled'}), 404
+    if not request_profiler.allowed(profile_token()):
+        return jsonify({'error': 'A valid profiling token is required'}), 403
+    
+    return jsonify({'profiles': [
+        dict(entry,
+             download=url_for('download_profile', name=entry['name'], extension='prof'),
+             summary=url_for('download_profile', name=entry['name'], extension='txt'))
+        for entry in request_profiler.list()
+    ]})
+
+@app.route('/profiles/<name>.<extension>')
+def download_profile(name, extension):
+    """A saved profile: .prof for pstats/snakeviz, .txt for the top functions"""
+    if request_profiler is None:
+        return jsonify({'error': 'Request profiling is not enabled'}), 404
+    if not request_profiler.allowed(profile_token()):
+        return jsonify({'error': 'A valid profiling token is required'}), 403
+    
+    path = request_profiler.path(name, extension)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    if extension == 'txt':
+        return send_file(path, mimetype='text/plain')
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Timing histograms and cache counters of this worker process, in Prometheus text format"""
+    body = metrics.registry.render({
+        'dataset_cache': dataset_cache.stats(),
+        'render_cache': render_cache.stats(),
+        'jobs': job_queue.stats()
+    })
+    return app.response_class(body, mimetype=None, content_type=metrics.CONTENT_TYPE)
+
+# Optional warmup before a worker serves traffic: the first chart, CSV parse and
+# dataset attach otherwise run on live requests. The visualizer, and with it
+# matplotlib, is only imported where charts are drawn unless a worker warms up
+app.config['WARMUP'] = os.getenv('WARMUP', '').lower() in ('1', 'true', 'yes')
+
+# One-row NBA stats CSV parsed during warmup
+WARMUP_NBA_STATS_CSV = ','.join(NBA_STATS_REQUIRED_HEADERS) + '\n' + ','.join(
+    {'player_name': 'Warm Up', 'team_abbreviation': 'BOS', 'opponent_team': 'NYK', 'date': '2025-01-01'}.get(col, '1')
+    for col in NBA_STATS_REQUIRED_HEADERS
+) + '\n'
+
+# Seconds spent importing and warming up this worker, reported by /health
+startup_timings = {}
+
+def warm_up_worker():
+    """
+    Do the work a worker's first requests would otherwise pay for
+    
+    Imports the visualizer and draws a throwaway chart, parses a CSV like
+    uploads do, attaches the current dataset and builds its indexes and
+    /get_props listing, and starts the render pool, whose processes warm
+    up as they start. Records the seconds of each stage in startup_timings.
+    """
+    def timed(stage, fn):
+        start = time.perf_counter()
+        fn()
+        startup_timings[stage] = round(time.perf_counter() - start, 3)
+    
+    def parse_csv():
+        stats_df = pd.read_csv(io.StringIO(WARMUP_NBA_STATS_CSV), usecols=NBA_STATS_REQUIRED_HEADERS, dtype=NBA_STATS_DTYPES)
+        coerce_box_scores(stats_df)
+        pd.to_datetime(stats_df['date'])
+    
+    def attach_dataset():
+        dataset = dataset_cache.get()
+        if dataset is not None:
+            dataset.processor.build_indexes()
+            get_props_body(dataset)
+            get_props_index(dataset)
+    
+    def draw_chart():
+        import visualizer
+        visualizer.warm_up(app.config['RENDER_FORMAT'])
+    
+    def start_render_pool():
+        pool = get_render_pool()
+        if pool is not None:
+            # Submitting one task per process before any is idle starts all of them
+            for future in [pool.submit(os.getpid) for _ in range(app.config['RENDER_POOL_WORKERS'])]:
+                future.result()
+    
+    timed('visualizer', draw_chart)
+    timed('csv_parse', parse_csv)
+    timed('dataset', attach_dataset)
+    timed('render_pool', start_render_pool)
+
+startup_timings['import'] = round(time.perf_counter() - STARTUP_BEGAN, 3)
+if app.config['WARMUP']:
+    try:
+        warm_up_worker()
+    except Exception as e:
+        # A worker that failed to warm up still serves, paying the cost on its first requests
+        logger.error(f"Warmup failed: {str(e)}", exc_info=True)
+logger.info(f"Worker {os.getpid()} ready in {time.perf_counter() - STARTUP_BEGAN:.3f}s "
+            f"({', '.join(f'{stage} {seconds:.3f}s' for stage, seconds in startup_timings.items())})")
 
 if __name__ == '__main__':
     # Use port 5001 instead of 5000
@@ -0,0 +1,259 @@
+import os
+import re
+import sys
+import time
+import heapq
+import base64
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+from data_processor import DataProcessor, TIMEFRAME_GAMES
+from visualizer import DataVisualizer, IMAGE_FORMATS
+from player_keys import normalize_names
+from window_stats import parse_timeframe
+from file_formats import (NBA_STATS_REQUIRED_HEADERS, PROPS_REQUIRED_HEADERS, NBA_STATS_DTYPES,
+                          validate_nba_stats_file, validate_props_file, coerce_box_scores)
+
+logger = logging.getLogger(__name__)
+
+USAGE = """
+Score a props slate against an NBA stats log without the web server.
+
+    python src/app/cli.py --stats nba_stats.csv --props props.csv --output scores.csv
+    python src/app/cli.py --stats nba_stats.csv --props props.csv --output scores.parquet \\
+        --workers 8 --charts charts/ --chart-timeframes last_10,h2h
+
+Players are split into one shard per worker process, balanced by games,
+and each shard is scored by its own DataProcessor. The results have the
+props' columns followed by the hits, games and rate of every timeframe,
+like the /get_props rates. With --charts, every distinct prop's chart is
+rendered into that directory by the worker that scored it.
+"""
+
+# Characters kept in chart file names
+UNSAFE_FILENAME_CHARS = re.compile(r'[^\w.+-]+')
+
+# Result file formats, by file extension
+OUTPUT_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.json': 'json'}
+
+# Timeframes scored by default, the ones /get_props reports
+DEFAULT_TIMEFRAMES = list(TIMEFRAME_GAMES) + ['h2h']
+
+def read_stats(path: str) -> pd.DataFrame:
+    """Read an NBA stats CSV with the compact dtypes uploads use"""
+    is_valid, message = validate_nba_stats_file(pd.read_csv(path, nrows=0))
+    if not is_valid:
+        raise ValueError(message)
+    stats_df = pd.read_csv(path, usecols=NBA_STATS_REQUIRED_HEADERS, dtype=NBA_STATS_DTYPES)[NBA_STATS_REQUIRED_HEADERS]
+    invalid_values = coerce_box_scores(stats_df)
+    if invalid_values:
+        logger.warning(f"{invalid_values} non-numeric stat values were read as missing")
+    return stats_df
+
+def read_props(path: str) -> pd.DataFrame:
+    """Read a props CSV's required columns, skipping unsupported stats like uploads do"""
+    result = validate_props_file(pd.read_csv(path, usecols=lambda name: name in PROPS_REQUIRED_HEADERS))
+    if not result[0]:
+        raise ValueError(result[1])
+    _, message, props_df = result
+    if "Warning" in message:
+        logger.warning(message)
+    props_df['Line Score'] = pd.to_numeric(props_df['Line Score'], errors='coerce')
+    return props_df.reset_index(drop=True)
+
+def shard_players(stats_df: pd.DataFrame, props_df: pd.DataFrame, shards: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Shard of every stats row and prop, keeping each player's games and props together
+
+    Players are keyed by normalized name, the way props are matched to
+    games, and assigned largest first to the shard with the fewest games.
+    Props of players without games go to shard 0.
+    """
+    codes, players = pd.factorize(normalize_names(stats_df['player_name']))
+    games = np.bincount(codes[codes >= 0], minlength=len(players))
+    loads = [(0, shard) for shard in range(shards)]
+    # A trailing 0 is the shard of code -1
+    player_shards = np.zeros(len(players) + 1, dtype=np.int64)
+    for player in np.argsort(-games, kind='stable'):
+        load, shard = heapq.heappop(loads)
+        player_shards[player] = shard
+        heapq.heappush(loads, (load + int(games[player]), shard))
+
+    prop_codes = pd.Index(players, dtype=object).get_indexer(normalize_names(props_df['Player Name']))
+    return player_shards[codes], player_shards[prop_codes]
+
+def chart_filename(request: Dict, image_format: str) -> str:
+    """File name of a chart request, with anything but word characters, '.', '+' and '-' replaced"""
+    name = '_'.join([request['player_name'], request['team_name'], request['stat_name'],
+                     f"{request['line_score']:g}", request['view_mode']])
+    return UNSAFE_FILENAME_CHARS.sub('_', name) + '.' + image_format
+
+def render_charts(processor: DataProcessor, charts: Dict, as_of: Optional[pd.Timestamp] = None) -> int:
+    """
+    Render the chart of every distinct prop with games, for each of
+    charts['timeframes'], into charts['directory'], with day windows
+    ending on as_of
+
+    Returns the number of charts written.
+    """
+    props_df = processor.props_df.drop_duplicates(['Player Name', 'Team Name', 'Stat Name', 'Line Score'])
+    rows, _ = processor.player_keys.resolve(props_df['Player Name'], props_df['Team Name'])
+    props_df = props_df[(rows >= 0) & props_df['Line Score'].notna().to_numpy()]
+    requests = [
+        {'player_name': player_name, 'team_name': team_name, 'stat_name': stat_name,
+         'line_score': float(line_score), 'view_mode': timeframe, 'opponent_team': opponent_team}
+        for player_name, team_name, stat_name, line_score, opponent_team in zip(
+            props_df['Player Name'], props_df['Team Name'], props_df['Stat Name'],
+            props_df['Line Score'], props_df['Opponent Team']
+        )
+        for timeframe in charts['timeframes']
+    ]
+
+    visualizer = DataVisualizer(processor.nba_stats_df, processor.props_df, processor=processor, as_of=as_of)
+    written = 0
+    for index, result in visualizer.create_prop_visualizations(
+            requests, output='image', image_format=charts['format'], dpi=charts['dpi']):
+        if 'error' in result:
+            logger.debug(f"No chart for {requests[index]}: {result['error']}")
+            continue
+        with open(os.path.join(charts['directory'], chart_filename(requests[index], charts['format'])), 'wb') as f:
+            f.write(base64.b64decode(result['graph']))
+        written += 1
+    return written
+
+def score_shard(stats_df: pd.DataFrame, props_df: pd.DataFrame, timeframes: List[str],
+                aggregates: bool, charts: Optional[Dict],
+                as_of: Optional[pd.Timestamp] = None) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+    """
+    Score one shard's props against its games in a fresh DataProcessor
+
+    as_of is the latest game of the whole slate, so day windows of the
+    scores and charts end on the same day in every shard.
+
+    Returns:
+        tuple: (scores indexed like props_df, unmatched props, charts written)
+    """
+    processor = DataProcessor(stats_df, props_df)
+    scores = processor.analyze_props_batch(
+        timeframes=[timeframe for timeframe in timeframes if timeframe != 'h2h'],
+        include_h2h='h2h' in timeframes,
+        aggregates=aggregates,
+        as_of=as_of
+    )
+    charts_written = render_charts(processor, charts, as_of) if charts else 0
+    return scores, processor.unmatched_props(), charts_written
+
+def analyze(stats_df: pd.DataFrame, props_df: pd.DataFrame, timeframes: List[str], workers: int,
+            aggregates: bool = False, charts: Optional[Dict] = None) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Score every prop, sharded by player across workers processes
+
+    With workers of 0 or 1 everything runs in this process.
+
+    Returns:
+        tuple: (props_df with the score columns added, summary dict)
+    """
+    start = time.perf_counter()
+    shards = max(workers, 1)
+    stats_shards, props_shards = shard_players(stats_df, props_df, shards)
+    latest_date = pd.to_datetime(stats_df['date'], errors='coerce').max()
+    as_of = None if pd.isna(latest_date) else latest_date
+    tasks = [
+        (stats_df[stats_shards == shard].reset_index(drop=True), props_df[props_shards == shard].copy(),
+         timeframes, aggregates, charts, as_of)
+        for shard in range(shards)
+        if (props_shards == shard).any()
+    ]
+
+    if workers > 1 and len(tasks) > 1:
+        # Spawned like the app's render pool, so no worker inherits matplotlib state
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            results = list(pool.map(score_shard, *zip(*tasks)))
+    else:
+        results = [score_shard(*task) for task in tasks]
+
+    scores = pd.concat([result[0] for result in results]).reindex(props_df.index) if results else pd.DataFrame(index=props_df.index)
+    unmatched = pd.concat([result[1] for result in results]) if results else pd.DataFrame(columns=['Props'])
+    summary = {
+        'props': len(props_df),
+        'games': len(stats_df),
+        'shards': len(tasks),
+        'workers': min(workers, len(tasks)) if workers > 1 else 0,
+        'unmatched_props': int(unmatched['Props'].sum()),
+        'charts': sum(result[2] for result in results),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+    return pd.concat([props_df, scores], axis=1), summary
+
+def write_results(results: pd.DataFrame, path: str, output_format: str):
+    """Write the scored props as CSV, Parquet (needs pyarrow) or a JSON list of records"""
+    if output_format == 'csv':
+        results.to_csv(path, index=False)
+    elif output_format == 'parquet':
+        results.to_parquet(path, index=False)
+    else:
+        results.to_json(path, orient='records', date_format='iso', indent=1)
+
+def parse_timeframes(text: str) -> List[str]:
+    """Comma-separated timeframes, each one window_stats accepts or 'h2h'"""
+    timeframes = [timeframe.strip() for timeframe in text.split(',') if timeframe.strip()]
+    for timeframe in timeframes:
+        if timeframe != 'h2h' and parse_timeframe(timeframe) is None:
+            raise argparse.ArgumentTypeError(f"Unsupported timeframe: {timeframe}")
+    return timeframes
+
+def main():
+    parser = argparse.ArgumentParser(description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stats', required=True, help='NBA stats CSV')
+    parser.add_argument('--props', required=True, help='Props CSV')
+    parser.add_argument('--output', required=True, help='Results file (.csv, .parquet or .json)')
+    parser.add_argument('--format', choices=sorted(set(OUTPUT_FORMATS.values())),
+                        help='Results format, instead of the one the output extension implies')
+    parser.add_argument('--timeframes', type=parse_timeframes, default=DEFAULT_TIMEFRAMES,
+                        help=f"Comma-separated timeframes to score, default {','.join(DEFAULT_TIMEFRAMES)}")
+    parser.add_argument('--aggregates', action='store_true',
+                        help='Also write the mean, median, std, ewma, push and under rates of every timeframe')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes, default one per CPU (0 or 1 runs in this process)')
+    parser.add_argument('--charts', help='Render each prop\'s chart into this directory')
+    parser.add_argument('--chart-timeframes', type=parse_timeframes, default=['last_10'],
+                        help='Comma-separated timeframes to chart, default last_10')
+    parser.add_argument('--chart-format', choices=list(IMAGE_FORMATS), default='png')
+    parser.add_argument('--chart-dpi', type=int, default=300)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, os.getenv('LOG_LEVEL', 'WARNING').upper(), logging.WARNING))
+    output_format = args.format or OUTPUT_FORMATS.get(os.path.splitext(args.output)[1].lower())
+    if output_format is None:
+        parser.error(f"Cannot tell the format of {args.output}; use --format")
+
+    charts = None
+    if args.charts:
+        os.makedirs(args.charts, exist_ok=True)
+        charts = {'directory': args.charts, 'timeframes': args.chart_timeframes,
+                  'format': args.chart_format, 'dpi': args.chart_dpi}
+
+    try:
+        stats_df = read_stats(args.stats)
+        props_df = read_props(args.props)
+    except (OSError, ValueError) as e:
+        sys.exit(f"error: {e}")
+
+    results, summary = analyze(stats_df, props_df, args.timeframes, args.workers, args.aggregates, charts)
+    try:
+        write_results(results, args.output, output_format)
+    except ImportError as e:
+        sys.exit(f"error: {output_format} output needs an extra package: {e}")
+
+    print(f"Scored {summary['props']} props ({summary['unmatched_props']} without games) against "
+          f"{summary['games']} games in {summary['shards']} shards on {summary['workers'] or 1} processes "
+          f"in {summary['seconds']}s; wrote {args.output}"
+          + (f" and {summary['charts']} charts to {args.charts}" if charts else ''), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
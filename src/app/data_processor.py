@@ -1,7 +1,45 @@
+import copy
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple, Optional
-from datetime import datetime
+from window_stats import WindowStats, parse_timeframe, ladder_lines, sweep_lines, EWMA_SPAN
+from matchups import MatchupStats
+from player_keys import PlayerKeyResolver
+
+# Stat columns that make up each supported prop stat
+STAT_COMPONENTS = {
+    'Points': ['pts'],
+    'Rebounds': ['reb'],
+    'Assists': ['ast'],
+    '3-PT Made': ['fg3m'],
+    'Pts+Rebs+Asts': ['pts', 'reb', 'ast'],
+    'Pts+Rebs': ['pts', 'reb'],
+    'Pts+Asts': ['pts', 'ast'],
+    'Rebs+Asts': ['reb', 'ast']
+}
+
+# Every stats column used by STAT_COMPONENTS
+STAT_COMPONENTS_COLUMNS = {col for cols in STAT_COMPONENTS.values() for col in cols}
+
+# Number of most recent games in each standard timeframe (None means all games).
+# Any other 'last_<n>' or 'last_<n>_days' window is accepted too, see window_stats
+TIMEFRAME_GAMES = {
+    'last_5': 5,
+    'last_10': 10,
+    'last_20': 20,
+    'season': None
+}
+
+# Columns of the slice table of every (player, team), with the dtypes it
+# keeps even when empty, so a stored empty index attaches like any other
+SLICE_TABLE_DTYPES = {'Player Name': object, 'Team Name': object, '_start': np.int64, '_stop': np.int64}
+
+def naive_dates(dates: pd.Series) -> pd.Series:
+    """Parse game dates, converting time zone aware ones to naive UTC so the game log holds datetime64 values"""
+    dates = pd.to_datetime(dates)
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    return dates
 
 class DataProcessor:
     def __init__(self, nba_stats_df: pd.DataFrame, props_df: pd.DataFrame):
@@ -10,9 +48,523 @@ class DataProcessor:
         
         # Convert date columns if they exist
         if 'date' in self.nba_stats_df.columns:
-            self.nba_stats_df['date'] = pd.to_datetime(self.nba_stats_df['date'])
+            self.nba_stats_df['date'] = naive_dates(self.nba_stats_df['date'])
         if 'Start Time' in self.props_df.columns:
             self.props_df['Start Time'] = pd.to_datetime(self.props_df['Start Time'])
+        self._prop_opponents = None
+        
+        self._build_game_log_index()
+    
+    def _build_game_log_index(self):
+        """
+        Sort the game logs once and index them by player.
+        
+        Rows are ordered by (player, team, date descending), so every
+        (player, team) pair owns a contiguous slice of the stat arrays.
+        Opponents are interned as integer codes, so a player's games
+        against one are found by comparing codes inside the slice.
+        """
+        self._player_slices = {}
+        self._opponent_names = []
+        self._opponent_codes = {}
+        self._log_arrays = {}
+        self._log_rows = np.empty(0, dtype=np.int64)
+        self._stat_totals = {}
+        self._slice_table = pd.DataFrame(columns=list(SLICE_TABLE_DTYPES)).astype(SLICE_TABLE_DTYPES)
+        self._dead_rows = 0
+        self._window_stats = None
+        self._matchups = None
+        self._player_keys = None
+        self.index_source = None
+        self.matchups_source = None
+        
+        key_columns = ['player_name', 'team_abbreviation']
+        if not all(col in self.nba_stats_df.columns for col in key_columns):
+            return
+        
+        sort_columns = key_columns + (['date'] if 'date' in self.nba_stats_df.columns else [])
+        sorted_stats = self.nba_stats_df[sort_columns].reset_index(drop=True).sort_values(
+            sort_columns,
+            ascending=[True, True, False][:len(sort_columns)],
+            kind='mergesort'
+        )
+        self._log_rows = sorted_stats.index.to_numpy()
+        
+        for col in STAT_COMPONENTS_COLUMNS:
+            if col in self.nba_stats_df.columns:
+                values = pd.to_numeric(self.nba_stats_df[col], errors='coerce')
+                self._log_arrays[col] = values.to_numpy(dtype=np.float32)[self._log_rows]
+        if 'date' in self.nba_stats_df.columns:
+            self._log_arrays['date'] = self.nba_stats_df['date'].to_numpy()[self._log_rows]
+        if 'opponent_team' in self.nba_stats_df.columns:
+            self._log_arrays['opponent_team'] = self._intern_opponents(self.nba_stats_df['opponent_team'])[self._log_rows]
+        
+        # Contiguous slice per (player, team)
+        players = sorted_stats['player_name'].to_numpy()
+        teams = sorted_stats['team_abbreviation'].to_numpy()
+        n_rows = len(players)
+        if n_rows == 0:
+            return
+        
+        boundaries = np.flatnonzero(
+            (players[1:] != players[:-1]) | (teams[1:] != teams[:-1])
+        ) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [n_rows]))
+        self._player_slices = {
+            (players[start], teams[start]): slice(start, end)
+            for start, end in zip(starts, ends)
+            if not (pd.isna(players[start]) or pd.isna(teams[start]))
+        }
+        self._slice_table = pd.DataFrame({
+            'Player Name': players[starts],
+            'Team Name': teams[starts],
+            '_start': starts,
+            '_stop': ends
+        }).dropna(subset=['Player Name', 'Team Name'])
+    
+    def _intern_opponents(self, opponents) -> np.ndarray:
+        """
+        Integer codes of opponent names, -1 for missing ones
+        
+        Names seen for the first time get the next free code, so codes
+        already in the game log never change.
+        """
+        opponents = pd.Categorical(opponents)
+        for name in opponents.categories:
+            if name not in self._opponent_codes:
+                self._opponent_codes[name] = len(self._opponent_names)
+                self._opponent_names.append(name)
+        dtype = np.int16 if len(self._opponent_names) <= np.iinfo(np.int16).max else np.int32
+        mapping = np.array([self._opponent_codes[name] for name in opponents.categories] + [-1], dtype=dtype)
+        return mapping[opponents.codes]
+    
+    @classmethod
+    def from_index(cls, nba_stats_df: pd.DataFrame, props_df: pd.DataFrame,
+                   index: Dict[str, pd.DataFrame], source: Optional[str] = None,
+                   matchups_source: Optional[str] = None) -> 'DataProcessor':
+        """
+        Attach to a game log index exported by export_index instead of building one
+        
+        The index frames are used as they are, so when they are memory-mapped
+        the stat arrays are shared with every other process using them.
+        
+        Args:
+            index (dict): The frames returned by export_index
+            source (str): Where the 'log' frame is stored, see export_index
+            matchups_source (str): Where the 'matchups' frame is stored
+        """
+        processor = cls.__new__(cls)
+        processor.nba_stats_df = nba_stats_df
+        processor.props_df = props_df
+        if 'Start Time' in props_df.columns:
+            props_df['Start Time'] = pd.to_datetime(props_df['Start Time'])
+        processor._prop_opponents = None
+        
+        log = index['log']
+        processor._log_rows = log['_row'].to_numpy()
+        processor._log_arrays = {}
+        processor._stat_totals = {}
+        processor._opponent_names = []
+        processor._opponent_codes = {}
+        for col in log.columns:
+            if col.startswith('total:'):
+                processor._stat_totals[col[len('total:'):]] = log[col].to_numpy()
+            elif col == 'opponent_team':
+                # Stored as categorical codes, which are the processor's own
+                opponents = log[col].array
+                processor._opponent_names = list(opponents.categories)
+                processor._opponent_codes = {name: code for code, name in enumerate(processor._opponent_names)}
+                processor._log_arrays[col] = opponents.codes
+            elif col != '_row':
+                processor._log_arrays[col] = log[col].to_numpy()
+        
+        slices = index['slices']
+        processor._slice_table = slices
+        processor._player_slices = {
+            (player, team): slice(start, stop)
+            for player, team, start, stop in zip(
+                slices['Player Name'].to_numpy(), slices['Team Name'].to_numpy(),
+                slices['_start'].to_numpy(), slices['_stop'].to_numpy()
+            )
+        }
+        
+        processor._dead_rows = len(processor._log_rows) - int((slices['_stop'] - slices['_start']).sum())
+        processor._window_stats = None
+        processor._player_keys = None
+        # Indexes stored before matchups were kept as sums build them on first use
+        processor._matchups = None
+        processor.matchups_source = None
+        if all(name in index for name in ('matchups', 'opponents', 'matchup_blocks')):
+            processor._matchups = MatchupStats(index['matchups'], index['opponents'], index['matchup_blocks'])
+            processor.matchups_source = matchups_source
+        processor.index_source = source
+        return processor
+    
+    def export_index(self, log_start: int = 0, matchups_start: int = 0) -> Dict[str, pd.DataFrame]:
+        """
+        The game log index as frames that can be stored and passed to from_index
+        
+        'log' holds the sorted stat arrays, every stat's totals and the
+        opponent codes as a categorical column, 'slices' the slice of each
+        (player, team), and 'matchups', 'opponents' and 'matchup_blocks' the
+        MatchupStats frames. Rows are only ever appended to 'log' until the
+        index is rebuilt, so while index_source is unchanged a stored copy
+        can be extended with the rows from log_start onwards. The same goes
+        for 'matchups' from matchups_start while matchups_source is unchanged.
+        """
+        log = {'_row': self._log_rows[log_start:]}
+        for col, values in self._log_arrays.items():
+            if col == 'opponent_team':
+                # Appending new names to the stored categories keeps the codes in step
+                values = pd.Categorical.from_codes(values, categories=self._opponent_names)
+            log[col] = values[log_start:]
+        for stat_name, columns in STAT_COMPONENTS.items():
+            if all(col in self._log_arrays for col in columns):
+                log[f'total:{stat_name}'] = self._get_stat_totals(stat_name)[log_start:]
+        
+        matchups = self.matchups
+        return {
+            'log': pd.DataFrame(log),
+            'slices': self._slice_table.reset_index(drop=True),
+            **({'matchups': matchups.player_opponents.iloc[matchups_start:].reset_index(drop=True),
+                'opponents': matchups.opponents,
+                'matchup_blocks': matchups.blocks} if matchups else {})
+        }
+    
+    def with_appended_games(self, nba_stats_df: pd.DataFrame) -> 'DataProcessor':
+        """
+        Index games appended to the end of the stats without a full rebuild
+        
+        Args:
+            nba_stats_df (pd.DataFrame): The current stats with the new rows added at the end
+        
+        Returns:
+            A new DataProcessor. This one is left untouched for requests still using it.
+        """
+        updated = copy.copy(self)
+        updated.nba_stats_df = nba_stats_df
+        if 'date' in nba_stats_df.columns:
+            nba_stats_df['date'] = naive_dates(nba_stats_df['date'])
+        updated._extend_game_log_index(len(self.nba_stats_df))
+        return updated
+    
+    def with_props(self, props_df: pd.DataFrame) -> 'DataProcessor':
+        """A new DataProcessor for another props slate, sharing this one's game log index"""
+        updated = copy.copy(self)
+        updated.props_df = props_df
+        if 'Start Time' in props_df.columns:
+            props_df['Start Time'] = pd.to_datetime(props_df['Start Time'])
+        updated._prop_opponents = None
+        return updated
+    
+    def _extend_game_log_index(self, first_new_row: int):
+        """
+        Add stats rows from first_new_row onwards to the game log index.
+        
+        Only players with new games are re-sorted. Each of their logs is
+        copied to the end of the stat arrays with the new games merged in,
+        and the old copy is left unused. Once unused rows outnumber live
+        ones the index is rebuilt from scratch. Matchup sums that are
+        already built are extended with the new games the same way.
+        """
+        new_rows = np.arange(first_new_row, len(self.nba_stats_df))
+        if len(new_rows) == 0:
+            return
+        if not self._player_slices:
+            self._build_game_log_index()
+            return
+        
+        # Copy the containers this processor shares with the one it came from
+        old_slices = self._player_slices
+        self._player_slices = dict(self._player_slices)
+        self._opponent_names = list(self._opponent_names)
+        self._opponent_codes = dict(self._opponent_codes)
+        self._log_arrays = dict(self._log_arrays)
+        self._stat_totals = dict(self._stat_totals)
+        old_matchups = self._matchups
+        self._window_stats = None
+        self._matchups = None
+        self._player_keys = None
+        
+        new_stats = self.nba_stats_df.iloc[new_rows]
+        groups = pd.DataFrame({
+            'player_name': new_stats['player_name'].to_numpy(),
+            'team_abbreviation': new_stats['team_abbreviation'].to_numpy()
+        }).groupby(['player_name', 'team_abbreviation'], sort=False).indices
+        
+        # Merge each affected log with its new games, most recent first
+        dates = None
+        if 'date' in self.nba_stats_df.columns:
+            dates = self.nba_stats_df['date'].to_numpy(dtype='datetime64[ns]')
+        blocks = []
+        block_start = len(self._log_rows)
+        new_slices = {}
+        for key, group in groups.items():
+            old_slice = self._player_slices.get(key)
+            rows = new_rows[group]
+            if old_slice is not None:
+                rows = np.concatenate((self._log_rows[old_slice], rows))
+                self._dead_rows += old_slice.stop - old_slice.start
+            if dates is not None:
+                game_dates = dates[rows]
+                missing = np.isnat(game_dates)
+                order_key = np.where(missing, np.iinfo(np.int64).max, -np.where(missing, 0, game_dates.view(np.int64)))
+                rows = rows[np.lexsort((rows, order_key))]
+            blocks.append(rows)
+            new_slices[key] = slice(block_start, block_start + len(rows))
+            block_start += len(rows)
+        
+        block_rows = np.concatenate(blocks)
+        start = len(self._log_rows)
+        self._log_rows = np.concatenate((self._log_rows, block_rows))
+        for col in self._log_arrays:
+            values = self.nba_stats_df[col].iloc[block_rows]
+            if col in STAT_COMPONENTS_COLUMNS:
+                values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float32)
+            elif col == 'opponent_team':
+                values = self._intern_opponents(values)
+            else:
+                values = values.to_numpy()
+            self._log_arrays[col] = np.concatenate((self._log_arrays[col], values))
+        for stat_name, totals in self._stat_totals.items():
+            self._stat_totals[stat_name] = np.concatenate(
+                (totals, self._get_stat_values(slice(start, len(self._log_rows)), stat_name))
+            )
+        
+        # Point the affected players at their new slices
+        self._player_slices.update(new_slices)
+        self._slice_table = pd.DataFrame(
+            [(player, team, s.start, s.stop) for (player, team), s in self._player_slices.items()],
+            columns=list(SLICE_TABLE_DTYPES)
+        ).astype(SLICE_TABLE_DTYPES)
+        
+        if self._dead_rows > len(self._log_rows) - self._dead_rows:
+            self._build_game_log_index()
+        elif old_matchups is not None:
+            matchups = self._extend_matchups(old_matchups, old_slices, new_slices, first_new_row)
+            # Like the log, rebuilt on first use once unused rows outnumber live ones
+            if matchups.dead_rows > len(matchups.player_opponents) - matchups.dead_rows:
+                self.matchups_source = None
+            else:
+                self._matchups = matchups
+    
+    def _extend_matchups(self, matchups: MatchupStats, old_slices: Dict[Tuple, slice],
+                         new_slices: Dict[Tuple, slice], first_new_row: int) -> MatchupStats:
+        """
+        Add the games from stats row first_new_row onwards to matchups
+        
+        Only the new games are aggregated. Team games of theirs that an
+        older row already counted, a teammate's for the same game, are
+        found among the old games of the new games' teams.
+        """
+        keys = list(new_slices)
+        positions = [np.arange(s.start, s.stop) for s in new_slices.values()]
+        positions = [p[self._log_rows[p] >= first_new_row] for p in positions]
+        lengths = np.array([len(p) for p in positions])
+        positions = np.concatenate(positions)
+        opponents = self._log_arrays['opponent_team'][positions]
+        dates = self._log_arrays.get('date')
+        new = MatchupStats.build(
+            np.array([player for player, _ in keys], dtype=object),
+            np.array([team for _, team in keys], dtype=object),
+            lengths, opponents, self._opponent_names,
+            dates[positions] if dates is not None else None,
+            {
+                stat_name: self._get_stat_totals(stat_name)[positions]
+                for stat_name, columns in STAT_COMPONENTS.items()
+                if all(col in self._log_arrays for col in columns)
+            }
+        )
+        
+        repeated = None
+        if dates is not None:
+            new_teams = np.repeat(np.array([team for _, team in keys], dtype=object), lengths)
+            new_games = pd.DataFrame({'opponent': opponents, 'team': new_teams, 'date': dates[positions]})
+            new_games = new_games[new_games['opponent'] >= 0].drop_duplicates()
+            team_names = set(new_games['team'])
+            team_slices = [(team, s) for (_, team), s in old_slices.items() if team in team_names]
+            if team_slices and len(new_games):
+                # Only the old games of those teams on the new games' days can repeat them
+                old_positions = np.concatenate([np.arange(s.start, s.stop) for _, s in team_slices])
+                old_teams = np.repeat(np.array([team for team, _ in team_slices], dtype=object),
+                                      [s.stop - s.start for _, s in team_slices])
+                same_day = np.isin(dates[old_positions], new_games['date'].unique())
+                old_games = pd.DataFrame({
+                    'opponent': self._log_arrays['opponent_team'][old_positions[same_day]],
+                    'team': old_teams[same_day],
+                    'date': dates[old_positions[same_day]]
+                }).drop_duplicates()
+                seen = new_games.merge(old_games, on=['opponent', 'team', 'date'])
+                names = np.asarray(self._opponent_names, dtype=object)
+                repeated = pd.Series(names[seen['opponent'].to_numpy()]).value_counts().to_dict()
+        return matchups.extend(new, repeated)
+    
+    def _get_stat_values(self, positions, stat_name: str) -> Optional[np.ndarray]:
+        """Sum the component columns of a stat at the given log positions"""
+        columns = STAT_COMPONENTS.get(stat_name)
+        if columns is None:
+            return None
+        values = self._log_arrays[columns[0]][positions]
+        for col in columns[1:]:
+            values = values + self._log_arrays[col][positions]
+        return values
+    
+    def _get_stat_totals(self, stat_name: str) -> Optional[np.ndarray]:
+        """Stat values for every indexed game, computed once per stat"""
+        if stat_name not in self._stat_totals:
+            self._stat_totals[stat_name] = self._get_stat_values(slice(None), stat_name)
+        return self._stat_totals[stat_name]
+    
+    @property
+    def window_stats(self) -> WindowStats:
+        """Windowed aggregates over the game log index, built on first use"""
+        if self._window_stats is None:
+            self._window_stats = WindowStats(
+                self._get_stat_totals, self._log_arrays.get('date'),
+                self._slice_table['_start'].to_numpy(), self._slice_table['_stop'].to_numpy(),
+                len(self._log_rows)
+            )
+        return self._window_stats
+    
+    @property
+    def matchups(self) -> Optional[MatchupStats]:
+        """Matchup aggregates of the indexed games, built on first use; None without opponents"""
+        if self._matchups is None and 'opponent_team' in self._log_arrays and len(self._slice_table):
+            starts = self._slice_table['_start'].to_numpy()
+            lengths = self._slice_table['_stop'].to_numpy() - starts
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            dates = self._log_arrays.get('date')
+            self._matchups = MatchupStats.build(
+                self._slice_table['Player Name'].to_numpy(),
+                self._slice_table['Team Name'].to_numpy(),
+                lengths,
+                self._log_arrays['opponent_team'][positions],
+                self._opponent_names,
+                dates[positions] if dates is not None else None,
+                {
+                    stat_name: self._get_stat_totals(stat_name)[positions]
+                    for stat_name, columns in STAT_COMPONENTS.items()
+                    if all(col in self._log_arrays for col in columns)
+                }
+            )
+        return self._matchups
+    
+    @property
+    def player_keys(self) -> PlayerKeyResolver:
+        """Normalized-name index over the indexed (player, team) pairs, built on first use"""
+        if self._player_keys is None:
+            self._player_keys = PlayerKeyResolver(
+                self._slice_table['Player Name'].to_numpy(), self._slice_table['Team Name'].to_numpy()
+            )
+        return self._player_keys
+    
+    def build_indexes(self):
+        """Build the indexes that are otherwise built on first use, such as before a worker serves requests"""
+        for name in ('player_keys', 'window_stats', 'matchups'):
+            getattr(self, name)
+    
+    def _find_player_slice(self, player_name: str, team_name: str) -> Optional[slice]:
+        """A player's slice, by exact name or else by normalized name (see player_keys)"""
+        player_slice = self._player_slices.get((player_name, team_name))
+        if player_slice is None and self._player_slices:
+            row = self.player_keys.lookup(player_name, team_name)
+            if row is not None:
+                player_slice = slice(int(self._slice_table['_start'].iat[row]), int(self._slice_table['_stop'].iat[row]))
+        return player_slice
+    
+    def _resolve_player(self, player_name: str, team_name: str) -> Tuple[str, str]:
+        """The logged (player, team) a name means, by exact or else by normalized name (see player_keys)"""
+        if (player_name, team_name) not in self._player_slices and self._player_slices:
+            row = self.player_keys.lookup(player_name, team_name)
+            if row is not None:
+                return self._slice_table['Player Name'].iat[row], self._slice_table['Team Name'].iat[row]
+        return player_name, team_name
+    
+    def unmatched_props(self, props_df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """
+        Players and teams of props that match no indexed games, even by
+        normalized name, with their number of 'Props', most first
+        """
+        if props_df is None:
+            props_df = self.props_df
+        rows, _ = self.player_keys.resolve(props_df['Player Name'], props_df['Team Name'])
+        unmatched = pd.DataFrame({
+            'Player Name': props_df['Player Name'].to_numpy(dtype=object)[rows < 0],
+            'Team Name': props_df['Team Name'].to_numpy(dtype=object)[rows < 0]
+        })
+        return unmatched.value_counts(dropna=False, sort=True).rename('Props').reset_index()
+    
+    def get_matchup(self, player_name: str, team_name: str, opponent_team: str) -> Dict:
+        """
+        The player's record against an opponent ('h2h', None if they never
+        met) and what the opponent allows ('opponent'), see MatchupStats.
+        Player names are matched like props, by exact or normalized name.
+        """
+        matchups = self.matchups
+        if matchups is None:
+            return {'h2h': None, 'opponent': None}
+        player_name, team_name = self._resolve_player(player_name, team_name)
+        return {
+            'h2h': matchups.matchup(player_name, team_name, opponent_team),
+            'opponent': matchups.opponent(opponent_team)
+        }
+    
+    def get_prop_opponent(self, player_name: str, team_name: str, stat_name: str) -> Optional[str]:
+        """Opponent of the first prop for a player's stat on the slate, or None"""
+        if self._prop_opponents is None:
+            columns = ['Player Name', 'Team Name', 'Stat Name', 'Opponent Team']
+            if all(col in self.props_df.columns for col in columns):
+                first = self.props_df[columns].drop_duplicates(columns[:3])
+                self._prop_opponents = dict(zip(zip(*(first[col] for col in columns[:3])), first['Opponent Team']))
+            else:
+                self._prop_opponents = {}
+        return self._prop_opponents.get((player_name, team_name, stat_name))
+    
+    def _get_h2h_positions(self, player_name: str, team_name: str, opponent_team: str) -> Optional[np.ndarray]:
+        """Log positions of a player's games against an opponent, most recent first; None if they never met"""
+        player_slice = self._find_player_slice(player_name, team_name)
+        code = self._opponent_codes.get(opponent_team)
+        if player_slice is None or code is None or 'opponent_team' not in self._log_arrays:
+            return None
+        positions = np.flatnonzero(self._log_arrays['opponent_team'][player_slice] == code)
+        return positions + player_slice.start if len(positions) else None
+    
+    def get_game_rows(self, player_name: str, team_name: str,
+                      opponent_team: Optional[str] = None) -> np.ndarray:
+        """Stats row numbers of a player's games, optionally only against opponent_team, most recent first"""
+        if opponent_team is not None:
+            positions = self._get_h2h_positions(player_name, team_name, opponent_team)
+        else:
+            positions = self._find_player_slice(player_name, team_name)
+        if positions is None:
+            return np.empty(0, dtype=np.int64)
+        return self._log_rows[positions]
+    
+    def get_window_rows(self, player_name: str, team_name: str, timeframe: str,
+                        as_of: Optional[pd.Timestamp] = None) -> np.ndarray:
+        """
+        Stats row numbers of a player's games in a timeframe's window, most recent first
+        
+        Raises:
+            ValueError: For timeframes window_stats does not accept
+        """
+        player_slice = self._find_player_slice(player_name, team_name)
+        if player_slice is None:
+            if parse_timeframe(timeframe) is None:
+                raise ValueError(f"Unsupported timeframe: {timeframe}")
+            return np.empty(0, dtype=np.int64)
+        start, stop = self.window_stats.window_bounds(player_slice, timeframe, as_of)
+        return self._log_rows[start:stop]
+    
+    def _window_stop(self, player_slice: slice, view_mode: str) -> int:
+        """End of a view mode's window in the player's slice, defaulting to the last 5 games"""
+        window = parse_timeframe(view_mode)
+        if window is None:
+            view_mode = 'last_5'
+        elif window[0] == 'games':
+            return player_slice.stop if window[1] is None else min(player_slice.stop, player_slice.start + window[1])
+        return self.window_stats.window_bounds(player_slice, view_mode)[1]
     
     def _convert_to_native_types(self, value):
         """Convert numpy types to native Python types"""
@@ -29,30 +581,13 @@ class DataProcessor:
     def get_player_stats(self, player_name: str, team_name: str, 
                         view_mode: str = 'last_5') -> pd.DataFrame:
         """Get player stats based on view mode"""
-        # Filter by player and team
-        player_stats = self.nba_stats_df[
-            (self.nba_stats_df['player_name'] == player_name) &
-            (self.nba_stats_df['team_abbreviation'] == team_name)
-        ].copy()
-        
-        if player_stats.empty:
+        player_slice = self._find_player_slice(player_name, team_name)
+        if player_slice is None:
             return pd.DataFrame()
         
-        # Sort by date if available
-        if 'date' in player_stats.columns:
-            player_stats = player_stats.sort_values('date', ascending=False)
-        
-        # Apply view mode filter
-        if view_mode == 'last_5':
-            return player_stats.head(5)
-        elif view_mode == 'last_10':
-            return player_stats.head(10)
-        elif view_mode == 'last_20':
-            return player_stats.head(20)
-        elif view_mode == 'season':
-            return player_stats
-        else:
-            return player_stats.head(5)  # Default to last 5 games
+        # Apply view mode filter, defaulting to last 5 games
+        rows = self._log_rows[player_slice.start:self._window_stop(player_slice, view_mode)]
+        return self.nba_stats_df.iloc[rows].copy()
     
     def get_player_props(self, player_name: str, team_name: str) -> pd.DataFrame:
         """Get props for a specific player"""
@@ -66,47 +601,22 @@ class DataProcessor:
                     view_mode: str = 'last_5') -> Dict:
         """Analyze a specific prop bet"""
         try:
-            # Filter stats for the player
-            player_stats = self.nba_stats_df[
-                (self.nba_stats_df['player_name'] == player_name) &
-                (self.nba_stats_df['team_abbreviation'] == team_name)
-            ].sort_values('date', ascending=False)
-
-            if player_stats.empty:
+            # Look up the player's date-sorted games
+            player_slice = self._find_player_slice(player_name, team_name)
+            if player_slice is None:
                 return {'error': 'No stats found for player'}
 
-            # Get the appropriate number of games based on view mode
-            games_to_analyze = {
-                'last_5': 5,
-                'last_10': 10,
-                'last_20': 20,
-                'season': len(player_stats)
-            }.get(view_mode, 5)
-
-            player_stats = player_stats.head(games_to_analyze)
+            # Get the appropriate games based on view mode
+            start = player_slice.start
+            stop = self._window_stop(player_slice, view_mode)
 
             # Calculate the stat value based on stat name
-            if stat_name == 'Points':
-                stat_values = player_stats['pts']
-            elif stat_name == 'Rebounds':
-                stat_values = player_stats['reb']
-            elif stat_name == 'Assists':
-                stat_values = player_stats['ast']
-            elif stat_name == '3-PT Made':
-                stat_values = player_stats['fg3m']
-            elif stat_name == 'Pts+Rebs+Asts':
-                stat_values = player_stats['pts'] + player_stats['reb'] + player_stats['ast']
-            elif stat_name == 'Pts+Rebs':
-                stat_values = player_stats['pts'] + player_stats['reb']
-            elif stat_name == 'Pts+Asts':
-                stat_values = player_stats['pts'] + player_stats['ast']
-            elif stat_name == 'Rebs+Asts':
-                stat_values = player_stats['reb'] + player_stats['ast']
-            else:
+            stat_values = self._get_stat_values(slice(start, stop), stat_name)
+            if stat_values is None:
                 return {'error': f'Unsupported stat name: {stat_name}'}
 
             # Calculate hits and hit rate
-            hits = sum(stat_values > line_score)
+            hits = np.count_nonzero(stat_values > line_score)
             total_games = len(stat_values)
             hit_rate = (hits / total_games) * 100 if total_games > 0 else 0
 
@@ -123,62 +633,325 @@ class DataProcessor:
         except Exception as e:
             return {'error': str(e)}
     
+    def analyze_props_batch(self, props_df: Optional[pd.DataFrame] = None,
+                            timeframes: Optional[List[str]] = None,
+                            include_h2h: bool = True,
+                            aggregates: bool = False,
+                            as_of: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Score every prop against every timeframe in one vectorized pass
+        
+        Each prop is expanded into one row per game of its player, ranked
+        from most recent. Hits, pushes and unders are accumulated along each
+        prop's games once, so every timeframe is a lookup at its window end.
+        
+        Args:
+            props_df (pd.DataFrame): Props to score, defaults to self.props_df
+            timeframes (list): 'season', 'last_<n>' or 'last_<n>_days' windows
+            include_h2h (bool): Also score games against 'Opponent Team'
+            aggregates (bool): Also add '<timeframe>_mean', '_median', '_std',
+                '_ewma', '_push_rate' and '_under_rate'
+            as_of (pd.Timestamp): Score as of this day, ignoring later games;
+                day windows end on it instead of on the latest game
+        
+        Returns:
+            pd.DataFrame aligned with props_df holding '<timeframe>_hits',
+            '<timeframe>_pushes', '<timeframe>_unders', '<timeframe>_games'
+            and '<timeframe>_rate' columns (plus 'h2h_*').
+            Rates are NaN when the player has no matching games.
+        """
+        if props_df is None:
+            props_df = self.props_df
+        if timeframes is None:
+            timeframes = list(TIMEFRAME_GAMES)
+        n_props = len(props_df)
+        
+        # Locate each prop's slice of the sorted game logs, by exact or normalized name
+        rows, _ = self.player_keys.resolve(props_df['Player Name'], props_df['Team Name'])
+        supported = props_df['Stat Name'].isin(STAT_COMPONENTS).to_numpy()
+        found = (rows >= 0) & supported
+        # Row 0 stands in for props without a slice, so rows + 1 indexes every prop
+        bounds = np.vstack((np.zeros((1, 2), dtype=np.int64),
+                            self._slice_table[['_start', '_stop']].to_numpy(dtype=np.int64)))
+        if as_of is not None:
+            # Games after as_of lead each slice, so skipping them moves its start
+            if self.window_stats.date_keys is None:
+                raise ValueError("Windows by date need game dates")
+            next_day = pd.Timestamp(as_of).normalize() + pd.Timedelta(days=1)
+            later = np.concatenate(([0], np.cumsum(self.window_stats.date_keys <= -next_day.value)))
+            bounds[:, 0] += later[bounds[:, 1]] - later[bounds[:, 0]]
+        starts = np.where(found, bounds[rows + 1, 0], 0)
+        lengths = np.where(found, bounds[rows + 1, 1] - bounds[rows + 1, 0], 0)
+        
+        # One row per (prop, game) with the game's recency rank
+        prop_ids = np.repeat(np.arange(n_props), lengths)
+        group_offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        ranks = np.arange(len(prop_ids)) - group_offsets
+        positions = np.repeat(starts, lengths) + ranks
+        
+        values = np.full(len(prop_ids), np.nan)
+        prop_stats = props_df['Stat Name'].to_numpy()[prop_ids]
+        for stat_name in STAT_COMPONENTS:
+            mask = prop_stats == stat_name
+            if mask.any():
+                values[mask] = self._get_stat_totals(stat_name)[positions[mask]]
+        
+        line_scores = pd.to_numeric(props_df['Line Score'], errors='coerce').to_numpy(dtype=np.float64)
+        prop_lines = line_scores[prop_ids]
+        hits = values > prop_lines
+        
+        results = pd.DataFrame(index=props_df.index)
+        
+        def add_counts(prefix, selected):
+            hit_counts = np.bincount(prop_ids[selected & hits], minlength=n_props)
+            game_counts = np.bincount(prop_ids[selected], minlength=n_props)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rates = np.where(game_counts > 0, hit_counts / game_counts * 100, np.nan)
+            results[f'{prefix}_hits'] = hit_counts
+            results[f'{prefix}_games'] = game_counts
+            results[f'{prefix}_rate'] = np.round(rates, 1)
+        
+        # Running counts along each prop's games, most recent first
+        prop_offsets = np.cumsum(lengths) - lengths
+        running = {
+            'hits': np.concatenate(([0], np.cumsum(hits))),
+            'pushes': np.concatenate(([0], np.cumsum(values == prop_lines))),
+            'unders': np.concatenate(([0], np.cumsum(values < prop_lines)))
+        }
+        
+        for timeframe in timeframes:
+            kind, size = parse_timeframe(timeframe) or ('games', 5)
+            if kind == 'days':
+                if self.window_stats.date_keys is None:
+                    raise ValueError("Day windows need game dates")
+                in_window = self.window_stats.date_keys[positions] <= self.window_stats.day_cutoff(size, as_of)
+                window_games = np.bincount(prop_ids[in_window], minlength=n_props)
+            else:
+                window_games = lengths if size is None else np.minimum(lengths, size)
+            
+            counts = {
+                name: totals[prop_offsets + window_games] - totals[prop_offsets]
+                for name, totals in running.items()
+            }
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rates = {
+                    name: np.where(window_games > 0, count / window_games * 100, np.nan)
+                    for name, count in counts.items()
+                }
+            results[f'{timeframe}_hits'] = counts['hits']
+            results[f'{timeframe}_pushes'] = counts['pushes']
+            results[f'{timeframe}_unders'] = counts['unders']
+            results[f'{timeframe}_games'] = window_games
+            results[f'{timeframe}_rate'] = np.round(rates['hits'], 1)
+            if aggregates:
+                results[f'{timeframe}_push_rate'] = np.round(rates['pushes'], 1)
+                results[f'{timeframe}_under_rate'] = np.round(rates['unders'], 1)
+                self._add_window_aggregates(results, timeframe, props_df, starts, window_games,
+                                            values, prop_ids, ranks)
+        
+        if include_h2h and 'opponent_team' in self._log_arrays:
+            # Compare opponent codes; names the log has never seen get -1, like missing ones
+            prop_codes = pd.Index(self._opponent_names, dtype=object).get_indexer(props_df['Opponent Team'].to_numpy())
+            prop_codes = prop_codes[prop_ids]
+            add_counts('h2h', (self._log_arrays['opponent_team'][positions] == prop_codes) & (prop_codes >= 0))
+        
+        return results
+    
+    def _add_window_aggregates(self, results: pd.DataFrame, timeframe: str, props_df: pd.DataFrame,
+                               starts: np.ndarray, window_games: np.ndarray, values: np.ndarray,
+                               prop_ids: np.ndarray, ranks: np.ndarray):
+        """Add the mean, std and ewma (from prefix sums) and median of each prop's window"""
+        n_props = len(props_df)
+        columns = {name: np.full(n_props, np.nan) for name in ('mean', 'median', 'std', 'ewma')}
+        stat_names = props_df['Stat Name'].to_numpy()
+        for stat_name in STAT_COMPONENTS:
+            mask = (stat_names == stat_name) & (window_games > 0)
+            if mask.any():
+                sums = self.window_stats.window_sums(starts[mask], starts[mask] + window_games[mask], stat_name)
+                for name, column in sums.items():
+                    columns[name][mask] = column
+        
+        # Medians: sort each window's values, then average its middle pair
+        selected = ranks < window_games[prop_ids]
+        window_values = values[selected]
+        window_props = prop_ids[selected]
+        valid = ~np.isnan(window_values)
+        window_values = window_values[valid]
+        window_props = window_props[valid]
+        order = np.lexsort((window_values, window_props))
+        window_values = window_values[order]
+        counts = np.bincount(window_props, minlength=n_props)
+        offsets = np.cumsum(counts) - counts
+        has_games = counts > 0
+        lower = window_values[(offsets + (counts - 1) // 2)[has_games]]
+        upper = window_values[(offsets + counts // 2)[has_games]]
+        columns['median'][has_games] = (lower + upper) / 2
+        
+        for name, column in columns.items():
+            results[f'{timeframe}_{name}'] = column
+    
     def get_all_props_analysis(self, view_mode='season'):
         """
         Analyze all props in the props file
         
         Args:
-            view_mode (str): One of 'last_5', 'last_10', 'last_20', 'season'
+            view_mode (str): 'season', 'last_<n>' or 'last_<n>_days'
         """
+        scores = self.analyze_props_batch(timeframes=[view_mode], include_h2h=False)
         results = []
-        for _, prop in self.props_df.iterrows():
-            analysis = self.analyze_prop(
-                prop['Player Name'],
-                prop['Team Name'],
-                prop['Stat Name'],
-                float(prop['Line Score']),
-                view_mode
-            )
-            if 'error' not in analysis:
-                results.append(analysis)
+        for prop, hits, total_games, hit_rate in zip(
+            self.props_df.to_dict('records'),
+            scores[f'{view_mode}_hits'],
+            scores[f'{view_mode}_games'],
+            scores[f'{view_mode}_rate']
+        ):
+            if total_games == 0:
+                continue
+            results.append({
+                'player_name': prop['Player Name'],
+                'team_name': prop['Team Name'],
+                'stat_name': prop['Stat Name'],
+                'line_score': float(prop['Line Score']),
+                'hits': int(hits),
+                'total_games': int(total_games),
+                'hit_rate': float(hit_rate)
+            })
         return results
 
+    def analyze_windows(self, player_name: str, team_name: str, stat_name: str,
+                        line_score: Optional[float] = None, timeframes: Optional[List[str]] = None,
+                        ewma_span: float = EWMA_SPAN, as_of: Optional[pd.Timestamp] = None) -> Dict:
+        """
+        Aggregates of a prop's stat over several windows of the player's recent games
+        
+        Args:
+            timeframes (list): 'season', 'last_<n>' or 'last_<n>_days' windows,
+                defaulting to the standard timeframes
+            line_score (float): Adds hits, pushes and unders and their rates
+            ewma_span (float): Span of the exponentially weighted mean
+            as_of (pd.Timestamp): Take the windows as of this day, ignoring later
+                games; day windows end on the latest game's day without it
+        
+        Returns:
+            dict with 'windows' mapping each timeframe to its games, mean,
+            median, std, ewma and line counts, or {'error': ...}
+        """
+        try:
+            player_slice = self._find_player_slice(player_name, team_name)
+            if player_slice is None:
+                return {'error': 'No stats found for player'}
+            if stat_name not in STAT_COMPONENTS:
+                return {'error': f'Unsupported stat name: {stat_name}'}
+            
+            windows = {}
+            for timeframe in timeframes or list(TIMEFRAME_GAMES):
+                start, stop = self.window_stats.window_bounds(player_slice, timeframe, as_of)
+                windows[timeframe] = self.window_stats.aggregate(start, stop, stat_name, line_score, ewma_span)
+            
+            return {
+                'player_name': player_name,
+                'team_name': team_name,
+                'stat_name': stat_name,
+                'line_score': self._convert_to_native_types(line_score),
+                'windows': windows
+            }
+        
+        except Exception as e:
+            return {'error': str(e)}
+    
+    def sweep_lines(self, player_name: str, team_name: str, stat_name: str,
+                    lines: Optional[List[float]] = None, timeframes: Optional[List[str]] = None,
+                    opponent_team: Optional[str] = None, as_of: Optional[pd.Timestamp] = None) -> Dict:
+        """
+        Hit rates of a player's stat against many lines at once, for alt lines and line ladders
+        
+        Each window's values are sorted once and every line is a binary
+        search, so sweeping twenty alt lines costs about as much as one.
+        
+        Args:
+            lines (list): Lines to evaluate, defaulting to every half-point
+                line across the player's season (see window_stats.ladder_lines)
+                and the player's lines for the stat on the current slate
+            timeframes (list): 'season', 'last_<n>', 'last_<n>_days' or 'h2h',
+                defaulting to the standard timeframes plus 'h2h' with an opponent
+            opponent_team (str): Opponent for the 'h2h' window
+            as_of (pd.Timestamp): Take the game windows as of this day
+        
+        Returns:
+            dict with the evaluated 'lines' (ascending), the slate's 'props'
+            for the stat and 'windows' mapping each timeframe to its 'games'
+            and per-line 'hits', 'pushes', 'unders' and 'hit_rate' lists,
+            or {'error': ...}
+        """
+        try:
+            player_slice = self._find_player_slice(player_name, team_name)
+            if player_slice is None:
+                return {'error': 'No stats found for player'}
+            totals = self._get_stat_totals(stat_name)
+            if totals is None:
+                return {'error': f'Unsupported stat name: {stat_name}'}
+            
+            if timeframes is None:
+                timeframes = list(TIMEFRAME_GAMES) + (['h2h'] if opponent_team else [])
+            player_props = self.get_player_props(player_name, team_name)
+            player_props = player_props[player_props['Stat Name'] == stat_name]
+            props = [
+                {'line_score': float(line_score), 'odds_type': odds_type}
+                for line_score, odds_type in sorted(zip(player_props['Line Score'], player_props['Odds Type']))
+            ]
+            if lines is None:
+                lines = np.concatenate((ladder_lines(totals[player_slice]), [prop['line_score'] for prop in props]))
+            lines = np.unique(np.asarray(lines, dtype=np.float64))
+            
+            windows = {}
+            for timeframe in timeframes:
+                if timeframe == 'h2h':
+                    if not opponent_team:
+                        return {'error': 'The h2h window needs an opponent team'}
+                    positions = self._get_h2h_positions(player_name, team_name, opponent_team)
+                    values = totals[positions] if positions is not None else np.empty(0)
+                else:
+                    start, stop = self.window_stats.window_bounds(player_slice, timeframe, as_of)
+                    values = totals[start:stop]
+                
+                counts = sweep_lines(values, lines)
+                games = len(values)
+                windows[timeframe] = {
+                    'games': games,
+                    **{name: count.tolist() for name, count in counts.items()},
+                    'hit_rate': (np.round(counts['hits'] / games * 100, 1) if games
+                                 else np.zeros(len(lines))).tolist()
+                }
+            
+            return {
+                'player_name': player_name,
+                'team_name': team_name,
+                'stat_name': stat_name,
+                'opponent_team': opponent_team,
+                'lines': lines.tolist(),
+                'props': props,
+                'windows': windows
+            }
+        
+        except Exception as e:
+            return {'error': str(e)}
+    
     def analyze_h2h(self, player_name: str, team_name: str, opponent_team: str,
                     stat_name: str, line_score: float) -> Dict:
         """Analyze head-to-head performance against a specific opponent"""
         try:
-            # Filter stats for the player against the specific opponent
-            player_stats = self.nba_stats_df[
-                (self.nba_stats_df['player_name'] == player_name) &
-                (self.nba_stats_df['team_abbreviation'] == team_name) &
-                (self.nba_stats_df['opponent_team'] == opponent_team)
-            ].sort_values('date', ascending=False)
-
-            if player_stats.empty:
+            # Look up the player's games against the specific opponent
+            positions = self._get_h2h_positions(player_name, team_name, opponent_team)
+            if positions is None:
                 return {'error': 'No H2H stats found'}
 
             # Calculate the stat value based on stat name
-            if stat_name == 'Points':
-                stat_values = player_stats['pts']
-            elif stat_name == 'Rebounds':
-                stat_values = player_stats['reb']
-            elif stat_name == 'Assists':
-                stat_values = player_stats['ast']
-            elif stat_name == '3-PT Made':
-                stat_values = player_stats['fg3m']
-            elif stat_name == 'Pts+Rebs+Asts':
-                stat_values = player_stats['pts'] + player_stats['reb'] + player_stats['ast']
-            elif stat_name == 'Pts+Rebs':
-                stat_values = player_stats['pts'] + player_stats['reb']
-            elif stat_name == 'Pts+Asts':
-                stat_values = player_stats['pts'] + player_stats['ast']
-            elif stat_name == 'Rebs+Asts':
-                stat_values = player_stats['reb'] + player_stats['ast']
-            else:
+            stat_values = self._get_stat_values(positions, stat_name)
+            if stat_values is None:
                 return {'error': f'Unsupported stat name: {stat_name}'}
 
             # Calculate hits and hit rate
-            hits = sum(stat_values > line_score)
+            hits = np.count_nonzero(stat_values > line_score)
             total_games = len(stat_values)
             hit_rate = (hits / total_games) * 100 if total_games > 0 else 0
 
@@ -194,4 +967,4 @@ class DataProcessor:
             }
 
         except Exception as e:
-            return {'error': str(e)} 
\ No newline at end of file
+            return {'error': str(e)} 
@@ -0,0 +1,104 @@
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class Dataset:
+    """Parsed frames and derived indexes for one version of the uploaded files"""
+
+    def __init__(self, version: str, nba_stats_df, props_df, processor):
+        self.version = version
+        self.nba_stats_df = nba_stats_df
+        self.props_df = props_df
+        self.processor = processor
+
+        # Analyzed props, their serialized /get_props response and the
+        # PropsIndex used for paging, each filled in on first use. The lock
+        # makes requests wait for a background job already computing them
+        self.props_by_type = None
+        self.props_body = None
+        self.props_etag = None
+        self.props_index = None
+        self.props_lock = threading.RLock()
+
+class DatasetCache:
+    """
+    Keep the loaded dataset in memory until a new version is published.
+
+    version_getter returns the current version (for example
+    DatasetStore.current_version) and loader loads a version, so each
+    worker process reloads once when another one publishes new data.
+    /upload also calls invalidate() so the next request reloads right away.
+    """
+
+    def __init__(self, version_getter: Callable[[], Optional[str]], loader: Callable[[str], Any]):
+        self.version_getter = version_getter
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._version = None
+        self._dataset = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def current_version(self) -> Optional[str]:
+        """The current version, or None when there is no data"""
+        return self.version_getter()
+
+    def get(self) -> Optional[Any]:
+        """Return the loaded dataset for the current version, loading it on a miss"""
+        with self._lock:
+            return self._get_locked()
+
+    def _get_locked(self) -> Optional[Any]:
+        # The version is read under the lock so an update() in progress is never mistaken for another one
+        version = self.current_version()
+        if version is None:
+            return None
+
+        if self._dataset is not None and self._version == version:
+            self.hits += 1
+            return self._dataset
+
+        self.misses += 1
+        logger.info(f"Dataset cache miss, loading version {version}")
+        self._dataset = self.loader(version)
+        self._version = version
+        return self._dataset
+
+    def update(self, updater: Callable[[Any], Any]) -> Optional[Any]:
+        """
+        Change the stored files and the cached dataset together.
+
+        updater receives the current dataset, writes the new files and
+        returns the Dataset for them, which is cached as-is instead of being
+        reloaded, or None to keep the cache as it is. Other requests wait
+        until it has finished. Returns what updater returned.
+        """
+        with self._lock:
+            dataset = self._get_locked()
+            if dataset is None:
+                return None
+            updated = updater(dataset)
+            if updated is None:
+                return None
+            self._dataset = updated
+            self._version = updated.version
+            return updated
+
+    def invalidate(self):
+        """Drop the cached dataset so the next get() reloads it"""
+        with self._lock:
+            self._dataset = None
+            self._version = None
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        """Cache hit/miss counters"""
+        return {
+            'version': self._version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations
+        }
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+from contextlib import contextmanager
+from typing import Dict, Optional
+import pandas as pd
+import storage
+
+try:
+    import fcntl
+except ImportError:  # Windows, where the app runs as a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE = 'CURRENT'
+LOCK_FILE = 'LOCK'
+MANIFESTS_DIR = 'manifests'
+STAGED_DIR = 'staged'
+
+# Unreferenced directories younger than this may belong to a version still being written
+GC_GRACE_SECONDS = 600
+
+class DatasetStore:
+    """
+    Versioned datasets on disk, shared by every worker process.
+
+    A version is a manifest naming the storage directories (parts) it is
+    made of and how many rows of each belong to it. CURRENT holds the
+    current version and is replaced with an atomic rename, so every worker
+    switches on its next request and reads the same memory-mapped files.
+    Append-only parts can be shared by consecutive versions because each
+    manifest records its own row counts. Parts written for a version that
+    is published later (for example by a background job) are staged, so
+    garbage collection keeps them until then.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(self.root, MANIFESTS_DIR), exist_ok=True)
+        os.makedirs(os.path.join(self.root, STAGED_DIR), exist_ok=True)
+
+    def _manifest_path(self, version: str) -> str:
+        return os.path.join(self.root, MANIFESTS_DIR, f"{version}.json")
+
+    @contextmanager
+    def lock(self):
+        """Serialize writers across processes"""
+        with open(os.path.join(self.root, LOCK_FILE), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def current_version(self) -> Optional[str]:
+        """The published version, or None before the first upload"""
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def read_manifest(self, version: str) -> Dict:
+        with open(self._manifest_path(version)) as f:
+            return json.load(f)
+
+    def new_directory(self, name: str) -> str:
+        """A fresh directory name for a part; storage writers create it"""
+        return os.path.join(self.root, f"{name}-{uuid.uuid4().hex[:12]}")
+
+    def part(self, directory: str, rows: int) -> Dict:
+        """Manifest entry for the first rows of a storage directory"""
+        return {'directory': os.path.basename(directory), 'rows': rows}
+
+    def part_directory(self, manifest: Dict, name: str) -> str:
+        return os.path.join(self.root, manifest['parts'][name]['directory'])
+
+    def read_part(self, manifest: Dict, name: str) -> pd.DataFrame:
+        """Memory-map one part at the row count recorded in the manifest"""
+        return storage.read_dataset(self.part_directory(manifest, name), rows=manifest['parts'][name]['rows'])
+
+    def stage(self, parts: Dict[str, Dict]) -> str:
+        """Keep parts from garbage collection until unstage() is called with the returned name"""
+        name = uuid.uuid4().hex[:12]
+        with open(os.path.join(self.root, STAGED_DIR, f"{name}.json"), 'w') as f:
+            json.dump({'parts': parts}, f)
+        return name
+
+    def unstage(self, name: str):
+        """Release staged parts, once they are published or abandoned"""
+        try:
+            os.remove(os.path.join(self.root, STAGED_DIR, f"{name}.json"))
+        except FileNotFoundError:
+            pass
+
+    def publish(self, parts: Dict[str, Dict]) -> str:
+        """Write a manifest for parts, make it the current version and return the version"""
+        previous = self.current_version()
+        version = f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+        manifest = {'version': version, 'parts': parts}
+
+        with open(self._manifest_path(version), 'w') as f:
+            json.dump(manifest, f)
+        tmp_current = os.path.join(self.root, CURRENT_FILE + '.tmp')
+        with open(tmp_current, 'w') as f:
+            f.write(version)
+        os.replace(tmp_current, os.path.join(self.root, CURRENT_FILE))
+        logger.info(f"Published dataset version {version}")
+
+        self._collect_garbage([version, previous])
+        return version
+
+    def _collect_garbage(self, keep_versions):
+        """Delete manifests and parts not used by the kept versions"""
+        keep_manifests = {f"{version}.json" for version in keep_versions if version}
+        keep_directories = {MANIFESTS_DIR, STAGED_DIR}
+        for version in keep_versions:
+            if version:
+                try:
+                    manifest = self.read_manifest(version)
+                except FileNotFoundError:
+                    continue
+                keep_directories.update(part['directory'] for part in manifest['parts'].values())
+        staged_dir = os.path.join(self.root, STAGED_DIR)
+        for name in os.listdir(staged_dir):
+            try:
+                with open(os.path.join(staged_dir, name)) as f:
+                    keep_directories.update(part['directory'] for part in json.load(f)['parts'].values())
+            except (OSError, ValueError):
+                continue
+
+        manifests_dir = os.path.join(self.root, MANIFESTS_DIR)
+        for name in os.listdir(manifests_dir):
+            if name not in keep_manifests:
+                os.remove(os.path.join(manifests_dir, name))
+
+        now = time.time()
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name in keep_directories or not os.path.isdir(path):
+                continue
+            if now - os.path.getmtime(path) < GC_GRACE_SECONDS:
+                continue
+            # Workers still on an old version keep their mappings after the files are unlinked
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,64 @@
+import pandas as pd
+import numpy as np
+
+# Required headers for each file type
+NBA_STATS_REQUIRED_HEADERS = ['player_name', 'team_abbreviation', 'opponent_team', 'pts', 'reb', 'ast', 'fg3m', 'date']
+PROPS_REQUIRED_HEADERS = ['Line Score', 'Player Name', 'Team Name', 'Stat Name', 'Start Time', 'Opponent Team', 'Odds Type']
+
+# Compact dtypes for the stats columns read on upload. Box score columns are
+# read as inferred and coerced to float32 by coerce_box_scores, so bad values become NaN
+NBA_STATS_DTYPES = {
+    'player_name': 'category',
+    'team_abbreviation': 'category',
+    'opponent_team': 'category',
+    'date': str
+}
+NBA_STATS_NUMERIC_COLUMNS = ['pts', 'reb', 'ast', 'fg3m']
+
+# Valid stat names as per context.md
+VALID_STAT_NAMES = [
+    'Points',
+    '3-PT Made',
+    'Pts+Rebs+Asts',
+    'Rebounds',
+    'Assists',
+    'Pts+Rebs',
+    'Pts+Asts',
+    'Rebs+Asts'
+]
+
+# Valid odds types
+VALID_ODDS_TYPES = ['standard', 'demon', 'goblin']
+
+def validate_nba_stats_file(df):
+    missing_headers = [header for header in NBA_STATS_REQUIRED_HEADERS if header not in df.columns]
+    if missing_headers:
+        return False, f"Missing required headers in NBA stats file: {', '.join(missing_headers)}"
+    return True, "Valid"
+
+def validate_props_file(df):
+    missing_headers = [header for header in PROPS_REQUIRED_HEADERS if header not in df.columns]
+    if missing_headers:
+        return False, f"Missing required headers in props file: {', '.join(missing_headers)}"
+    
+    # Instead of rejecting the file, filter out invalid stats and warn if any were found
+    invalid_stats = df[~df['Stat Name'].isin(VALID_STAT_NAMES)]['Stat Name'].unique()
+    if len(invalid_stats) > 0:
+        # Filter the dataframe to keep only valid stats
+        df_filtered = df[df['Stat Name'].isin(VALID_STAT_NAMES)].copy()
+        return True, f"Warning: The following stat types will be skipped: {', '.join(invalid_stats)}", df_filtered
+    
+    return True, "Valid", df
+
+def coerce_box_scores(df: pd.DataFrame) -> int:
+    """
+    Convert the box score columns of a parsed stats frame to float32 in place
+    
+    Non-numeric values become NaN. Returns how many there were.
+    """
+    invalid_values = 0
+    for col in NBA_STATS_NUMERIC_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce')
+        invalid_values += int((values.isna() & df[col].notna()).sum())
+        df[col] = values.astype(np.float32)
+    return invalid_values
@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_ID = re.compile(r'^[0-9a-f]{12}$')
+
+class Job:
+    """Handle a running job uses to report its stage and progress"""
+
+    def __init__(self, queue: 'JobQueue', kind: str, stages: List[str]):
+        self._queue = queue
+        self._stage_start = None
+        self.status = {
+            'id': uuid.uuid4().hex[:12],
+            'kind': kind,
+            'status': 'queued',
+            'stages': list(stages),
+            'stage': None,
+            'done': 0,
+            'total': None,
+            'ready': False,
+            'timings': {},
+            'result': None,
+            'error': None,
+            'created': time.time(),
+            'started': None,
+            'finished': None
+        }
+
+    @property
+    def id(self) -> str:
+        return self.status['id']
+
+    def update(self, **fields):
+        """Change status fields and save them"""
+        self.status.update(fields)
+        self._queue._write(self.status)
+
+    def stage(self, name: str, total: Optional[int] = None):
+        """Start the next stage, with total steps when they are counted"""
+        self._finish_stage()
+        self._stage_start = time.perf_counter()
+        self.update(stage=name, done=0, total=total)
+
+    def advance(self, steps: int = 1):
+        """Count steps of the current stage"""
+        self.update(done=self.status['done'] + steps)
+
+    def _finish_stage(self):
+        if self._stage_start is not None and self.status['stage']:
+            self.status['timings'][self.status['stage']] = round(time.perf_counter() - self._stage_start, 3)
+        self._stage_start = None
+
+class JobQueue:
+    """
+    Background jobs on a local thread pool, with their status in JSON files.
+
+    Jobs run in this process, so they can fill its in-memory caches. Status
+    files are replaced atomically in directory, so every worker process
+    can report on a job another one is running. With workers=0 jobs run
+    inline in submit(), and only the most recent keep statuses are kept.
+    """
+
+    def __init__(self, directory: str, workers: int = 1, keep: int = 100):
+        self.directory = directory
+        self.workers = workers
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job') if workers > 0 else None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.failed = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def submit(self, kind: str, fn: Callable[[Job], Any], stages: List[str]) -> Dict:
+        """
+        Run fn(job) in the background and return its status
+
+        fn reports progress through the Job it is given, and what it returns
+        is saved as the job's 'result'. Inline jobs have finished when this
+        returns.
+        """
+        job = Job(self, kind, stages)
+        self._write(job.status)
+        with self._lock:
+            self.queued += 1
+        if self._executor is None:
+            self._run(job, fn)
+        else:
+            self._executor.submit(self._run, job, fn)
+        return dict(job.status)
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        job.update(status='running', started=time.time())
+        try:
+            result = fn(job)
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.status['kind']}) failed: {str(e)}", exc_info=True)
+            job._finish_stage()
+            job.update(status='failed', error=str(e), finished=time.time())
+            with self._lock:
+                self.failed += 1
+        else:
+            job._finish_stage()
+            job.update(status='done', stage=None, result=result, finished=time.time())
+            logger.info(f"Job {job.id} ({job.status['kind']}) finished: {job.status['timings']}")
+        finally:
+            with self._lock:
+                self.running -= 1
+        self._prune()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _write(self, status: Dict):
+        path = self._path(status['id'])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(status, f)
+        os.replace(tmp_path, path)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Status of a job started by any worker process, or None"""
+        if not JOB_ID.match(job_id):
+            return None
+        try:
+            with open(self._path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self):
+        """Delete all but the newest keep statuses"""
+        names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+        if len(names) <= self.keep:
+            return
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(self.directory, name)), reverse=True)
+        for name in names[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict:
+        """Job counters of this process"""
+        return {
+            'workers': self.workers,
+            'queued': self.queued,
+            'running': self.running,
+            'failed': self.failed
+        }
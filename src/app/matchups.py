@@ -0,0 +1,203 @@
+from typing import Dict, List, Optional
+import pandas as pd
+import numpy as np
+
+class MatchupStats:
+    """
+    Per-(player, team, opponent) and per-opponent sums of every stat.
+
+    'player_opponents' holds the games, and for every stat its sum and the
+    number of games it was recorded in, of every player's matchup with an
+    opponent. 'opponents' holds the same sums per opponent, what each team
+    allows, with its number of team games when dates are known. 'blocks'
+    gives the rows [_start, _stop) of each (player, team)'s matchups, one
+    per opponent. Means and ratios to the league are taken on lookup, so
+    the sums can be extended with new games (see extend). All three are
+    plain frames so they can be stored with the game log index.
+    """
+
+    def __init__(self, player_opponents: pd.DataFrame, opponents: pd.DataFrame, blocks: pd.DataFrame):
+        self.player_opponents = player_opponents
+        self.opponents = opponents
+        self.blocks = blocks
+        self.stat_names = [col[len('sum:'):] for col in opponents.columns if col.startswith('sum:')]
+
+        self._player_blocks = {
+            (player, team): (int(start), int(stop))
+            for player, team, start, stop in zip(
+                blocks['player_name'].to_numpy(), blocks['team_abbreviation'].to_numpy(),
+                blocks['_start'].to_numpy(), blocks['_stop'].to_numpy()
+            )
+        }
+        self._block_opponents = player_opponents['opponent_team'].to_numpy()
+        self._opponent_rows = {
+            opponent: row for row, opponent in enumerate(opponents['opponent_team'].to_numpy())
+        }
+        self._player_columns = {col: player_opponents[col].to_numpy() for col in player_opponents.columns}
+        self._opponent_columns = {col: opponents[col].to_numpy() for col in opponents.columns}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._league_means = {
+                stat_name: opponents[f'sum:{stat_name}'].sum() / opponents[f'valid:{stat_name}'].sum()
+                for stat_name in self.stat_names
+            }
+
+    @property
+    def dead_rows(self) -> int:
+        """Rows of player_opponents left unused by extend"""
+        return len(self.player_opponents) - int((self.blocks['_stop'] - self.blocks['_start']).sum())
+
+    @classmethod
+    def build(cls, players: np.ndarray, teams: np.ndarray, lengths: np.ndarray,
+              opponents: np.ndarray, opponent_names: List[str],
+              dates: Optional[np.ndarray], totals: Dict[str, np.ndarray]) -> 'MatchupStats':
+        """
+        Aggregate one row per game of a player, grouped by integer codes
+
+        Args:
+            players, teams (np.ndarray): Name of each (player, team) whose games
+                follow one another, with lengths games each
+            opponents (np.ndarray): Opponent code per game, indexing
+                opponent_names, or -1 when it is missing
+            totals (dict): Stat name -> per-game values aligned with opponents
+        """
+        slice_ids = np.repeat(np.arange(len(players)), lengths)
+        team_codes, _ = pd.factorize(np.asarray(teams, dtype=object))
+        games = pd.DataFrame({'slice': slice_ids, 'opponent': opponents, 'games': 1})
+        for stat_name, values in totals.items():
+            # Summed as float64, whatever precision the game log keeps
+            games[f'sum:{stat_name}'] = np.where(np.isnan(values), 0.0, values).astype(np.float64)
+            games[f'valid:{stat_name}'] = (~np.isnan(values)).astype(np.int64)
+        games = games[opponents >= 0]
+
+        # Opponent totals are sums of the matchup sums
+        sums = games.groupby(['slice', 'opponent'], sort=True).sum()
+        by_opponent = sums.groupby(level='opponent', sort=True).sum()
+        slice_keys = sums.index.get_level_values('slice').to_numpy()
+        names = np.asarray(opponent_names, dtype=object)
+        player_opponents = pd.DataFrame({
+            'player_name': np.asarray(players, dtype=object)[slice_keys],
+            'team_abbreviation': np.asarray(teams, dtype=object)[slice_keys],
+            'opponent_team': names[sums.index.get_level_values('opponent').to_numpy()],
+            **{col: sums[col].to_numpy() for col in sums.columns}
+        })
+        opponent_table = pd.DataFrame({'player_games': by_opponent['games']})
+        if dates is not None:
+            team_games = pd.DataFrame({
+                'opponent': games['opponent'].to_numpy(),
+                'team': team_codes[games['slice'].to_numpy()],
+                'date': np.asarray(dates, dtype='datetime64[ns]')[games.index.to_numpy()]
+            }).drop_duplicates().groupby('opponent', sort=True).size()
+            opponent_table['team_games'] = team_games.reindex(opponent_table.index).to_numpy()
+        for col in by_opponent.columns.drop('games'):
+            opponent_table[col] = by_opponent[col]
+
+        opponent_table.index = pd.Index(names[opponent_table.index.to_numpy()], name='opponent_team')
+        return cls(player_opponents, opponent_table.sort_index().reset_index(), cls._blocks_of(player_opponents))
+
+    @staticmethod
+    def _blocks_of(player_opponents: pd.DataFrame, offset: int = 0) -> pd.DataFrame:
+        """The blocks of consecutive rows of each (player, team), starting at row offset"""
+        players = player_opponents['player_name'].to_numpy()
+        teams = player_opponents['team_abbreviation'].to_numpy()
+        boundaries = np.flatnonzero((players[1:] != players[:-1]) | (teams[1:] != teams[:-1])) + 1
+        starts = np.concatenate(([0], boundaries))[:len(players)]
+        stops = np.concatenate((boundaries, [len(players)]))[:len(players)]
+        return pd.DataFrame({
+            'player_name': players[starts],
+            'team_abbreviation': teams[starts],
+            '_start': (starts + offset).astype(np.int64),
+            '_stop': (stops + offset).astype(np.int64)
+        })
+
+    def extend(self, new: 'MatchupStats', repeated_team_games: Optional[Dict[str, int]] = None) -> 'MatchupStats':
+        """
+        These sums with the games of new, such as one built over appended games, added
+
+        Each (player, team) with new games gets its block rewritten with the
+        new games added at the end of player_opponents, and the old block is
+        left unused, like the game log index does with its rows. Rows before
+        that are unchanged, so a stored copy can be extended with the rest.
+
+        Args:
+            repeated_team_games (dict): Per opponent, team games of new that
+                were already counted here, such as a teammate's earlier row
+                for the same game
+        """
+        sum_columns = [col for col in new.player_opponents.columns
+                       if col == 'games' or col.startswith(('sum:', 'valid:'))]
+        key_columns = ['player_name', 'team_abbreviation', 'opponent_team']
+        old_rows = [
+            np.arange(*self._player_blocks[key]) for key in new._player_blocks if key in self._player_blocks
+        ]
+        old = self.player_opponents.iloc[np.concatenate(old_rows) if old_rows else []]
+        changed = pd.concat([
+            frame[key_columns + sum_columns].astype({col: object for col in key_columns})
+            for frame in (old, new.player_opponents)
+        ])
+        changed = changed.groupby(key_columns, sort=True, as_index=False)[sum_columns].sum()
+        player_opponents = pd.concat([self.player_opponents, changed], ignore_index=True)
+
+        blocks = dict(self._player_blocks)
+        for player, team, start, stop in self._blocks_of(changed, len(self.player_opponents)).itertuples(index=False):
+            blocks[(player, team)] = (start, stop)
+        blocks = pd.DataFrame(
+            [(player, team, start, stop) for (player, team), (start, stop) in blocks.items()],
+            columns=['player_name', 'team_abbreviation', '_start', '_stop']
+        )
+
+        opponents = self.opponents.set_index('opponent_team')
+        added = new.opponents.set_index('opponent_team')
+        if repeated_team_games and 'team_games' in added.columns:
+            added = added.assign(team_games=added['team_games'] - pd.Series(repeated_team_games).reindex(added.index).fillna(0))
+        opponents = opponents.add(added[opponents.columns], fill_value=0)
+        opponents = opponents.astype({col: np.int64 for col in opponents.columns if not col.startswith('sum:')})
+        return MatchupStats(player_opponents, opponents.sort_index().rename_axis('opponent_team').reset_index(), blocks)
+
+    def _stat_values(self, columns: Dict[str, np.ndarray], row: int, games: Optional[str] = None,
+                     scale: Optional[Dict[str, float]] = None) -> Dict[str, Optional[float]]:
+        """Each stat's sum per game it was recorded in, or per games column, over scale"""
+        values = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for stat_name in self.stat_names:
+                count = columns[games if games else f'valid:{stat_name}'][row]
+                value = float(np.float64(columns[f'sum:{stat_name}'][row]) / count)
+                if scale is not None:
+                    value = float(value / scale[stat_name])
+                values[stat_name] = round(value, 2) if np.isfinite(value) else None
+        return values
+
+    def matchup(self, player_name: str, team_name: str, opponent_team: str) -> Optional[Dict]:
+        """Games and stat means of a player against an opponent, or None if they never met"""
+        block = self._player_blocks.get((player_name, team_name))
+        if block is None:
+            return None
+        start, stop = block
+        matches = np.flatnonzero(self._block_opponents[start:stop] == opponent_team)
+        if len(matches) == 0:
+            return None
+        row = start + int(matches[0])
+        return {
+            'games': int(self._player_columns['games'][row]),
+            'mean': self._stat_values(self._player_columns, row)
+        }
+
+    def opponent(self, opponent_team: str) -> Optional[Dict]:
+        """
+        What an opponent allows per player-game ('mean') and per game
+        ('allowed'), and 'vs_league', the per player-game mean over the
+        league's (above 1 is a softer matchup than average)
+        """
+        row = self._opponent_rows.get(opponent_team)
+        if row is None:
+            return None
+        columns = self._opponent_columns
+        result = {
+            'opponent_team': opponent_team,
+            'player_games': int(columns['player_games'][row]),
+            'mean': self._stat_values(columns, row),
+            'vs_league': self._stat_values(columns, row, scale=self._league_means)
+        }
+        if 'team_games' in columns:
+            result['team_games'] = int(columns['team_games'][row])
+            result['allowed'] = self._stat_values(columns, row, games='team_games')
+        return result
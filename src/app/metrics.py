@@ -0,0 +1,152 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Upper bounds in seconds, from a single prop's analysis up to a full upload
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic count per label set"""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """
+    Observation counts per bucket, sum and count for each label set.
+
+    observe() is a bisect and three additions under a lock, so it is cheap
+    enough to call for every request and every prop batch.
+    """
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict]:
+        """Count and sum per label set"""
+        with self._lock:
+            return {labels: {'count': series[2], 'sum': series[1]} for labels, series in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series_items = sorted((labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items())
+        for label_values, (bucket_counts, total, count) in series_items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, le)} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Registry:
+    """The metrics of one process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, description: str, label_names: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, description, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, description: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, description, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self, gauges: Dict[str, Dict] = None) -> str:
+        """
+        All metrics as Prometheus text
+
+        Args:
+            gauges (dict): Prefix -> stats dict (like RenderCache.stats()); every
+                numeric value is exported as a '<prefix>_<key>' gauge
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, stats in (gauges or {}).items():
+            for key, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+registry = Registry()
+
+SPAN_SECONDS = registry.histogram(
+    'span_duration_seconds', 'Time spent in each instrumented stage', ['span']
+)
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Time to build each response', ['method', 'endpoint', 'status']
+)
+PROPS_ANALYZED = registry.counter('props_analyzed_total', 'Props scored by the DataProcessor')
+
+def record(name: str, seconds: float):
+    """Add one observation of the span name"""
+    SPAN_SECONDS.observe(seconds, name)
+
+@contextmanager
+def span(name: str):
+    """Time the block and record it as the span name, also when it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        SPAN_SECONDS.observe(time.perf_counter() - start, name)
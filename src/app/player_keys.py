@@ -0,0 +1,93 @@
+import re
+import unicodedata
+from typing import Optional, Tuple
+import pandas as pd
+import numpy as np
+
+# Generational suffixes dropped from the end of names, so 'Gary Trent Jr.' matches 'Gary Trent'
+NAME_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+
+# Letters that Unicode does not decompose into a base letter and an accent
+TRANSLITERATIONS = str.maketrans({
+    'ł': 'l', 'Ł': 'L', 'ø': 'o', 'Ø': 'O', 'đ': 'd', 'Đ': 'D',
+    'ß': 'ss', 'æ': 'ae', 'Æ': 'AE', 'œ': 'oe', 'Œ': 'OE', 'ı': 'i'
+})
+
+def normalize_name(name) -> Optional[str]:
+    """
+    Key of a player name for matching: accents stripped, case folded,
+    apostrophes and periods dropped, other punctuation read as spaces and
+    a trailing generational suffix removed
+
+    'Kristaps Porziņģis', 'P.J. Tucker' and "De'Aaron Fox" become
+    'kristaps porzingis', 'pj tucker' and 'deaaron fox'. Returns None for
+    missing names.
+    """
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return None
+    text = unicodedata.normalize('NFKD', str(name).translate(TRANSLITERATIONS))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold()
+    words = re.findall(r'[a-z0-9]+', re.sub(r"['’.]", '', text))
+    if len(words) > 2 and words[-1] in NAME_SUFFIXES:
+        words = words[:-1]
+    return ' '.join(words)
+
+def normalize_names(names) -> np.ndarray:
+    """normalize_name of every name, computed once per distinct name"""
+    codes, uniques = pd.factorize(pd.Series(names, dtype=object))
+    keys = np.array([normalize_name(name) for name in uniques] + [None], dtype=object)
+    return keys[codes]
+
+def normalize_team(team) -> Optional[str]:
+    """Key of a team abbreviation: surrounding spaces stripped and upper case"""
+    if team is None or (isinstance(team, float) and np.isnan(team)):
+        return None
+    return str(team).strip().upper()
+
+def normalize_teams(teams) -> np.ndarray:
+    """normalize_team of every team, computed once per distinct team"""
+    codes, uniques = pd.factorize(pd.Series(teams, dtype=object))
+    keys = np.array([normalize_team(team) for team in uniques] + [None], dtype=object)
+    return keys[codes]
+
+class PlayerKeyResolver:
+    """
+    Finds the game log (player, team) that a name from another source means.
+
+    Exact names always win. Otherwise names are compared by normalize_name
+    and teams by normalize_team, through a hash index built once over the
+    log's (player, team) pairs. A normalized key shared by several logged
+    players matches none of them, so a prop is never scored against the
+    wrong player.
+    """
+
+    def __init__(self, players: np.ndarray, teams: np.ndarray):
+        self._exact = pd.DataFrame({'Player Name': players, 'Team Name': teams,
+                                    '_row': np.arange(len(players))}).astype({'Player Name': object, 'Team Name': object})
+        keys = pd.DataFrame({'player_key': normalize_names(players), 'team_key': normalize_teams(teams),
+                             '_row': np.arange(len(players))})
+        self._keys = keys.dropna().drop_duplicates(['player_key', 'team_key'], keep=False)
+        self._lookup = dict(zip(zip(self._keys['player_key'], self._keys['team_key']), self._keys['_row']))
+
+    def lookup(self, player_name: str, team_name: str) -> Optional[int]:
+        """Row of a single name's (player, team) by normalized key, or None"""
+        row = self._lookup.get((normalize_name(player_name), normalize_team(team_name)))
+        return None if row is None else int(row)
+
+    def resolve(self, players, teams) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows of many names' (player, team) at once
+
+        Returns:
+            tuple: (row per name, -1 when it is not logged; whether the
+            name matched exactly)
+        """
+        names = pd.DataFrame({'Player Name': pd.Series(players, dtype=object).to_numpy(),
+                              'Team Name': pd.Series(teams, dtype=object).to_numpy()})
+        exact = names.merge(self._exact, on=['Player Name', 'Team Name'], how='left')['_row'].to_numpy()
+        keys = pd.DataFrame({'player_key': normalize_names(names['Player Name']),
+                             'team_key': normalize_teams(names['Team Name'])})
+        normalized = keys.merge(self._keys, on=['player_key', 'team_key'], how='left')['_row'].to_numpy()
+        is_exact = ~np.isnan(exact)
+        rows = np.where(is_exact, exact, np.where(np.isnan(normalized), -1, normalized))
+        return rows.astype(np.int64), is_exact
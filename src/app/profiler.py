@@ -0,0 +1,115 @@
+import os
+import io
+import re
+import hmac
+import json
+import time
+import uuid
+import pstats
+import cProfile
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Functions listed in the text summary written next to each profile
+SUMMARY_LINES = 60
+
+PROFILE_NAME = re.compile(r'^[0-9]{8}T[0-9]{6}-[A-Za-z0-9_]+-[0-9a-f]{8}$')
+
+class RequestProfiler:
+    """
+    cProfile captures of single requests, written to a directory.
+
+    A request is profiled only when it presents one of the allowed tokens,
+    so nothing is installed when no tokens are configured. Only one request
+    is profiled at a time, since the interpreter allows a single active
+    profiler; others are served normally. Each capture is saved as
+    <name>.prof (pstats, e.g. for snakeviz), <name>.txt (top functions by
+    cumulative time) and <name>.json (request details), and only the most
+    recent keep captures are kept.
+    """
+
+    def __init__(self, directory: str, tokens: Iterable[str], keep: int = 50):
+        self.directory = directory
+        self.tokens = [token for token in tokens if token]
+        self.keep = keep
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def allowed(self, token: Optional[str]) -> bool:
+        """Whether token is on the allowlist"""
+        if not token:
+            return False
+        return any(hmac.compare_digest(token, allowed) for allowed in self.tokens)
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """Start profiling, or return None while another request is being profiled"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiling tool is active in this process
+            self._lock.release()
+            return None
+        return profile
+
+    def new_name(self, endpoint: Optional[str]) -> str:
+        """A unique capture name, known before the capture is saved"""
+        endpoint = re.sub(r'[^A-Za-z0-9_]', '_', endpoint or 'unmatched')
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint}-{uuid.uuid4().hex[:8]}"
+
+    def stop(self, profile: cProfile.Profile, name: str, details: Dict):
+        """Stop profiling and save the capture as name, with details"""
+        try:
+            profile.disable()
+        finally:
+            self._lock.release()
+
+        created = time.time()
+        base = os.path.join(self.directory, name)
+        profile.dump_stats(base + '.prof')
+
+        summary = io.StringIO()
+        stats = pstats.Stats(profile, stream=summary)
+        stats.sort_stats('cumulative').print_stats(SUMMARY_LINES)
+        with open(base + '.txt', 'w') as f:
+            f.write(summary.getvalue())
+        with open(base + '.json', 'w') as f:
+            json.dump(dict(details, name=name, created=created, total_calls=stats.total_calls,
+                           total_seconds=stats.total_tt), f)
+
+        logger.info(f"Saved request profile {name}")
+        self._prune()
+
+    def _prune(self):
+        """Delete all but the newest keep captures"""
+        for entry in self.list()[self.keep:]:
+            for extension in ('.json', '.prof', '.txt'):
+                try:
+                    os.remove(os.path.join(self.directory, entry['name'] + extension))
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> List[Dict]:
+        """Saved captures, newest first"""
+        entries = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(entries, key=lambda entry: entry.get('created', 0), reverse=True)
+
+    def path(self, name: str, extension: str) -> Optional[str]:
+        """Path of a saved capture file, or None for unknown names"""
+        if not PROFILE_NAME.match(name) or extension not in ('prof', 'txt'):
+            return None
+        path = os.path.join(self.directory, f"{name}.{extension}")
+        return path if os.path.exists(path) else None
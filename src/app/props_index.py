@@ -0,0 +1,177 @@
+from typing import Dict, Iterable, List, Optional
+import pandas as pd
+import numpy as np
+
+# Timeframes that have a '<timeframe>_rate' on every analyzed prop
+RATE_KEYS = ['last_5', 'last_10', 'last_20', 'season', 'h2h']
+
+# Facets that can be filtered on and are counted in every response
+FACETS = ['odds_type', 'game', 'stat']
+
+def game_key(team: str, opponent: str) -> str:
+    """Key for a game regardless of home/away, the teams sorted and joined with ' vs '"""
+    return ' vs '.join(sorted([str(team), str(opponent)]))
+
+class PropsIndex:
+    """
+    Indexes over the analyzed props for server-side filtering and paging.
+
+    Built once per dataset version from the prop dicts /get_props returns.
+    Facet filters are position lists per value, player search is a binary
+    search over sorted name tokens and every sort order is precomputed, so a
+    query only touches the props it matches.
+    """
+
+    def __init__(self, props: List[Dict]):
+        self.props = props
+        n_props = len(props)
+
+        # Facet codes and the positions of each value
+        facet_values = {
+            'odds_type': [prop['odds_type'] for prop in props],
+            'game': [game_key(prop['game_info']['away_team'], prop['game_info']['home_team']) for prop in props],
+            'stat': [prop['stat_name'] for prop in props]
+        }
+        self._codes = {}
+        self._values = {}
+        self._positions = {}
+        for facet, values in facet_values.items():
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+            self._codes[facet] = codes
+            self._values[facet] = list(uniques)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self._positions[facet] = {
+                value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+            }
+
+        # First "away @ home" string seen for each game, for display
+        self._game_labels = {}
+        for key, prop in zip(facet_values['game'], props):
+            self._game_labels.setdefault(key, f"{prop['game_info']['away_team']} @ {prop['game_info']['home_team']}")
+
+        # Sorted lowercase name tokens (full name, each word, team) for prefix search
+        tokens = []
+        token_positions = []
+        for position, prop in enumerate(props):
+            name = str(prop['player_name']).lower()
+            for token in {name, str(prop['team_name']).lower(), *name.split()}:
+                tokens.append(token)
+                token_positions.append(position)
+        token_order = np.argsort(np.array(tokens, dtype=str), kind='stable')
+        self._tokens = np.array(tokens, dtype=str)[token_order]
+        self._token_positions = np.array(token_positions, dtype=np.int64)[token_order]
+
+        self._rates = {
+            key: np.array([prop.get(f'{key}_rate', np.nan) for prop in props], dtype=float)
+            for key in RATE_KEYS
+        }
+
+        # Precomputed sort orders; rates sort highest first with missing rates last
+        self._sort_orders = {'default': np.arange(n_props)}
+        for key in RATE_KEYS:
+            self._sort_orders[f'{key}_rate'] = np.argsort(-self._rates[key], kind='stable')
+        self._sort_orders['line_score'] = np.argsort(
+            np.array([prop['line_score'] for prop in props], dtype=float), kind='stable'
+        )
+        self._sort_orders['player_name'] = np.argsort(
+            np.array([str(prop['player_name']) for prop in props], dtype=str), kind='stable'
+        )
+        self._sort_orders['start_time'] = np.argsort(
+            pd.to_datetime(pd.Series([prop['game_info']['start_time'] for prop in props], dtype=object),
+                           utc=True, errors='coerce').to_numpy(dtype='datetime64[ns]'),
+            kind='stable'
+        )
+
+    @property
+    def sort_keys(self) -> List[str]:
+        return list(self._sort_orders)
+
+    def _facet_mask(self, facet: str, values: Iterable[str]) -> np.ndarray:
+        mask = np.zeros(len(self.props), dtype=bool)
+        for value in values:
+            positions = self._positions[facet].get(value)
+            if positions is not None:
+                mask[positions] = True
+        return mask
+
+    def _search_mask(self, term: str) -> np.ndarray:
+        term = term.lower()
+        start = np.searchsorted(self._tokens, term, side='left')
+        stop = np.searchsorted(self._tokens, term + '\U0010ffff', side='left')
+        mask = np.zeros(len(self.props), dtype=bool)
+        mask[self._token_positions[start:stop]] = True
+        return mask
+
+    def query(self, filters: Optional[Dict[str, List[str]]] = None, search: Optional[str] = None,
+              min_rate: Optional[float] = None, rate_key: str = 'season', sort: str = 'default',
+              cursor: Optional[str] = None, limit: int = 50) -> Dict:
+        """
+        Return one page of props matching every filter
+
+        Args:
+            filters (dict): Facet name -> accepted values; a missing facet is not filtered
+            search (str): Prefix of the player's name, any word of it, or the team
+            min_rate (float): Minimum '<rate_key>_rate' a prop must have
+            rate_key (str): One of RATE_KEYS, used by min_rate
+            sort (str): One of sort_keys
+            cursor (str): next_cursor of the previous page
+            limit (int): Page size
+
+        Returns:
+            dict with 'props', 'next_cursor', 'total' and 'facets'. Facet
+            counts apply every filter except the facet's own, so the filter
+            lists keep showing the options that are unchecked.
+        """
+        if sort not in self._sort_orders:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        if rate_key not in self._rates:
+            raise ValueError(f"Unsupported rate key: {rate_key}")
+
+        n_props = len(self.props)
+        filters = filters or {}
+        facet_masks = {
+            facet: self._facet_mask(facet, values)
+            for facet, values in filters.items() if facet in FACETS
+        }
+
+        base_mask = np.ones(n_props, dtype=bool)
+        if search:
+            base_mask &= self._search_mask(search)
+        if min_rate is not None:
+            with np.errstate(invalid='ignore'):
+                base_mask &= self._rates[rate_key] >= min_rate
+
+        mask = base_mask.copy()
+        for facet_mask in facet_masks.values():
+            mask &= facet_mask
+
+        # Walk the precomputed order and keep only the matching props
+        order = self._sort_orders[sort]
+        matches = order[mask[order]]
+        start = int(cursor) if cursor else 0
+        page = matches[start:start + limit]
+        next_cursor = str(start + limit) if start + limit < len(matches) else None
+
+        facets = {}
+        for facet in FACETS:
+            facet_mask = base_mask.copy()
+            for other, other_mask in facet_masks.items():
+                if other != facet:
+                    facet_mask &= other_mask
+            counts = np.bincount(self._codes[facet][facet_mask], minlength=len(self._values[facet]))
+            facets[facet] = [
+                {
+                    'value': value,
+                    'label': self._game_labels[value] if facet == 'game' else value,
+                    'count': int(count)
+                }
+                for value, count in zip(self._values[facet], counts)
+            ]
+
+        return {
+            'props': [self.props[position] for position in page],
+            'next_cursor': next_cursor,
+            'total': int(len(matches)),
+            'facets': facets
+        }
@@ -0,0 +1,108 @@
+import os
+import shutil
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class RenderCache:
+    """
+    Least-recently-used cache for rendered /visualize responses.
+
+    Entries are serialized response bodies, and the in-memory tier is
+    bounded by the total number of bytes held. When a disk directory is
+    given, evicted entries are spilled there and promoted back on a hit.
+    """
+
+    def __init__(self, max_bytes: int, disk_directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.disk_directory = disk_directory
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_directory:
+            os.makedirs(self.disk_directory, exist_ok=True)
+
+    def _disk_path(self, key: Hashable) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.disk_directory, f"{digest}.bin")
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return the cached body for key, or None on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.disk_directory:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    body = f.read()
+            except FileNotFoundError:
+                body = None
+            if body is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self.put(key, body)
+                return body
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: Hashable, body: bytes):
+        """Store body under key, evicting least recently used entries over the byte budget"""
+        if len(body) > self.max_bytes:
+            return
+
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= len(self._entries.pop(key))
+            self._entries[key] = body
+            self.current_bytes += len(body)
+
+            while self.current_bytes > self.max_bytes:
+                old_key, old_body = self._entries.popitem(last=False)
+                self.current_bytes -= len(old_body)
+                self.evictions += 1
+                evicted.append((old_key, old_body))
+
+        if self.disk_directory:
+            for old_key, old_body in evicted:
+                try:
+                    with open(self._disk_path(old_key), 'wb') as f:
+                        f.write(old_body)
+                except OSError as e:
+                    logger.warning(f"Could not spill render cache entry to disk: {str(e)}")
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+        if self.disk_directory:
+            shutil.rmtree(self.disk_directory, ignore_errors=True)
+            os.makedirs(self.disk_directory, exist_ok=True)
+
+    def stats(self) -> Dict:
+        """Cache counters and current size"""
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
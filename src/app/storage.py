@@ -0,0 +1,277 @@
+import os
+import json
+import shutil
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import numpy as np
+
+META_FILE = 'meta.json'
+
+# Rows re-coded at a time when DatasetWriter sorts its categories
+REMAP_BLOCK_ROWS = 1 << 20
+
+def _column_file(position: int) -> str:
+    return f"col_{position}.bin"
+
+def parse_dates(series: pd.Series) -> pd.Series:
+    """
+    Parse a date column, reading unparseable values as NaT
+
+    Dates stay naive unless they carry UTC offsets, and mixed offsets are
+    converted to UTC.
+    """
+    try:
+        parsed = pd.to_datetime(series, errors='coerce')
+        if pd.api.types.is_datetime64_any_dtype(parsed):
+            return parsed
+    except (ValueError, TypeError):
+        pass
+    # Mixed UTC offsets
+    return pd.to_datetime(series, errors='coerce', utc=True)
+
+def _encode_column(series: pd.Series, date_column: bool) -> Tuple:
+    """Convert a column to (kind, values, extra metadata) for storage"""
+    if date_column and not pd.api.types.is_datetime64_any_dtype(series):
+        series = parse_dates(series)
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+            return 'datetime', series.to_numpy(dtype='datetime64[ns]'), {'tz': 'UTC'}
+        return 'datetime', series.to_numpy(dtype='datetime64[ns]'), {}
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categorical = series.cat.rename_categories([str(c) for c in series.cat.categories])
+        return 'category', categorical.cat.codes.to_numpy(), {'categories': list(categorical.cat.categories)}
+
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return 'numeric', series.to_numpy(), {}
+
+    # Strings and mixed objects are stored as categorical codes
+    values = series.where(series.isna(), series.astype(str))
+    categorical = pd.Categorical(values)
+    return 'category', categorical.codes, {'categories': list(categorical.categories)}
+
+def _encode_like(column: Dict, lookup: Optional[Dict[str, int]], series: pd.Series, date_column: bool) -> np.ndarray:
+    """
+    Encode a chunk of a column to match the column's existing metadata.
+
+    String values are coded through lookup, which maps each category to
+    its code and grows as new values appear.
+    """
+    kind, values, extra = _encode_column(series, date_column)
+    if kind != column['kind'] or extra.get('tz') != column.get('tz'):
+        raise ValueError(f"Column {column['name']} does not match the stored type")
+
+    if kind == 'category':
+        mapping = np.array([lookup.setdefault(c, len(lookup)) for c in extra['categories']] + [-1],
+                           dtype=np.int64)
+        values = mapping[values]
+    return values
+
+def _swap_in(tmp_directory: str, directory: str):
+    """Replace directory with the fully written tmp_directory"""
+    old_directory = directory + '.old'
+    shutil.rmtree(old_directory, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old_directory)
+    os.rename(tmp_directory, directory)
+    shutil.rmtree(old_directory, ignore_errors=True)
+
+def write_dataset(df: pd.DataFrame, directory: str, date_columns: Optional[List[str]] = None) -> int:
+    """
+    Persist a DataFrame as one binary file per column plus a meta.json.
+
+    Numeric columns keep their dtype, date columns are stored as
+    datetime64[ns] and strings as categorical codes, so read_dataset can
+    memory-map every column without parsing anything.
+    The directory is written next to the target and swapped in at the end.
+    Returns the number of rows written.
+    """
+    date_columns = set(date_columns or [])
+    tmp_directory = directory + '.tmp'
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+
+    columns = []
+    for position, name in enumerate(df.columns):
+        kind, values, extra = _encode_column(df[name], name in date_columns)
+        values = np.ascontiguousarray(values)
+        values.tofile(os.path.join(tmp_directory, _column_file(position)))
+        columns.append({
+            'name': name,
+            'file': _column_file(position),
+            'kind': kind,
+            'dtype': values.dtype.str,
+            **extra
+        })
+
+    with open(os.path.join(tmp_directory, META_FILE), 'w') as f:
+        json.dump({'rows': len(df), 'columns': columns}, f)
+
+    _swap_in(tmp_directory, directory)
+    return len(df)
+
+class DatasetWriter:
+    """
+    Write a dataset chunk by chunk in the same format as write_dataset.
+
+    Every chunk must have the same columns. Each column's kind and dtype are
+    fixed by the first chunk and later chunks are cast to match. String
+    codes are assigned from a dictionary that grows as new values appear,
+    and close() sorts the categories the way write_dataset would.
+    Nothing replaces the target directory until close() succeeds.
+    """
+
+    def __init__(self, directory: str, date_columns: Optional[List[str]] = None):
+        self.directory = directory
+        self.date_columns = set(date_columns or [])
+        self.tmp_directory = directory + '.tmp'
+        shutil.rmtree(self.tmp_directory, ignore_errors=True)
+        os.makedirs(self.tmp_directory)
+        self.rows = 0
+        self._columns = None
+        self._categories = {}
+
+    def append(self, df: pd.DataFrame):
+        """Encode one chunk and append it to the column files"""
+        if self._columns is None:
+            self._columns = []
+            for position, name in enumerate(df.columns):
+                kind, values, extra = _encode_column(df[name], name in self.date_columns)
+                dtype = np.dtype(np.int32) if kind == 'category' else values.dtype
+                self._columns.append({'name': name, 'file': _column_file(position), 'kind': kind,
+                                      'dtype': dtype.str, **extra})
+                if kind == 'category':
+                    self._columns[-1]['categories'] = []
+                    self._categories[name] = {}
+        elif list(df.columns) != [column['name'] for column in self._columns]:
+            raise ValueError("Chunk columns do not match the first chunk")
+
+        for column in self._columns:
+            name = column['name']
+            values = _encode_like(column, self._categories.get(name), df[name], name in self.date_columns)
+            values = np.ascontiguousarray(values, dtype=np.dtype(column['dtype']))
+            with open(os.path.join(self.tmp_directory, column['file']), 'ab') as f:
+                values.tofile(f)
+
+        self.rows += len(df)
+
+    def close(self):
+        """Sort the string categories, write meta.json and swap the dataset in"""
+        if self._columns is None:
+            raise ValueError("No data was written")
+
+        for column in self._columns:
+            if column['kind'] != 'category':
+                continue
+            categories = list(self._categories[column['name']])
+            order = sorted(range(len(categories)), key=categories.__getitem__)
+            remap = np.empty(len(categories) + 1, dtype=np.int32)
+            remap[order] = np.arange(len(categories), dtype=np.int32)
+            remap[-1] = -1
+            column['categories'] = [categories[i] for i in order]
+            if self.rows:
+                codes = np.memmap(os.path.join(self.tmp_directory, column['file']),
+                                  dtype=np.int32, mode='r+', shape=(self.rows,))
+                for start in range(0, self.rows, REMAP_BLOCK_ROWS):
+                    block = codes[start:start + REMAP_BLOCK_ROWS]
+                    block[:] = remap[block]
+                codes.flush()
+                del codes
+
+        with open(os.path.join(self.tmp_directory, META_FILE), 'w') as f:
+            json.dump({'rows': self.rows, 'columns': self._columns}, f)
+
+        _swap_in(self.tmp_directory, self.directory)
+
+    def abort(self):
+        """Discard everything written so far"""
+        shutil.rmtree(self.tmp_directory, ignore_errors=True)
+
+def append_dataset(df: pd.DataFrame, directory: str, date_columns: Optional[List[str]] = None,
+                   rows: Optional[int] = None) -> int:
+    """
+    Append rows to a dataset written by write_dataset or DatasetWriter.
+
+    Column files are extended in place and meta.json is replaced last, so
+    readers see either the old rows or all of the new ones. Frames already
+    memory-mapped keep reading the rows they were opened with. New string
+    values are added to the end of each column's categories.
+
+    Args:
+        rows: Append after this many rows instead of all stored rows,
+            dropping any rows past it
+    Returns:
+        The number of rows after the append
+    """
+    date_columns = set(date_columns or [])
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+
+    names = [column['name'] for column in meta['columns']]
+    if sorted(df.columns) != sorted(names):
+        raise ValueError(f"Appended columns do not match the stored columns: {', '.join(names)}")
+
+    rows = meta['rows'] if rows is None else min(rows, meta['rows'])
+    for column in meta['columns']:
+        path = os.path.join(directory, column['file'])
+        dtype = np.dtype(column['dtype'])
+        lookup = None
+        if column['kind'] == 'category':
+            lookup = {category: code for code, category in enumerate(column['categories'])}
+        values = _encode_like(column, lookup, df[column['name']], column['name'] in date_columns)
+
+        if lookup is not None:
+            column['categories'] = list(lookup)
+            if len(lookup) > np.iinfo(dtype).max:
+                # Too many categories for the stored codes, widen the whole column
+                dtype = np.dtype(np.int32)
+                existing = np.fromfile(path, dtype=np.dtype(column['dtype']), count=rows)
+                existing.astype(dtype).tofile(path + '.tmp')
+                os.replace(path + '.tmp', path)
+                column['dtype'] = dtype.str
+
+        with open(path, 'r+b') as f:
+            # Drop anything past the rows being appended to
+            f.truncate(rows * dtype.itemsize)
+            f.seek(0, os.SEEK_END)
+            np.ascontiguousarray(values, dtype=dtype).tofile(f)
+
+    meta['rows'] = rows + len(df)
+    tmp_meta = os.path.join(directory, META_FILE + '.tmp')
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, os.path.join(directory, META_FILE))
+    return meta['rows']
+
+def read_dataset(directory: str, rows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Load a dataset written by write_dataset with every column memory-mapped read-only.
+
+    rows limits the frame to the first rows rows, for readers of an older
+    version of a dataset that has since been appended to.
+    """
+    with open(os.path.join(directory, META_FILE)) as f:
+        meta = json.load(f)
+
+    rows = meta['rows'] if rows is None else min(rows, meta['rows'])
+    data = {}
+    for column in meta['columns']:
+        dtype = np.dtype(column['dtype'])
+        if rows == 0:
+            values = np.empty(0, dtype=dtype)
+        else:
+            values = np.memmap(os.path.join(directory, column['file']), dtype=dtype, mode='r', shape=(rows,))
+
+        if column['kind'] == 'category':
+            data[column['name']] = pd.Categorical.from_codes(values, categories=column['categories'])
+        elif column['kind'] == 'datetime':
+            series = pd.Series(values.view('datetime64[ns]'), copy=False)
+            if column.get('tz'):
+                series = series.dt.tz_localize(column['tz'])
+            data[column['name']] = series
+        else:
+            data[column['name']] = pd.Series(values, copy=False)
+
+    return pd.DataFrame(data, columns=[column['name'] for column in meta['columns']], copy=False)
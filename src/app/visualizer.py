@@ -1,27 +1,206 @@
 import matplotlib
-matplotlib.use('Agg')  # Set the backend to Agg before importing pyplot
-import matplotlib.pyplot as plt
+matplotlib.use('Agg')  # Set the backend to Agg before creating any figure
+from matplotlib import style
+from matplotlib.figure import Figure
 import io
+import time
 import base64
-from typing import Dict, List, Tuple
+import logging
+from concurrent.futures import Executor, as_completed
+from typing import Dict, Iterator, List, Optional, Tuple
 import pandas as pd
-import numpy as np
+import metrics
+from window_stats import parse_timeframe
+
+logger = logging.getLogger(__name__)
+
+# Set style for better-looking graphs once per process. Figures are created
+# explicitly below, so rendering never touches pyplot's global current figure.
+style.use('dark_background')
+
+# Image formats the server can render, with their MIME types
+IMAGE_FORMATS = {
+    'png': 'image/png',
+    'webp': 'image/webp',
+    'svg': 'image/svg+xml'
+}
+
+def render_stacked_bar_graph(chart: Dict) -> str:
+    """
+    Draw a stacked bar chart and return it as a base64 encoded image.
+    
+    Takes plain lists only so it can run in a worker process:
+        components (dict): component label -> values, oldest game first
+        totals (list): total value per game
+        line_score (float): the prop line
+        game_labels (list): x-axis label per game, or None to hide them
+        format (str): one of IMAGE_FORMATS, defaults to 'png'
+        dpi (int): output resolution, defaults to 300
+    
+    Draw, savefig and encode times are recorded as spans in the process
+    that renders, so with a render pool they stay in the pool workers.
+    """
+    start = time.perf_counter()
+    totals = pd.Series(chart['totals'], dtype=float)
+    line_score = chart['line_score']
+    n_games = len(totals)
+    hits = totals > line_score
+    
+    fig = Figure(figsize=(10, 6))
+    
+    # Set up the plot
+    ax = fig.gca()
+    ax.set_facecolor('#1c1c1e')  # Dark background
+    fig.set_facecolor('#1c1c1e')
+    
+    # Create stacked bars
+    bottom = pd.Series(0, index=range(n_games))
+    bars = []
+    
+    # Color scheme - expanded for more components with more distinct greens
+    hit_colors = ['#32d74b', '#00ba34', '#00a025', '#008519']  # More distinct shades of green
+    miss_colors = ['#ff453a', '#ff6b63', '#ff918c', '#ffb7b5']  # Different shades of red
+    
+    # Determine if we should show value labels (hide if more than 25 games)
+    show_value_labels = n_games <= 25
+    
+    for i, (label, values) in enumerate(chart['components'].items()):
+        values = pd.Series(values, dtype=float)
+        if values.isna().all():
+            continue
+        
+        # Use modulo to cycle through colors if we have more components than colors
+        color_idx = i % len(hit_colors)
+        colors = [hit_colors[color_idx] if hit else miss_colors[color_idx] for hit in hits]
+        
+        bar = ax.bar(range(len(values)), values.fillna(0), bottom=bottom, 
+                     color=colors, alpha=0.9, width=0.7)
+        bottom += values.fillna(0)
+        bars.append(bar)
+        
+        # Add value labels inside bars only if show_value_labels is True
+        if show_value_labels:
+            for j, v in enumerate(values):
+                if pd.notna(v) and v > 0:  # Only show non-zero, non-NA values
+                    ax.text(j, bottom[j] - v/2, f"{int(v)}\n{label}", 
+                            ha='center', va='center', color='white', 
+                            fontsize=8, fontweight='bold')
+    
+    if not bars:
+        raise ValueError("No valid data to plot")
+    
+    # Add total sum labels at the top of each bar
+    for i, total in enumerate(totals):
+        if pd.notna(total) and total > 0:
+            is_hit = total > line_score
+            color = '#32d74b' if is_hit else '#ff453a'  # Green for hits, red for misses
+            # Position the label slightly above the bar
+            label_y = total * 1.02
+            ax.text(i, label_y, f"{int(total)}", 
+                    ha='center', va='bottom', color=color,
+                    fontsize=10, fontweight='bold')
+    
+    # Add prop line
+    ax.axhline(y=line_score, color='#0a84ff', linestyle='--', linewidth=1)
+    
+    # Add prop line label
+    ax.text(n_games - 1, line_score, f"O {line_score}", 
+            color='#0a84ff', ha='right', va='bottom')
+    
+    # Customize axes
+    ax.grid(True, axis='y', alpha=0.1)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_color('#86868b')
+    ax.spines['bottom'].set_color('#86868b')
+    
+    # Add game info to x-axis only if not too many games
+    ax.set_xticks(range(n_games))
+    if show_value_labels and chart.get('game_labels'):
+        ax.set_xticklabels(chart['game_labels'], rotation=0, ha='center',
+                           color='#86868b', fontsize=8)
+    else:
+        # If too many games, just show minimal ticks
+        ax.set_xticklabels([''] * n_games)
+    
+    # Set y-axis properties
+    ax.set_ylabel('Total', color='#86868b', fontsize=10)
+    ax.tick_params(axis='y', colors='#86868b')
+    
+    # Add average line
+    avg_total = totals.mean()
+    ax.axhline(y=avg_total, color='white', linestyle=':', linewidth=1, alpha=0.3)
+    
+    # Calculate plot dimensions and adjust for total sum labels
+    y_min, y_max = ax.get_ylim()
+    ax.set_ylim(y_min, y_max * 1.1)  # Add 10% padding at the top for sum labels
+    x_min, x_max = ax.get_xlim()
+    
+    # Add hit rate info in top left
+    hits_count = int(hits.sum())
+    hit_rate = (hits_count / n_games) * 100 if n_games > 0 else 0
+    ax.text(x_min, y_max, f'L{n_games} {int(hit_rate)}% • {hits_count}/{n_games} games',
+            color='white', ha='left', va='top', alpha=0.7)
+    
+    # Add average total in top right
+    ax.text(x_max, y_max, f'AVG Total: {int(avg_total)}',
+            color='white', ha='right', va='top', alpha=0.7)
+    
+    # Adjust layout
+    fig.tight_layout()
+    metrics.record('chart_draw', time.perf_counter() - start)
+    
+    # Convert plot to base64 string
+    buf = io.BytesIO()
+    with metrics.span('chart_savefig'):
+        fig.savefig(buf, format=chart.get('format', 'png'), dpi=chart.get('dpi', 300), bbox_inches='tight')
+    with metrics.span('chart_encode'):
+        return base64.b64encode(buf.getvalue()).decode()
+
+def warm_up(image_format: str = 'png') -> float:
+    """
+    Draw and save a throwaway chart, so this process has loaded its fonts
+    and image writer before the first real one. Returns the seconds taken.
+    
+    Also used as the render pool's initializer, which warms every pool process.
+    """
+    start = time.perf_counter()
+    render_stacked_bar_graph({
+        'components': {'PTS': [18.0, 27.0, 22.0]},
+        'totals': [18.0, 27.0, 22.0],
+        'line_score': 21.5,
+        'game_labels': ['@BOS\n01/01', '@NYK\n01/03', '@MIA\n01/05'],
+        'format': image_format,
+        'dpi': 72
+    })
+    return time.perf_counter() - start
 
 class DataVisualizer:
-    def __init__(self, nba_stats_df: pd.DataFrame, props_df: pd.DataFrame):
+    def __init__(self, nba_stats_df: pd.DataFrame, props_df: pd.DataFrame,
+                 render_pool: Optional[Executor] = None, processor=None,
+                 as_of: Optional[pd.Timestamp] = None):
         self.nba_stats_df = nba_stats_df
         self.props_df = props_df
         
-        # Set style for better-looking graphs
-        plt.style.use('dark_background')
+        # Optional process pool that renders charts off the request thread
+        self.render_pool = render_pool
+        
+        # Optional DataProcessor over the same frames, whose game log index and
+        # prop opponents replace the table scans below
+        self.processor = processor
         
-    def _create_stacked_bar_graph(self, player_stats: pd.DataFrame, prop_info: Dict, 
-                                stat_components: Dict[str, pd.Series]) -> str:
-        """Create a stacked bar graph for a player's performance against a prop line"""
+        # Day whose windows are charted; day windows end on the latest game without it
+        self.as_of = as_of
+        
+    def _build_chart_data(self, player_stats: pd.DataFrame, prop_info: Dict,
+                          stat_components: Dict[str, pd.Series]) -> Dict:
+        """Per-game chart series for a player's performance against a prop line, oldest game first"""
         try:
-            # Debug info
-            print(f"Player stats shape: {player_stats.shape}")
-            print(f"Stat components: {list(stat_components.keys())}")
+            # Debug info; the value lists are only formatted when they are logged
+            debug = logger.isEnabledFor(logging.DEBUG)
+            if debug:
+                logger.debug(f"Player stats shape: {player_stats.shape}")
+                logger.debug(f"Stat components: {list(stat_components.keys())}")
             
             # Reset index and reverse order (most recent on right)
             player_stats = player_stats.iloc[::-1].reset_index(drop=True)
@@ -37,10 +216,11 @@ class DataVisualizer:
             total_values = pd.Series(0, index=range(len(player_stats)))
             reversed_components = {}
             for label, values in stat_components.items():
-                print(f"Processing {label}: {values.tolist()}")
+                if debug:
+                    logger.debug(f"Processing {label}: {values.tolist()}")
                 values = pd.to_numeric(values, errors='coerce')
-                if values.isna().any():
-                    print(f"Warning: NaN values found in {label}")
+                if debug and values.isna().any():
+                    logger.debug(f"NaN values found in {label}")
                 # Reverse the values to match the reversed player_stats
                 reversed_values = values.iloc[::-1].reset_index(drop=True)
                 reversed_components[label] = reversed_values
@@ -49,296 +229,355 @@ class DataVisualizer:
             if total_values.empty:
                 raise ValueError("No valid stat values found")
             
-            print(f"Total values: {total_values.tolist()}")
-            print(f"Line score: {prop_info['line_score']}")
-            
-            hits = total_values > prop_info['line_score']
-            print(f"Hits: {hits.tolist()}")
-            
-            plt.figure(figsize=(10, 6))
-            
-            # Set up the plot
-            ax = plt.gca()
-            ax.set_facecolor('#1c1c1e')  # Dark background
-            plt.gcf().set_facecolor('#1c1c1e')
-            
-            # Create stacked bars
-            bottom = pd.Series(0, index=range(len(player_stats)))
-            bars = []
-            labels = []
-            
-            # Color scheme - expanded for more components with more distinct greens
-            hit_colors = ['#32d74b', '#00ba34', '#00a025', '#008519']  # More distinct shades of green
-            miss_colors = ['#ff453a', '#ff6b63', '#ff918c', '#ffb7b5']  # Different shades of red
-            
-            # Determine if we should show value labels (hide if more than 25 games)
-            show_value_labels = len(player_stats) <= 25
-            
-            for i, (label, values) in enumerate(reversed_components.items()):
-                if values.isna().all():
-                    print(f"Skipping {label} - all values are NaN")
-                    continue
-                
-                # Use modulo to cycle through colors if we have more components than colors
-                color_idx = i % len(hit_colors)
-                colors = [hit_colors[color_idx] if hit else miss_colors[color_idx] for hit in hits]
-                
-                bar = plt.bar(range(len(values)), values.fillna(0), bottom=bottom, 
-                             color=colors, alpha=0.9, width=0.7)
-                bottom += values.fillna(0)
-                bars.append(bar)
-                labels.append(f"{label}")
-                
-                # Add value labels inside bars only if show_value_labels is True
-                if show_value_labels:
-                    for j, v in enumerate(values):
-                        if pd.notna(v) and v > 0:  # Only show non-zero, non-NA values
-                            plt.text(j, bottom[j] - v/2, f"{int(v)}\n{label}", 
-                                    ha='center', va='center', color='white', 
-                                    fontsize=8, fontweight='bold')
-            
-            if not bars:
-                raise ValueError("No valid data to plot")
-
-            # Add total sum labels at the top of each bar
-            for i, total in enumerate(total_values):
-                if pd.notna(total) and total > 0:
-                    is_hit = total > prop_info['line_score']
-                    color = '#32d74b' if is_hit else '#ff453a'  # Green for hits, red for misses
-                    # Position the label slightly above the bar
-                    label_y = total * 1.02
-                    plt.text(i, label_y, f"{int(total)}", 
-                            ha='center', va='bottom', color=color,
-                            fontsize=10, fontweight='bold')
-            
-            # Add prop line
-            line_score = prop_info['line_score']
-            plt.axhline(y=line_score, color='#0a84ff', linestyle='--', linewidth=1)
+            if debug:
+                logger.debug(f"Total values: {total_values.tolist()}")
+                logger.debug(f"Line score: {prop_info['line_score']}")
+                logger.debug(f"Hits: {(total_values > prop_info['line_score']).tolist()}")
             
-            # Add prop line label
-            plt.text(len(player_stats) - 1, line_score, f"O {line_score}", 
-                    color='#0a84ff', ha='right', va='bottom')
-            
-            # Customize axes
-            plt.grid(True, axis='y', alpha=0.1)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.spines['left'].set_color('#86868b')
-            ax.spines['bottom'].set_color('#86868b')
-            
-            # Add game info to x-axis only if not too many games
-            if show_value_labels and 'opponent_team' in player_stats.columns and 'date' in player_stats.columns:
+            # Format game info for the x-axis
+            dates = opponents = game_labels = None
+            if 'opponent_team' in player_stats.columns and 'date' in player_stats.columns:
                 try:
-                    dates = pd.to_datetime(player_stats['date']).dt.strftime('%m/%d')
-                    team = player_stats['team_abbreviation']
-                    opponents = player_stats['opponent_team']
-                    
-                    # Debug logging
-                    print("Game info debug:")
-                    print(f"Team abbreviation: {team.tolist()}")
-                    print(f"Opponent teams: {opponents.tolist()}")
-                    print(f"Dates: {dates.tolist()}")
-                    
-                    game_labels = []
-                    for opp in opponents:
-                        if pd.isna(opp):
-                            game_labels.append("@???")
-                        else:
-                            game_labels.append(f"@{opp}")  # Format as "@OPPONENT"
-                    
-                    plt.xticks(range(len(player_stats)), 
-                              [f"{game}\n{date}" for game, date in zip(game_labels, dates)],
-                              rotation=0, ha='center', color='#86868b', fontsize=8)
+                    game_dates = pd.to_datetime(player_stats['date'])
+                    dates = [None if pd.isna(d) else d.strftime('%Y-%m-%d') for d in game_dates]
+                    opponents = [None if pd.isna(opp) else str(opp) for opp in player_stats['opponent_team']]
+                    game_labels = [
+                        f"{'@???' if opp is None else f'@{opp}'}\n{date}"  # Format as "@OPPONENT"
+                        for opp, date in zip(opponents, game_dates.dt.strftime('%m/%d'))
+                    ]
                 except Exception as e:
-                    print(f"Warning: Could not format game info: {str(e)}")
-                    traceback.print_exc()  # Add full traceback for debugging
-            else:
-                # If too many games, just show minimal ticks
-                plt.xticks(range(len(player_stats)), 
-                          [''] * len(player_stats))
+                    logger.warning(f"Could not format game info: {str(e)}")
             
-            # Set y-axis properties
-            plt.ylabel('Total', color='#86868b', fontsize=10)
-            ax.tick_params(axis='y', colors='#86868b')
-            
-            # Add average line
-            avg_total = total_values.mean()
-            plt.axhline(y=avg_total, color='white', linestyle=':', linewidth=1, alpha=0.3)
+            average = total_values.mean()
+            return {
+                'components': {label: values.tolist() for label, values in reversed_components.items()},
+                'totals': total_values.tolist(),
+                'hits': (total_values > prop_info['line_score']).tolist(),
+                'dates': dates,
+                'opponents': opponents,
+                'line_score': prop_info['line_score'],
+                'average': None if pd.isna(average) else float(average),
+                'game_labels': game_labels
+            }
             
-            # Calculate plot dimensions and adjust for total sum labels
-            y_min, y_max = plt.ylim()
-            plt.ylim(y_min, y_max * 1.1)  # Add 10% padding at the top for sum labels
-            x_min, x_max = plt.xlim()
+        except Exception as e:
+            logger.error(f"Error in _build_chart_data: {str(e)}", exc_info=True)
+            raise ValueError(f"Failed to create visualization: {str(e)}")
+    
+    def _render_chart(self, chart: Dict) -> str:
+        """
+        Render a chart from _build_chart_data on the render pool, or inline without one
+        
+        This is synchronous either way: a single chart waits for its pool
+        process. The pool moves the drawing off the request thread's GIL, so
+        other threads keep serving while it renders, and only
+        create_prop_visualizations renders several charts at once.
+        """
+        try:
+            if self.render_pool is not None:
+                return self.render_pool.submit(render_stacked_bar_graph, chart).result()
+            return render_stacked_bar_graph(chart)
             
-            # Add hit rate info in top left
-            hits_count = sum(hits)
-            total_games = len(hits)
-            hit_rate = (hits_count / total_games) * 100 if total_games > 0 else 0
-            plt.text(x_min, y_max, f'L{total_games} {int(hit_rate)}% • {hits_count}/{total_games} games',
-                    color='white', ha='left', va='top', alpha=0.7)
+        except Exception as e:
+            logger.error(f"Error in _render_chart: {str(e)}", exc_info=True)
+            raise ValueError(f"Failed to create visualization: {str(e)}")
+    
+    def _get_player_games(self, player_name: str, team_name: str) -> pd.DataFrame:
+        """All games for a player on a team, most recent first"""
+        if self.processor is not None:
+            return self.nba_stats_df.iloc[self.processor.get_game_rows(player_name, team_name)]
+        return self.nba_stats_df[
+            (self.nba_stats_df['player_name'] == player_name) &
+            (self.nba_stats_df['team_abbreviation'] == team_name)
+        ].sort_values('date', ascending=False)
+    
+    def _get_window_games(self, player_games: pd.DataFrame, player_name: str, team_name: str,
+                          view_mode: str) -> pd.DataFrame:
+        """
+        A player's games in a 'season', 'last_<n>' or 'last_<n>_days' window, most recent first
+        
+        Raises:
+            ValueError: For view modes window_stats does not accept
+        """
+        if self.processor is not None:
+            return self.nba_stats_df.iloc[self.processor.get_window_rows(player_name, team_name, view_mode, self.as_of)]
+        window = parse_timeframe(view_mode)
+        if window is None:
+            raise ValueError(f"Unsupported timeframe: {view_mode}")
+        kind, size = window
+        if self.as_of is not None:
+            player_games = player_games[pd.to_datetime(player_games['date']) < pd.Timestamp(self.as_of).normalize() + pd.Timedelta(days=1)]
+        if kind == 'games':
+            return player_games if size is None else player_games.head(size)
+        as_of = self.as_of if self.as_of is not None else pd.to_datetime(self.nba_stats_df['date']).max()
+        cutoff = pd.Timestamp(as_of).normalize() - pd.Timedelta(days=size - 1)
+        return player_games[pd.to_datetime(player_games['date']) >= cutoff]
+    
+    def _get_h2h_games(self, player_games: pd.DataFrame, player_name: str, team_name: str,
+                       opponent_team: str) -> pd.DataFrame:
+        """A player's games against an opponent, most recent first"""
+        if self.processor is not None:
+            return self.nba_stats_df.iloc[self.processor.get_game_rows(player_name, team_name, opponent_team)]
+        return player_games[player_games['opponent_team'] == opponent_team]
+    
+    def _get_opponent_team(self, player_name: str, team_name: str, stat_name: str) -> str:
+        """Get the opponent team for a prop from the props file"""
+        if self.processor is not None:
+            opponent_team = self.processor.get_prop_opponent(player_name, team_name, stat_name)
+            if opponent_team is None:
+                raise ValueError(f'No {stat_name} prop found for {player_name} on team {team_name}')
+            return opponent_team
+        prop = self.props_df[
+            (self.props_df['Player Name'] == player_name) &
+            (self.props_df['Team Name'] == team_name) &
+            (self.props_df['Stat Name'] == stat_name)
+        ].iloc[0]
+        return prop['Opponent Team']
+    
+    def _validate_request(self, player_name: str, team_name: str, stat_name: str,
+                          line_score: float, output: str, image_format: str) -> Optional[str]:
+        """Return an error message for invalid visualization parameters"""
+        if not player_name or not team_name or not stat_name:
+            return 'Missing required parameters'
+        
+        if output not in ('image', 'data'):
+            return f'Unsupported output: {output}'
+        
+        if output == 'image' and image_format not in IMAGE_FORMATS:
+            return f'Unsupported image format: {image_format}'
+        
+        if not isinstance(line_score, (int, float)) or line_score < 0:
+            return 'Invalid line score'
+        
+        return None
+    
+    def _prepare_visualization(self, player_games: pd.DataFrame, player_name: str,
+                               team_name: str, stat_name: str, line_score: float,
+                               view_mode: str, output: str, image_format: str, dpi: int,
+                               opponent_team: Optional[str] = None) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Select the games for a view mode and compute everything except the image.
+        
+        Returns the result dict and, for image output, the chart still to be
+        rendered with render_stacked_bar_graph.
+        """
+        # Special handling for H2H view mode
+        if view_mode == 'h2h':
+            # Get the opponent team from props
+            if opponent_team is None:
+                opponent_team = self._get_opponent_team(player_name, team_name, stat_name)
+            
+            # Get H2H stats
+            player_stats = self._get_h2h_games(player_games, player_name, team_name, opponent_team).copy()
             
-            # Add average total in top right
-            plt.text(x_max, y_max, f'AVG Total: {int(avg_total)}',
-                    color='white', ha='right', va='top', alpha=0.7)
+            if player_stats.empty:
+                return {'error': f'No H2H stats found against {opponent_team}'}, None
             
-            # Adjust layout
-            plt.tight_layout()
+        else:
+            # Regular view mode handling
+            if player_games.empty:
+                return {'error': f'No stats found for player {player_name} on team {team_name}'}, None
             
-            # Convert plot to base64 string
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', dpi=300, bbox_inches='tight')
-            buf.seek(0)
-            plt.close()
-            return base64.b64encode(buf.getvalue()).decode()
+            # Apply view mode filter
+            if parse_timeframe(view_mode) is None:
+                return {'error': f'Unsupported timeframe: {view_mode}'}, None
+            player_stats = self._get_window_games(player_games, player_name, team_name, view_mode).copy()
             
-        except Exception as e:
-            print(f"Error in _create_stacked_bar_graph: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            raise ValueError(f"Failed to create visualization: {str(e)}")
+            if player_stats.empty:
+                return {'error': f'No games found for {player_name} in {view_mode}'}, None
+        
+        player_stats = player_stats.reset_index(drop=True)
+        logger.debug(f"Analyzing {len(player_stats)} games for {player_name}")
+        
+        # Validate required columns
+        required_columns = {
+            'Points': ['pts'],
+            'Rebounds': ['reb'],
+            'Assists': ['ast'],
+            '3-PT Made': ['fg3m'],
+            'Pts+Rebs+Asts': ['pts', 'reb', 'ast'],
+            'Pts+Rebs': ['pts', 'reb'],
+            'Pts+Asts': ['pts', 'ast'],
+            'Rebs+Asts': ['reb', 'ast']
+        }
+        
+        if stat_name not in required_columns:
+            return {'error': f'Unsupported stat name: {stat_name}'}, None
+        
+        missing_columns = [col for col in required_columns[stat_name] 
+                         if col not in player_stats.columns]
+        if missing_columns:
+            return {'error': f'Missing required stats: {", ".join(missing_columns)}'}, None
+        
+        # Convert numeric columns and handle missing values
+        for col in required_columns[stat_name]:
+            player_stats[col] = pd.to_numeric(player_stats[col], errors='coerce').fillna(0)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"{col} values: {player_stats[col].tolist()}")
+        
+        # Prepare stat components based on stat name
+        stat_components = {}
+        if stat_name == 'Points':
+            stat_components = {'PTS': player_stats['pts']}
+        elif stat_name == 'Rebounds':
+            stat_components = {'REB': player_stats['reb']}
+        elif stat_name == 'Assists':
+            stat_components = {'AST': player_stats['ast']}
+        elif stat_name == '3-PT Made':
+            stat_components = {'3PM': player_stats['fg3m']}
+        elif stat_name == 'Pts+Rebs+Asts':
+            stat_components = {
+                'PTS': player_stats['pts'],
+                'REB': player_stats['reb'],
+                'AST': player_stats['ast']
+            }
+        elif stat_name == 'Pts+Rebs':
+            stat_components = {
+                'PTS': player_stats['pts'],
+                'REB': player_stats['reb']
+            }
+        elif stat_name == 'Pts+Asts':
+            stat_components = {
+                'PTS': player_stats['pts'],
+                'AST': player_stats['ast']
+            }
+        elif stat_name == 'Rebs+Asts':
+            stat_components = {
+                'REB': player_stats['reb'],
+                'AST': player_stats['ast']
+            }
+        
+        # Create visualization
+        prop_info = {
+            'player_name': player_name,
+            'team_name': team_name,
+            'stat_name': stat_name,
+            'line_score': line_score
+        }
+        
+        chart = self._build_chart_data(player_stats, prop_info, stat_components)
+        if output == 'data':
+            del chart['game_labels']
+            # NaN is not valid JSON
+            for key in ('totals', 'hits'):
+                chart[key] = [None if pd.isna(v) else v for v in chart[key]]
+            chart['components'] = {
+                label: [None if pd.isna(v) else v for v in values]
+                for label, values in chart['components'].items()
+            }
+            result = {'chart': chart}
+            chart = None
+        else:
+            chart['format'] = image_format
+            chart['dpi'] = dpi
+            result = {
+                'format': image_format,
+                'mime': IMAGE_FORMATS[image_format]
+            }
+        
+        # Calculate hit rate
+        total_values = pd.Series(0, index=range(len(player_stats)))
+        for values in stat_components.values():
+            values = pd.to_numeric(values, errors='coerce').fillna(0)
+            total_values += values
+        
+        hits = sum(total_values > line_score)
+        total_games = len(total_values)
+        hit_rate = (hits / total_games) * 100 if total_games > 0 else 0
+        
+        result.update({
+            'hit_rate': round(hit_rate, 1),
+            'hits': int(hits),
+            'total_games': total_games
+        })
+        return result, chart
     
     def create_prop_visualization(self, player_name: str, team_name: str,
                                 stat_name: str, line_score: float,
-                                view_mode: str = 'last_5') -> Dict:
-        """Create visualization for a specific prop bet"""
+                                view_mode: str = 'last_5', output: str = 'image',
+                                image_format: str = 'png', dpi: int = 300) -> Dict:
+        """
+        Create visualization for a specific prop bet
+        
+        Args:
+            output (str): 'image' for a server-rendered chart in 'graph', or
+                'data' for the chart series in 'chart' so the client can draw it
+            image_format (str): One of IMAGE_FORMATS, used in 'image' output
+            dpi (int): Resolution of the rendered image
+        """
         try:
             # Input validation
-            if not player_name or not team_name or not stat_name:
-                return {'error': 'Missing required parameters'}
+            error = self._validate_request(player_name, team_name, stat_name,
+                                           line_score, output, image_format)
+            if error:
+                return {'error': error}
+            
+            player_games = self._get_player_games(player_name, team_name)
+            result, chart = self._prepare_visualization(
+                player_games, player_name, team_name, stat_name, line_score,
+                view_mode, output, image_format, dpi
+            )
+            if chart is not None:
+                result['graph'] = self._render_chart(chart)
+            return result
             
-            if not isinstance(line_score, (int, float)) or line_score < 0:
-                return {'error': 'Invalid line score'}
-            
-            # Special handling for H2H view mode
-            if view_mode == 'h2h':
-                # Get the opponent team from props
-                prop = self.props_df[
-                    (self.props_df['Player Name'] == player_name) &
-                    (self.props_df['Team Name'] == team_name) &
-                    (self.props_df['Stat Name'] == stat_name)
-                ].iloc[0]
-                
-                opponent_team = prop['Opponent Team']
-                
-                # Get H2H stats
-                player_stats = self.nba_stats_df[
-                    (self.nba_stats_df['player_name'] == player_name) &
-                    (self.nba_stats_df['team_abbreviation'] == team_name) &
-                    (self.nba_stats_df['opponent_team'] == opponent_team)
-                ].sort_values('date', ascending=False).copy()
-                
-                if player_stats.empty:
-                    return {'error': f'No H2H stats found against {opponent_team}'}
-                
-            else:
-                # Regular view mode handling
-                player_stats = self.nba_stats_df[
-                    (self.nba_stats_df['player_name'] == player_name) &
-                    (self.nba_stats_df['team_abbreviation'] == team_name)
-                ].sort_values('date', ascending=False).copy()
+        except Exception as e:
+            logger.error(f"Error in create_prop_visualization: {str(e)}", exc_info=True)
+            return {'error': str(e)}
+    
+    def create_prop_visualizations(self, requests: List[Dict], output: str = 'image',
+                                   image_format: str = 'png', dpi: int = 300) -> Iterator[Tuple[int, Dict]]:
+        """
+        Create visualizations for many props and view modes at once
+        
+        Each player's games are filtered once and shared by all of their requests.
+        With a render pool, images render in parallel and are yielded as they
+        finish, so results do not come back in request order.
+        
+        Args:
+            requests (list): Dicts with 'player_name', 'team_name', 'stat_name',
+                'line_score', 'view_mode' and optionally 'opponent_team'
+        
+        Yields:
+            (index into requests, result dict like create_prop_visualization)
+        """
+        player_games = {}
+        pending = {}
+        for index, req in enumerate(requests):
+            try:
+                player_name = req.get('player_name')
+                team_name = req.get('team_name')
+                error = self._validate_request(player_name, team_name, req.get('stat_name'),
+                                               req.get('line_score'), output, image_format)
+                if error:
+                    yield index, {'error': error}
+                    continue
                 
-                if player_stats.empty:
-                    return {'error': f'No stats found for player {player_name} on team {team_name}'}
+                key = (player_name, team_name)
+                if key not in player_games:
+                    player_games[key] = self._get_player_games(player_name, team_name)
                 
-                # Apply view mode filter
-                games_to_analyze = {
-                    'last_5': 5,
-                    'last_10': 10,
-                    'last_20': 20,
-                    'season': len(player_stats)
-                }.get(view_mode, 5)
+                result, chart = self._prepare_visualization(
+                    player_games[key], player_name, team_name, req['stat_name'],
+                    req['line_score'], req.get('view_mode', 'last_5'), output, image_format, dpi,
+                    opponent_team=req.get('opponent_team')
+                )
+                if chart is None:
+                    yield index, result
+                elif self.render_pool is not None:
+                    pending[self.render_pool.submit(render_stacked_bar_graph, chart)] = (index, result)
+                else:
+                    result['graph'] = self._render_chart(chart)
+                    yield index, result
                 
-                player_stats = player_stats.head(games_to_analyze)
-            
-            player_stats = player_stats.reset_index(drop=True)
-            print(f"Analyzing {len(player_stats)} games for {player_name}")
-            
-            # Validate required columns
-            required_columns = {
-                'Points': ['pts'],
-                'Rebounds': ['reb'],
-                'Assists': ['ast'],
-                '3-PT Made': ['fg3m'],
-                'Pts+Rebs+Asts': ['pts', 'reb', 'ast'],
-                'Pts+Rebs': ['pts', 'reb'],
-                'Pts+Asts': ['pts', 'ast'],
-                'Rebs+Asts': ['reb', 'ast']
-            }
-            
-            if stat_name not in required_columns:
-                return {'error': f'Unsupported stat name: {stat_name}'}
-            
-            missing_columns = [col for col in required_columns[stat_name] 
-                             if col not in player_stats.columns]
-            if missing_columns:
-                return {'error': f'Missing required stats: {", ".join(missing_columns)}'}
-            
-            # Convert numeric columns and handle missing values
-            for col in required_columns[stat_name]:
-                player_stats[col] = pd.to_numeric(player_stats[col], errors='coerce').fillna(0)
-                print(f"{col} values: {player_stats[col].tolist()}")
-            
-            # Prepare stat components based on stat name
-            stat_components = {}
-            if stat_name == 'Points':
-                stat_components = {'PTS': player_stats['pts']}
-            elif stat_name == 'Rebounds':
-                stat_components = {'REB': player_stats['reb']}
-            elif stat_name == 'Assists':
-                stat_components = {'AST': player_stats['ast']}
-            elif stat_name == '3-PT Made':
-                stat_components = {'3PM': player_stats['fg3m']}
-            elif stat_name == 'Pts+Rebs+Asts':
-                stat_components = {
-                    'PTS': player_stats['pts'],
-                    'REB': player_stats['reb'],
-                    'AST': player_stats['ast']
-                }
-            elif stat_name == 'Pts+Rebs':
-                stat_components = {
-                    'PTS': player_stats['pts'],
-                    'REB': player_stats['reb']
-                }
-            elif stat_name == 'Pts+Asts':
-                stat_components = {
-                    'PTS': player_stats['pts'],
-                    'AST': player_stats['ast']
-                }
-            elif stat_name == 'Rebs+Asts':
-                stat_components = {
-                    'REB': player_stats['reb'],
-                    'AST': player_stats['ast']
-                }
-            
-            # Create visualization
-            prop_info = {
-                'player_name': player_name,
-                'team_name': team_name,
-                'stat_name': stat_name,
-                'line_score': line_score
-            }
-            
-            graph_data = self._create_stacked_bar_graph(player_stats, prop_info, stat_components)
-            
-            # Calculate hit rate
-            total_values = pd.Series(0, index=range(len(player_stats)))
-            for values in stat_components.values():
-                values = pd.to_numeric(values, errors='coerce').fillna(0)
-                total_values += values
-            
-            hits = sum(total_values > line_score)
-            total_games = len(total_values)
-            hit_rate = (hits / total_games) * 100 if total_games > 0 else 0
-            
-            return {
-                'graph': graph_data,
-                'hit_rate': round(hit_rate, 1),
-                'hits': hits,
-                'total_games': total_games
-            }
-            
-        except Exception as e:
-            print(f"Error in create_prop_visualization: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return {'error': str(e)} 
\ No newline at end of file
+            except Exception as e:
+                logger.error(f"Error in create_prop_visualizations: {str(e)}", exc_info=True)
+                yield index, {'error': str(e)}
+        
+        for future in as_completed(pending):
+            index, result = pending[future]
+            try:
+                result['graph'] = future.result()
+            except Exception as e:
+                result = {'error': f"Failed to create visualization: {str(e)}"}
+            yield index, result
@@ -0,0 +1,239 @@
+import re
+from typing import Callable, Dict, Optional, Tuple
+import pandas as pd
+import numpy as np
+
+# 'season', 'last_<n>' (most recent n games) or 'last_<n>_days' (games in the n days up to as_of)
+TIMEFRAME_PATTERN = re.compile(r'^last_([0-9]+)(_days)?$')
+
+# Span of the exponentially weighted mean, like pandas' ewm(span=...)
+EWMA_SPAN = 10
+
+def parse_timeframe(timeframe: str) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    ('games', n), ('days', n) or ('games', None) for the whole season
+
+    Returns None for anything else, such as 'h2h'.
+    """
+    if timeframe == 'season':
+        return 'games', None
+    match = TIMEFRAME_PATTERN.match(str(timeframe))
+    if not match or int(match.group(1)) < 1:
+        return None
+    return ('days' if match.group(2) else 'games'), int(match.group(1))
+
+def ladder_lines(values: np.ndarray) -> np.ndarray:
+    """
+    Every half-point line from just under the lowest value to just over the highest
+
+    Hit rates only change at the values themselves, so these lines cover
+    every distinct over/under split of the games.
+    """
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.empty(0)
+    return np.arange(max(np.floor(values.min()) - 0.5, 0.5), values.max() + 1, 1.0)
+
+def sweep_lines(values: np.ndarray, lines: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Hits (over), pushes and unders of values against every line
+
+    The values are sorted once and each line costs two binary searches.
+    Missing values count for no line.
+    """
+    ordered = np.sort(values[~np.isnan(values)])
+    lines = np.asarray(lines, dtype=np.float64)
+    below = np.searchsorted(ordered, lines, side='left')
+    at_or_below = np.searchsorted(ordered, lines, side='right')
+    return {
+        'hits': len(ordered) - at_or_below,
+        'pushes': at_or_below - below,
+        'unders': below
+    }
+
+class WindowStats:
+    """
+    Aggregates over windows of each player's most recent games.
+
+    The game log is sorted by (player, team, date descending), so every
+    window is a prefix of a player's slice. Prefix sums over the whole log
+    give the count, sum, sum of squares and exponentially weighted sums of
+    any window in O(1), and a day window finds its end with a binary search
+    over the slice's dates. Line counts and the median read the window's
+    games once. Every array is built on first use, per stat (and EWMA span).
+    """
+
+    def __init__(self, get_stat_totals: Callable[[str], Optional[np.ndarray]],
+                 dates: Optional[np.ndarray], slice_starts: np.ndarray, slice_stops: np.ndarray,
+                 n_rows: int):
+        self._get_stat_totals = get_stat_totals
+        self._dates = dates
+        self._slice_starts = np.asarray(slice_starts, dtype=np.int64)
+        self._slice_stops = np.asarray(slice_stops, dtype=np.int64)
+        self._n_rows = n_rows
+        self._prefix = {}
+        self._ewma_prefix = {}
+        self._ranks = None
+        self._date_keys = None
+        self._latest_date = None
+
+    @property
+    def ranks(self) -> np.ndarray:
+        """Rank of each game within its player's slice, most recent first"""
+        if self._ranks is None:
+            lengths = self._slice_stops - self._slice_starts
+            slice_starts = np.repeat(self._slice_starts, lengths)
+            positions = slice_starts + np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+            self._ranks = np.zeros(self._n_rows, dtype=np.int64)
+            self._ranks[positions] = positions - slice_starts
+        return self._ranks
+
+    @property
+    def date_keys(self) -> Optional[np.ndarray]:
+        """Negated game dates, ascending within each slice with missing dates last"""
+        if self._date_keys is None and self._dates is not None:
+            dates = np.asarray(self._dates, dtype='datetime64[ns]')
+            missing = np.isnat(dates)
+            self._date_keys = np.where(missing, np.iinfo(np.int64).max, -dates.view(np.int64))
+            if not missing.all():
+                self._latest_date = pd.Timestamp(dates[~missing].max())
+        return self._date_keys
+
+    @property
+    def latest_date(self) -> Optional[pd.Timestamp]:
+        """Date of the most recent game, where day windows end by default"""
+        if self.date_keys is None:
+            return None
+        return self._latest_date
+
+    def _prefix_sums(self, stat_name: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Cumulative (valid games, sum, sum of squares) with a leading zero"""
+        if stat_name not in self._prefix:
+            totals = self._get_stat_totals(stat_name)
+            if totals is None:
+                return None
+            valid = ~np.isnan(totals)
+            # Accumulate in float64 even when the game log keeps float32 values
+            values = np.where(valid, totals, 0.0).astype(np.float64)
+            self._prefix[stat_name] = tuple(
+                np.concatenate(([0], np.cumsum(column))) for column in (valid.astype(np.int64), values, values * values)
+            )
+        return self._prefix[stat_name]
+
+    def _ewma_prefix_sums(self, stat_name: str, span: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative (weights, weighted values), a game's weight decaying with its rank"""
+        key = (stat_name, span)
+        if key not in self._ewma_prefix:
+            totals = self._get_stat_totals(stat_name)
+            valid = ~np.isnan(totals)
+            weights = np.where(valid, (1 - 2 / (span + 1)) ** self.ranks, 0.0)
+            self._ewma_prefix[key] = (
+                np.concatenate(([0], np.cumsum(weights))),
+                np.concatenate(([0], np.cumsum(weights * np.where(valid, totals, 0.0))))
+            )
+        return self._ewma_prefix[key]
+
+    def day_cutoff(self, days: int, as_of: Optional[pd.Timestamp] = None) -> int:
+        """Date key bound of a 'last_<days>_days' window; games on as_of count as day one"""
+        as_of = pd.Timestamp(as_of) if as_of is not None else self.latest_date
+        if as_of is None:
+            return np.iinfo(np.int64).min
+        cutoff = as_of.normalize() - pd.Timedelta(days=days - 1)
+        return -cutoff.value
+
+    def window_bounds(self, player_slice: slice, timeframe: str,
+                      as_of: Optional[pd.Timestamp] = None) -> Tuple[int, int]:
+        """
+        Log positions [start, stop) of a window of the player's most recent games
+
+        With as_of, games after that day are skipped first, so windows can
+        be taken as of any earlier date.
+
+        Raises:
+            ValueError: For timeframes parse_timeframe does not accept
+        """
+        window = parse_timeframe(timeframe)
+        if window is None:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+        kind, size = window
+        start, stop = player_slice.start, player_slice.stop
+        if (kind == 'days' or as_of is not None) and self.date_keys is None:
+            raise ValueError("Windows by date need game dates")
+        if as_of is not None:
+            next_day = pd.Timestamp(as_of).normalize() + pd.Timedelta(days=1)
+            start += int(np.searchsorted(self.date_keys[start:stop], -next_day.value, side='right'))
+        if size is None:
+            return start, stop
+        if kind == 'games':
+            return start, min(stop, start + size)
+        keys = self.date_keys[start:stop]
+        return start, start + int(np.searchsorted(keys, self.day_cutoff(size, as_of), side='right'))
+
+    def aggregate(self, start: int, stop: int, stat_name: str, line_score: Optional[float] = None,
+                  ewma_span: float = EWMA_SPAN) -> Optional[Dict]:
+        """
+        Aggregates of a stat over log positions [start, stop)
+
+        Returns None for unsupported stats. Rates are percentages of the
+        window's games, and hits count values strictly over the line like
+        every other hit rate; pushes equal it and unders fall below it.
+        """
+        prefix = self._prefix_sums(stat_name)
+        if prefix is None:
+            return None
+        counts, sums, squares = prefix
+        games = int(stop - start)
+        valid = int(counts[stop] - counts[start])
+        values = self._get_stat_totals(stat_name)[start:stop]
+        result = {'games': games, 'mean': None, 'median': None, 'std': None, 'ewma': None}
+        if valid:
+            total = sums[stop] - sums[start]
+            mean = total / valid
+            result['mean'] = round(float(mean), 2)
+            result['std'] = round(float(np.sqrt(max(squares[stop] - squares[start] - total * mean, 0) / valid)), 2)
+
+            present = ~np.isnan(values)
+            result['median'] = float(np.median(values[present]))
+            if self.ranks[start] == 0:
+                weights, weighted = self._ewma_prefix_sums(stat_name, ewma_span)
+                ewma = (weighted[stop] - weighted[start]) / (weights[stop] - weights[start])
+            else:
+                # Windows that skip recent games would lose precision in the global sums
+                decay = (1 - 2 / (ewma_span + 1)) ** np.arange(stop - start)[present]
+                ewma = np.average(values[present], weights=decay)
+            result['ewma'] = round(float(ewma), 2)
+        if line_score is not None:
+            hits = int(np.count_nonzero(values > line_score))
+            pushes = int(np.count_nonzero(values == line_score))
+            unders = int(np.count_nonzero(values < line_score))
+            result.update({
+                'hits': hits,
+                'pushes': pushes,
+                'unders': unders,
+                'hit_rate': round(hits / games * 100, 1) if games else 0,
+                'push_rate': round(pushes / games * 100, 1) if games else 0,
+                'under_rate': round(unders / games * 100, 1) if games else 0
+            })
+        return result
+
+    def window_sums(self, starts: np.ndarray, stops: np.ndarray, stat_name: str,
+                    ewma_span: float = EWMA_SPAN) -> Dict[str, np.ndarray]:
+        """
+        Vectorized mean, std and ewma for many windows of one stat
+
+        Every window must start at its player's most recent game. Values are
+        NaN for windows without games.
+        """
+        counts, sums, squares = self._prefix_sums(stat_name)
+        weights, weighted = self._ewma_prefix_sums(stat_name, ewma_span)
+        valid = counts[stops] - counts[starts]
+        total = sums[stops] - sums[starts]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(valid > 0, total / valid, np.nan)
+            variance = np.maximum(squares[stops] - squares[starts] - total * mean, 0) / valid
+            ewma = (weighted[stops] - weighted[starts]) / (weights[stops] - weights[starts])
+        return {
+            'mean': np.round(mean, 2),
+            'std': np.round(np.where(valid > 0, np.sqrt(variance), np.nan), 2),
+            'ewma': np.round(np.where(valid > 0, ewma, np.nan), 2)
+        }
@@ -11,11 +11,20 @@ document.addEventListener('DOMContentLoaded', function() {
     const propTypeFilters = document.getElementById('propTypeFilters');
     const gameFilters = document.getElementById('gameFilters');
     
-    let currentProps = {};  // Store all props by type
+    const PAGE_SIZE = 50;
+    let nextCursor = null;  // Cursor for the next page of the current query
+    let loadingPage = false;
+    let queryId = 0;  // Bumped on every new query so stale pages are dropped
+    let streamFirstView = true;  // The first view renders from the NDJSON stream as props are scored
     let activeFilters = {
         propTypes: new Set(),
         games: new Set()
     };
+    // Every filter option seen so far, so options that arrive later start selected
+    const knownFilters = {
+        propTypes: new Set(),
+        games: new Set()
+    };
 
     // Add tab switching functionality
     tabs.forEach(tab => {
@@ -25,8 +34,7 @@ document.addEventListener('DOMContentLoaded', function() {
             tab.classList.add('active');
 
             // Show props for selected type
-            const type = tab.dataset.type;
-            displayPropsByType(type);
+            loadProps();
         });
     });
 
@@ -46,56 +54,47 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
-    function normalizeGameString(game) {
-        const [team1, team2] = game.split(' @ ');
-        // Sort teams alphabetically to ensure consistent game string regardless of home/away
-        return [team1, team2].sort().join(' vs ');
-    }
-
-    function getDisplayGameString(game) {
-        // Keep original format for display
-        return game;
-    }
+    function initializeFilters(facets) {
+        // Options and counts come from the facets of the current page
+        const propTypes = facets.stat;
+        const games = facets.game;
 
-    function initializeFilters(props) {
-        // Get unique prop types and games
-        const propTypes = new Set();
-        const gamesMap = new Map(); // Map normalized game string to display string
-
-        Object.values(props).flat().forEach(prop => {
-            propTypes.add(prop.stat_name);
-            const gameString = `${prop.game_info.away_team} @ ${prop.game_info.home_team}`;
-            const normalizedGame = normalizeGameString(gameString);
-            // Keep the first encountered version of the game string for display
-            if (!gamesMap.has(normalizedGame)) {
-                gamesMap.set(normalizedGame, gameString);
+        // New options start selected, options seen before keep their state
+        propTypes.forEach(({ value }) => {
+            if (!knownFilters.propTypes.has(value)) {
+                knownFilters.propTypes.add(value);
+                activeFilters.propTypes.add(value);
+            }
+        });
+        games.forEach(({ value }) => {
+            if (!knownFilters.games.has(value)) {
+                knownFilters.games.add(value);
+                activeFilters.games.add(value); // Store normalized game strings
             }
         });
 
         // Create prop type checkboxes
-        propTypeFilters.innerHTML = Array.from(propTypes)
-            .sort()
-            .map(type => `
+        propTypeFilters.innerHTML = propTypes
+            .slice()
+            .sort((a, b) => a.value.localeCompare(b.value))
+            .map(({ value, count }) => `
                 <div class="filter-checkbox">
-                    <input type="checkbox" id="prop-${type}" value="${type}" checked>
-                    <label for="prop-${type}">${type}</label>
+                    <input type="checkbox" id="prop-${value}" value="${value}" ${activeFilters.propTypes.has(value) ? 'checked' : ''}>
+                    <label for="prop-${value}">${value} (${count})</label>
                 </div>
             `).join('');
 
         // Create game checkboxes using normalized games
-        gameFilters.innerHTML = Array.from(gamesMap.entries())
-            .sort(([a], [b]) => a.localeCompare(b))
-            .map(([normalizedGame, displayGame]) => `
+        gameFilters.innerHTML = games
+            .slice()
+            .sort((a, b) => a.value.localeCompare(b.value))
+            .map(({ value, label, count }) => `
                 <div class="filter-checkbox">
-                    <input type="checkbox" id="game-${normalizedGame}" value="${normalizedGame}" 
-                           data-display="${displayGame}" checked>
-                    <label for="game-${normalizedGame}">${displayGame}</label>
+                    <input type="checkbox" id="game-${value}" value="${value}" 
+                           data-display="${label}" ${activeFilters.games.has(value) ? 'checked' : ''}>
+                    <label for="game-${value}">${label} (${count})</label>
                 </div>
             `).join('');
-
-        // Initialize activeFilters with all options selected
-        activeFilters.propTypes = new Set(propTypes);
-        activeFilters.games = new Set(gamesMap.keys()); // Store normalized game strings
     }
 
     resetFilters.addEventListener('click', () => {
@@ -105,19 +104,11 @@ document.addEventListener('DOMContentLoaded', function() {
         });
 
         // Reset activeFilters to include all options
-        const propTypes = new Set();
-        const games = new Set();
-        Object.values(currentProps).flat().forEach(prop => {
-            propTypes.add(prop.stat_name);
-            const gameString = `${prop.game_info.away_team} @ ${prop.game_info.home_team}`;
-            games.add(normalizeGameString(gameString));
-        });
-        activeFilters.propTypes = propTypes;
-        activeFilters.games = games;
+        activeFilters.propTypes = new Set(knownFilters.propTypes);
+        activeFilters.games = new Set(knownFilters.games);
 
         // Update display
-        const activeTab = document.querySelector('.tab.active');
-        displayPropsByType(activeTab.dataset.type);
+        loadProps();
     });
 
     applyFilters.addEventListener('click', () => {
@@ -135,37 +126,30 @@ document.addEventListener('DOMContentLoaded', function() {
 
         // Close modal and update display
         filterModal.classList.remove('active');
-        const activeTab = document.querySelector('.tab.active');
-        displayPropsByType(activeTab.dataset.type);
+        loadProps();
     });
 
-    function displayPropsByType(type) {
-        propsContainer.innerHTML = ''; // Clear existing props
-        if (currentProps[type]) {
-            const filteredProps = currentProps[type].filter(prop => {
-                const gameString = `${prop.game_info.away_team} @ ${prop.game_info.home_team}`;
-                const normalizedGame = normalizeGameString(gameString);
-                return activeFilters.propTypes.has(prop.stat_name) && 
-                       activeFilters.games.has(normalizedGame);
-            });
-
-            filteredProps.forEach(prop => {
-                const propCard = createPropCard(prop);
-                propsContainer.appendChild(propCard);
-            });
-        }
-        // Apply current search filter
-        filterProps(searchInput.value);
-    }
-
-    function filterProps(searchTerm) {
-        searchTerm = searchTerm.toLowerCase();
-        document.querySelectorAll('.prop-card').forEach(card => {
-            const playerName = card.querySelector('.player-name').textContent.toLowerCase();
-            const teamName = card.querySelector('.player-position').textContent.toLowerCase();
-            const shouldShow = playerName.includes(searchTerm) || teamName.includes(searchTerm);
-            card.style.display = shouldShow ? 'block' : 'none';
+    function buildQuery(cursor) {
+        // Filters are applied server-side; a facet with every option selected is left out
+        const params = new URLSearchParams();
+        params.set('odds_type', document.querySelector('.tab.active').dataset.type);
+        [['stat', 'propTypes'], ['game', 'games']].forEach(([param, key]) => {
+            const selected = Array.from(activeFilters[key]);
+            if (selected.length === 0) {
+                params.append(param, ''); // Nothing selected matches nothing
+            } else if (selected.length < knownFilters[key].size) {
+                selected.forEach(value => params.append(param, value));
+            }
         });
+        const searchTerm = searchInput.value.trim();
+        if (searchTerm) {
+            params.set('q', searchTerm);
+        }
+        params.set('limit', PAGE_SIZE);
+        if (cursor) {
+            params.set('cursor', cursor);
+        }
+        return params.toString();
     }
 
     function getRateClass(rate) {
@@ -235,6 +219,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Show visualization container if not already visible
                 if (!vizContainer.classList.contains('active')) {
                     vizContainer.classList.add('active');
+                    loadLineLadder(prop, vizContainer.querySelector('.line-ladder'));
                 }
                 
                 // Load visualization for selected timeframe
@@ -266,12 +251,136 @@ document.addEventListener('DOMContentLoaded', function() {
                 const l5Element = this.querySelector('[data-timeframe="L5"]');
                 l5Element.classList.add('active');
                 loadVisualization(prop, vizContainer.querySelector('.graph-container'), 'last_5');
+                loadLineLadder(prop, vizContainer.querySelector('.line-ladder'));
             }
         });
 
         return propCard;
     }
 
+    // Chart colors, matching the server-rendered graph
+    const HIT_COLORS = ['#32d74b', '#00ba34', '#00a025', '#008519'];
+    const MISS_COLORS = ['#ff453a', '#ff6b63', '#ff918c', '#ffb7b5'];
+
+    function escapeHtml(text) {
+        return String(text).replace(/[&<>"']/g, c => ({
+            '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+        })[c]);
+    }
+
+    function renderChart(chart, stats) {
+        // Draw the stacked bar chart returned by /visualize in data mode as SVG
+        const width = 600;
+        const height = 360;
+        const margin = { top: 36, right: 16, bottom: 40, left: 36 };
+        const plotWidth = width - margin.left - margin.right;
+        const plotHeight = height - margin.top - margin.bottom;
+
+        const totals = chart.totals.map(total => total || 0);
+        const nGames = totals.length;
+        const showValueLabels = nGames <= 25;
+        const yMax = Math.max(chart.line_score, ...totals, 1) * 1.1;
+        const slot = plotWidth / Math.max(nGames, 1);
+        const barWidth = slot * 0.7;
+        const y = value => margin.top + plotHeight - (value / yMax) * plotHeight;
+
+        const parts = [];
+        const bottoms = new Array(nGames).fill(0);
+        Object.entries(chart.components).forEach(([label, values], i) => {
+            const colorIdx = i % HIT_COLORS.length;
+            values.forEach((value, j) => {
+                const v = value || 0;
+                if (v <= 0) return;
+                const x = margin.left + j * slot + (slot - barWidth) / 2;
+                const top = y(bottoms[j] + v);
+                const color = chart.hits[j] ? HIT_COLORS[colorIdx] : MISS_COLORS[colorIdx];
+                parts.push(`<rect x="${x}" y="${top}" width="${barWidth}" height="${y(bottoms[j]) - top}" fill="${color}" opacity="0.9"/>`);
+                if (showValueLabels) {
+                    parts.push(`<text x="${x + barWidth / 2}" y="${(top + y(bottoms[j])) / 2}" fill="white" font-size="9" font-weight="bold" text-anchor="middle" dominant-baseline="middle">${Math.trunc(v)} ${escapeHtml(label)}</text>`);
+                }
+                bottoms[j] += v;
+            });
+        });
+
+        // Totals above each bar and game info under it
+        totals.forEach((total, j) => {
+            const x = margin.left + j * slot + slot / 2;
+            if (total > 0) {
+                const color = total > chart.line_score ? '#32d74b' : '#ff453a';
+                parts.push(`<text x="${x}" y="${y(total) - 4}" fill="${color}" font-size="11" font-weight="bold" text-anchor="middle">${Math.trunc(total)}</text>`);
+            }
+            if (showValueLabels && chart.dates && chart.opponents) {
+                const opponent = chart.opponents[j] ? `@${escapeHtml(chart.opponents[j])}` : '@???';
+                const date = chart.dates[j] ? chart.dates[j].slice(5).replace('-', '/') : '';
+                parts.push(`<text x="${x}" y="${height - 24}" fill="#86868b" font-size="9" text-anchor="middle">${opponent}</text>`);
+                parts.push(`<text x="${x}" y="${height - 12}" fill="#86868b" font-size="9" text-anchor="middle">${date}</text>`);
+            }
+        });
+
+        // Prop line and average line
+        const lineY = y(chart.line_score);
+        parts.push(`<line x1="${margin.left}" x2="${width - margin.right}" y1="${lineY}" y2="${lineY}" stroke="#0a84ff" stroke-dasharray="6 4"/>`);
+        parts.push(`<text x="${width - margin.right}" y="${lineY - 4}" fill="#0a84ff" font-size="11" text-anchor="end">O ${chart.line_score}</text>`);
+        if (chart.average !== null) {
+            const avgY = y(chart.average);
+            parts.push(`<line x1="${margin.left}" x2="${width - margin.right}" y1="${avgY}" y2="${avgY}" stroke="white" stroke-dasharray="2 3" opacity="0.3"/>`);
+        }
+
+        // Axis and header text
+        parts.push(`<line x1="${margin.left}" x2="${margin.left}" y1="${margin.top}" y2="${margin.top + plotHeight}" stroke="#86868b"/>`);
+        parts.push(`<line x1="${margin.left}" x2="${width - margin.right}" y1="${margin.top + plotHeight}" y2="${margin.top + plotHeight}" stroke="#86868b"/>`);
+        parts.push(`<text x="${margin.left}" y="16" fill="white" opacity="0.7" font-size="12">L${stats.total_games} ${Math.trunc(stats.hit_rate)}% • ${stats.hits}/${stats.total_games} games</text>`);
+        if (chart.average !== null) {
+            parts.push(`<text x="${width - margin.right}" y="16" fill="white" opacity="0.7" font-size="12" text-anchor="end">AVG Total: ${Math.trunc(chart.average)}</text>`);
+        }
+
+        return `<svg class="graph-image chart-svg" viewBox="0 0 ${width} ${height}" role="img" aria-label="Performance Graph">${parts.join('')}</svg>`;
+    }
+
+    // Chart data per prop, fetched for every timeframe at once
+    const CHART_TIMEFRAMES = ['last_5', 'last_10', 'last_20', 'season', 'h2h'];
+    const chartCache = new Map();
+
+    function fetchCharts(prop) {
+        const key = [prop.player_name, prop.team_name, prop.stat_name,
+                     prop.line_score, prop.game_info.home_team].join('|');
+        if (!chartCache.has(key)) {
+            const request = fetch('/visualize_batch', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    props: [{
+                        player_name: prop.player_name,
+                        team_name: prop.team_name,
+                        stat_name: prop.stat_name,
+                        line_score: parseFloat(prop.line_score),
+                        opponent_team: prop.game_info.home_team
+                    }],
+                    timeframes: CHART_TIMEFRAMES,
+                    mode: 'data'
+                })
+            }).then(async response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                const data = await response.json();
+                const charts = {};
+                data.results.forEach(item => {
+                    charts[item.timeframe] = item.result;
+                });
+                return charts;
+            }).catch(error => {
+                // Allow a retry on the next click
+                chartCache.delete(key);
+                throw error;
+            });
+            chartCache.set(key, request);
+        }
+        return chartCache.get(key);
+    }
+
     async function loadVisualization(prop, container, timeframe = 'last_5') {
         try {
             // Show loading state
@@ -291,26 +400,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
             
-            const response = await fetch('/visualize', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    player_name: prop.player_name,
-                    team_name: prop.team_name,
-                    stat_name: prop.stat_name,
-                    line_score: parseFloat(prop.line_score),
-                    timeframe: timeframe
-                })
-            });
-
-            if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
-            }
-
-            const data = await response.json();
-            console.log('Visualization response:', data); // Debug log
+            const charts = await fetchCharts(prop);
+            const data = charts[timeframe] || { error: 'No visualization data available' };
             
             if (data.error) {
                 container.innerHTML = `
@@ -319,6 +410,8 @@ document.addEventListener('DOMContentLoaded', function() {
                         <div class="error-details">${data.error}</div>
                     </div>`;
                 container.classList.add('error');
+            } else if (data.chart) {
+                container.innerHTML = renderChart(data.chart, data);
             } else if (data.graph) {
                 // Create a new image element
                 const img = new Image();
@@ -338,7 +431,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     container.classList.add('error');
                 };
                 
-                img.src = `data:image/png;base64,${data.graph}`;
+                img.src = `data:${data.mime || 'image/png'};base64,${data.graph}`;
                 img.className = 'graph-image';
                 img.alt = 'Performance Graph';
             } else {
@@ -360,31 +453,251 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
-    // Update search functionality
-    searchInput.addEventListener('input', function(e) {
-        filterProps(e.target.value);
+    // Line ladder columns, matching the rate indicators
+    const LADDER_TIMEFRAMES = [
+        { key: 'last_5', label: 'L5' },
+        { key: 'last_10', label: 'L10' },
+        { key: 'last_20', label: 'L20' },
+        { key: 'h2h', label: 'H2H' },
+        { key: 'season', label: '24/25' }
+    ];
+    const ladderCache = new Map();
+
+    function fetchLineLadder(prop) {
+        // Every prop of a player's stat shares one ladder
+        const key = [prop.player_name, prop.team_name, prop.stat_name, prop.game_info.home_team].join('|');
+        if (!ladderCache.has(key)) {
+            const params = new URLSearchParams({
+                player_name: prop.player_name,
+                team_name: prop.team_name,
+                stat_name: prop.stat_name,
+                opponent_team: prop.game_info.home_team,
+                timeframes: LADDER_TIMEFRAMES.map(({ key }) => key).join(',')
+            });
+            const request = fetch(`/line_ladder?${params}`).then(async response => {
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || `HTTP error! status: ${response.status}`);
+                }
+                return data;
+            }).catch(error => {
+                // Allow a retry the next time the card opens
+                ladderCache.delete(key);
+                throw error;
+            });
+            ladderCache.set(key, request);
+        }
+        return ladderCache.get(key);
+    }
+
+    function renderLineLadder(ladder, prop) {
+        // One row per line, one column per timeframe, with the slate's lines marked
+        const currentLine = parseFloat(prop.line_score);
+        const slateLines = new Map();
+        ladder.props.forEach(({ line_score, odds_type }) => {
+            const types = slateLines.get(line_score) || [];
+            types.push(odds_type);
+            slateLines.set(line_score, types);
+        });
+
+        const header = LADDER_TIMEFRAMES.map(({ key, label }) => {
+            const games = ladder.windows[key] ? ladder.windows[key].games : 0;
+            return `<th title="${games} games">${label}</th>`;
+        }).join('');
+
+        // Highest line first, like a sportsbook ladder
+        const rows = ladder.lines.map((line, i) => {
+            const cells = LADDER_TIMEFRAMES.map(({ key }) => {
+                const window = ladder.windows[key];
+                if (!window || !window.games) return '<td class="rate-value">-</td>';
+                const rate = window.hit_rate[i];
+                return `<td class="rate-value ${getRateClass(rate)}" title="${window.hits[i]}/${window.games} over, ${window.pushes[i]} push">${Math.round(rate)}%</td>`;
+            }).join('');
+            const types = slateLines.get(line);
+            const classes = [types ? 'slate-line' : '', line === currentLine ? 'current-line' : ''].join(' ').trim();
+            const tag = types ? `<span class="ladder-tag">${types.map(escapeHtml).join(', ')}</span>` : '';
+            return `<tr class="${classes}"><th>O ${line}${tag}</th>${cells}</tr>`;
+        }).reverse().join('');
+
+        return `
+            <table class="ladder-table">
+                <thead><tr><th>Line</th>${header}</tr></thead>
+                <tbody>${rows}</tbody>
+            </table>`;
+    }
+
+    async function loadLineLadder(prop, container) {
+        if (!container || container.dataset.loaded) return;
+        try {
+            container.classList.remove('error');
+            container.innerHTML = '<div class="loading">Loading line ladder...</div>';
+
+            const ladder = await fetchLineLadder(prop);
+            if (!ladder.lines.length) {
+                container.innerHTML = '<div class="ladder-empty">No games to build a line ladder from</div>';
+                return;
+            }
+            container.innerHTML = renderLineLadder(ladder, prop);
+            container.dataset.loaded = 'true';
+
+            // Center the card's own line without scrolling the page
+            const current = container.querySelector('.current-line');
+            if (current) {
+                container.scrollTop = current.offsetTop - (container.clientHeight - current.offsetHeight) / 2;
+            }
+        } catch (error) {
+            console.error('Error loading line ladder:', error);
+            container.innerHTML = `
+                <div class="error-message">
+                    <div class="error-title">Error</div>
+                    <div class="error-details">${escapeHtml(error.message)}</div>
+                </div>`;
+            container.classList.add('error');
+        }
+    }
+
+    // Search is a server-side prefix match on player and team names
+    let searchTimer = null;
+    searchInput.addEventListener('input', function() {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(loadProps, 250);
     });
 
-    // Update loadProps function
-    async function loadProps() {
+    async function loadPage(cursor) {
+        const id = queryId;
+        loadingPage = true;
         try {
-            const response = await fetch('/get_props');
-            const data = await response.json();
-            
-            if (data.props_by_type) {
-                currentProps = data.props_by_type;
-                // Initialize filters
-                initializeFilters(data.props_by_type);
-                // Display standard props by default
-                displayPropsByType('standard');
-            } else {
+            const response = await fetch(`/get_props?${buildQuery(cursor)}`);
+            if (id !== queryId) return;  // A newer query has started
+            if (!response.ok) {
+                propsContainer.innerHTML = '<div class="error-message">No props data available</div>';
+                nextCursor = null;
+                return;
+            }
+
+            const page = await response.json();
+            if (id !== queryId) return;
+            initializeFilters(page.facets);
+            page.props.forEach(prop => {
+                propsContainer.appendChild(createPropCard(prop));
+            });
+            nextCursor = page.next_cursor;
+
+            if (page.total === 0) {
                 propsContainer.innerHTML = '<div class="error-message">No props data available</div>';
             }
         } catch (error) {
+            if (id !== queryId) return;
             console.error('Error loading props:', error);
             propsContainer.innerHTML = '<div class="error-message">Error loading props data</div>';
+            nextCursor = null;
+        } finally {
+            if (id === queryId) {
+                loadingPage = false;
+            }
         }
     }
 
+    function gameKey(prop) {
+        // The server's game facet value: the two teams sorted and joined with ' vs '
+        return [prop.game_info.away_team, prop.game_info.home_team].sort().join(' vs ');
+    }
+
+    function streamFacets(counts) {
+        // Facets like a page's, counted from the streamed props
+        return {
+            stat: Array.from(counts.stat, ([value, count]) => ({ value, count })),
+            game: Array.from(counts.game, ([value, { label, count }]) => ({ value, label, count }))
+        };
+    }
+
+    async function streamProps() {
+        // Append the active tab's cards as each game's props are scored,
+        // so the first cards show before the whole slate is analyzed
+        const id = queryId;
+        const type = document.querySelector('.tab.active').dataset.type;
+        const counts = { stat: new Map(), game: new Map() };
+        let receivedProps = 0;
+        loadingPage = true;
+        try {
+            // Revalidate with the server's ETag so unchanged data comes back as 304
+            const response = await fetch('/get_props?stream=1', { cache: 'no-cache' });
+            if (id !== queryId) return;
+            if (!response.ok) {
+                propsContainer.innerHTML = '<div class="error-message">No props data available</div>';
+                return;
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                if (id !== queryId) {
+                    reader.cancel();
+                    return;
+                }
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop(); // Keep the incomplete last line
+                lines.filter(line => line.trim()).forEach(line => {
+                    const chunk = JSON.parse(line);
+                    if (chunk.error) {
+                        throw new Error(chunk.error);
+                    }
+                    const props = (chunk.props_by_type && chunk.props_by_type[type]) || [];
+                    props.forEach(prop => {
+                        counts.stat.set(prop.stat_name, (counts.stat.get(prop.stat_name) || 0) + 1);
+                        const game = counts.game.get(gameKey(prop)) ||
+                            { label: `${prop.game_info.away_team} @ ${prop.game_info.home_team}`, count: 0 };
+                        game.count += 1;
+                        counts.game.set(gameKey(prop), game);
+                        propsContainer.appendChild(createPropCard(prop));
+                    });
+                    if (props.length) {
+                        initializeFilters(streamFacets(counts));
+                        receivedProps += props.length;
+                    }
+                });
+            }
+
+            if (receivedProps === 0) {
+                propsContainer.innerHTML = '<div class="error-message">No props data available</div>';
+            }
+        } catch (error) {
+            if (id !== queryId) return;
+            console.error('Error loading props:', error);
+            propsContainer.innerHTML = '<div class="error-message">Error loading props data</div>';
+        } finally {
+            if (id === queryId) {
+                loadingPage = false;
+            }
+        }
+    }
+
+    function loadProps() {
+        // Start a new query for the active tab, filters and search. The first
+        // view streams every card of its tab; later ones are fetched a page at a time
+        queryId += 1;
+        nextCursor = null;
+        propsContainer.innerHTML = '';
+        if (streamFirstView) {
+            streamFirstView = false;
+            return streamProps();
+        }
+        return loadPage(null);
+    }
+
+    // Fetch the next page when the end of the list scrolls into view
+    const pageSentinel = document.createElement('div');
+    pageSentinel.className = 'page-sentinel';
+    propsContainer.after(pageSentinel);
+    new IntersectionObserver(entries => {
+        if (entries[0].isIntersecting && nextCursor && !loadingPage) {
+            loadPage(nextCursor);
+        }
+    }, { rootMargin: '400px' }).observe(pageSentinel);
+
     loadProps();
 }); 
@@ -0,0 +1,43 @@
+import io
+import os
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'src', 'app')
+
+# The app reads UPLOAD_FOLDER when it is imported
+os.environ['UPLOAD_FOLDER'] = tempfile.mkdtemp(prefix='prop-tests-')
+os.environ['JOB_WORKERS'] = '0'
+for path in (ROOT, APP_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from benchmarks.generate import generate_slate
+
+@pytest.fixture(scope='session')
+def app_module():
+    import app as app_module
+    return app_module
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+@pytest.fixture(scope='session')
+def slate():
+    """Generated stats and props, (stats_df, props_df)"""
+    return generate_slate(60, 20, 400)
+
+def csv_file(df, name):
+    """A DataFrame as a file for a multipart request"""
+    return io.BytesIO(df.to_csv(index=False).encode()), name
+
+def upload(client, stats_df, props_df):
+    response = client.post('/upload', data={
+        'nbaStatsFile': csv_file(stats_df, 'nba_stats.csv'),
+        'propsFile': csv_file(props_df, 'props.csv')
+    })
+    assert response.status_code == 200, response.get_json()
+    return response
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from conftest import csv_file, upload
+
+def split_by_date(stats_df, games):
+    """Rows of the first games dates and the rest"""
+    dates = pd.to_datetime(stats_df['date'])
+    cutoff = dates.sort_values().unique()[games]
+    return stats_df[dates < cutoff], stats_df[dates >= cutoff]
+
+def test_append_matches_full_upload(client, slate):
+    stats_df, props_df = slate
+    head, tail = split_by_date(stats_df, 15)
+    upload(client, stats_df, props_df)
+    full = client.get('/get_props').get_json()
+
+    upload(client, head, props_df)
+    # Games already stored and games repeated in the file are skipped
+    repeated = pd.concat([tail, head.head(25), tail.head(10)])
+    response = client.post('/append', data={'nbaStatsFile': csv_file(repeated, 'new_games.csv')})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['appended_rows'] == len(tail)
+    assert response.get_json()['duplicate_rows'] == 35
+
+    assert client.get('/get_props').get_json() == full
+
+def test_append_matchups_match_full_upload(client, app_module, slate):
+    stats_df, props_df = slate
+    head, tail = split_by_date(stats_df, 15)
+    players = stats_df[['player_name', 'team_abbreviation']].drop_duplicates().head(10).to_numpy()
+    opponents = sorted(stats_df['opponent_team'].unique())
+
+    def matchups():
+        processor = app_module.dataset_cache.get().processor
+        return [processor.get_matchup(player, team, opponent) for player, team in players for opponent in opponents]
+
+    upload(client, stats_df, props_df)
+    full = matchups()
+    upload(client, head, props_df)
+    response = client.post('/append', data={'nbaStatsFile': csv_file(tail, 'new_games.csv')})
+    assert response.status_code == 200, response.get_json()
+    assert matchups() == full
+
+def test_append_rejects_props_missing_headers(client, slate):
+    stats_df, props_df = slate
+    upload(client, stats_df, props_df)
+    before = client.get('/get_props').get_json()
+
+    response = client.post('/append', data={
+        'propsFile': csv_file(props_df.drop(columns=['Line Score']), 'props.csv')
+    })
+    assert response.status_code == 400
+    assert 'Line Score' in response.get_json()['error']
+    assert client.get('/get_props').get_json() == before
+
+def test_upload_rejects_props_missing_headers(client, slate):
+    stats_df, props_df = slate
+    response = client.post('/upload', data={
+        'nbaStatsFile': csv_file(stats_df, 'nba_stats.csv'),
+        'propsFile': csv_file(props_df.drop(columns=['Line Score']), 'props.csv')
+    })
+    assert response.status_code == 400
+    assert 'Line Score' in response.get_json()['error']
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+import storage
+from data_processor import DataProcessor, STAT_COMPONENTS
+from conftest import upload
+
+def test_unparseable_dates_round_trip_as_nat(tmp_path):
+    df = pd.DataFrame({'player_name': ['A', 'B', 'C'], 'date': ['2025-01-02', 'not a date', None]})
+    storage.write_dataset(df, str(tmp_path / 'stats'), date_columns=['date'])
+    storage.append_dataset(pd.DataFrame({'player_name': ['D'], 'date': ['32/13/2025']}),
+                           str(tmp_path / 'stats'), date_columns=['date'])
+
+    dates = storage.read_dataset(str(tmp_path / 'stats'))['date']
+    assert dates.iloc[0] == pd.Timestamp('2025-01-02')
+    assert dates.iloc[1:].isna().all()
+
+def test_writer_matches_write_dataset(tmp_path):
+    df = pd.DataFrame({'player_name': ['B', 'A', 'C', 'A'], 'pts': [1, 2, 3, 4],
+                       'date': ['2025-01-02', '2025-01-03', None, '2025-01-05']})
+    storage.write_dataset(df, str(tmp_path / 'whole'), date_columns=['date'])
+    writer = storage.DatasetWriter(str(tmp_path / 'chunked'), date_columns=['date'])
+    writer.append(df.iloc[:2])
+    writer.append(df.iloc[2:])
+    writer.close()
+
+    pd.testing.assert_frame_equal(storage.read_dataset(str(tmp_path / 'whole')),
+                                  storage.read_dataset(str(tmp_path / 'chunked')))
+
+def test_stored_index_gives_same_analysis(client, app_module, slate):
+    stats_df, props_df = slate
+    upload(client, stats_df, props_df)
+    dataset = app_module.dataset_cache.get()
+    stored = app_module.load_dataset(dataset.version).processor
+    built = DataProcessor(dataset.nba_stats_df, dataset.props_df.copy())
+
+    players = stats_df[['player_name', 'team_abbreviation']].drop_duplicates().head(20).to_numpy()
+    for player, team in players:
+        for stat_name in STAT_COMPONENTS:
+            for view_mode in ('last_5', 'last_10', 'season'):
+                assert (stored.analyze_prop(player, team, stat_name, 10.5, view_mode)
+                        == built.analyze_prop(player, team, stat_name, 10.5, view_mode))
+    assert np.array_equal(stored._log_rows, built._log_rows)